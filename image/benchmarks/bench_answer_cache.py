@@ -0,0 +1,55 @@
+# benchmarks/bench_answer_cache.py
+#
+# Measures the hit-path latency of the semantic answer cache: a lookup against a full
+# bucket of cached answers, and multi_agent_query end to end with a warm embedding.
+#
+# Usage (from image/): python benchmarks/bench_answer_cache.py
+
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import utils.answer_cache as answer_cache  # noqa: E402
+import workflow  # noqa: E402
+from utils.answer_cache import SemanticAnswerCache, get_answer_cache  # noqa: E402
+
+DIMENSION = 1536
+ENTRIES = 512
+LOOKUPS = 2000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((ENTRIES, DIMENSION)).astype(np.float32)
+    result = {"Professor's Notes": "cached answer", "Professor's Sources": []}
+
+    cache = SemanticAnswerCache(max_entries=ENTRIES)
+    for embedding in embeddings:
+        cache.store("drvinay", None, embedding.tolist(), result)
+
+    near_duplicate = (embeddings[7] + 0.01 * rng.standard_normal(DIMENSION)).tolist()
+    start = time.perf_counter()
+    for _ in range(LOOKUPS):
+        assert cache.lookup("drvinay", None, near_duplicate) is not None
+    per_lookup = (time.perf_counter() - start) / LOOKUPS
+    print(f"lookup over {ENTRIES} entries: {per_lookup * 1e6:.1f} us")
+
+    embedding = embeddings[0].tolist()
+    # The published corpus version is read from S3 at most every 30 s; serve it locally
+    answer_cache.load_corpus_version = lambda teacher_name: "v1"
+    workflow.embed_query_cached = lambda text: embedding
+    get_answer_cache().store("drvinay", None, embedding, result)
+
+    start = time.perf_counter()
+    for _ in range(100):
+        asyncio.run(workflow.multi_agent_query("What is pressure?", "drvinay"))
+    print(f"multi_agent_query hit path: {(time.perf_counter() - start) * 10:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
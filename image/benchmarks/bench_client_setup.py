@@ -0,0 +1,58 @@
+# benchmarks/bench_client_setup.py
+#
+# Measures the per-request client setup overhead that the shared client registry
+# removes: building Bedrock, DynamoDB and S3 clients from scratch on every request
+# versus fetching them from utils.clients. No network calls are made.
+#
+# Usage (from image/): python benchmarks/bench_client_setup.py
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+
+import boto3  # noqa: E402
+from langchain_aws import BedrockEmbeddings, ChatBedrock  # noqa: E402
+
+from utils import clients  # noqa: E402
+from utils.config import BEDROCK_MODEL_ID, PROCESSED_FILES_TABLE  # noqa: E402
+
+REQUESTS = 20
+
+
+def per_request_setup():
+    BedrockEmbeddings()
+    ChatBedrock(model_id=BEDROCK_MODEL_ID)
+    boto3.resource("dynamodb").Table(PROCESSED_FILES_TABLE)
+    boto3.client("s3")
+
+
+def registry_setup():
+    clients.get_embedding_model()
+    clients.get_chat_model()
+    clients.get_dynamodb_table(PROCESSED_FILES_TABLE)
+    clients.get_s3_client()
+
+
+def measure(setup):
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        setup()
+    return (time.perf_counter() - start) / REQUESTS * 1000
+
+
+def main():
+    print(f"fresh clients per request: {measure(per_request_setup):.2f} ms/request")
+    start = time.perf_counter()
+    registry_setup()
+    print(f"registry first use:        {(time.perf_counter() - start) * 1000:.2f} ms")
+    print(f"registry warm:             {measure(registry_setup):.4f} ms/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# benchmarks/bench_context_assembly.py
+#
+# Builds the combined prompt from retrieval results shaped like production ones
+# (neighbouring 600-char chunks with a 120-char overlap, split by the same splitter
+# as ingestion, pages repeating a running header, and a 2000-token Tavily context
+# whose results quote each other) with and without context assembly, and reports
+# prompt tokens, assembly time and the time to first token this implies for a
+# model whose prefill cost grows with input tokens.
+#
+# Usage (from image/): python benchmarks/bench_context_assembly.py [--top-k 12]
+#     [--queries 200] [--first-token-ms 350] [--prefill-ms-per-1k 120]
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter  # noqa: E402
+
+from utils.config import (  # noqa: E402
+    COMBINED_PROMPT_TEMPLATE,
+    PDF_CHUNK_OVERLAP,
+    PDF_CHUNK_SIZE,
+    PROFESSOR_CONTEXT_TOKEN_BUDGET,
+    WEB_CONTEXT_TOKEN_BUDGET,
+)
+from utils.context_assembler import (  # noqa: E402
+    assemble_professor_context,
+    assemble_web_context,
+    estimate_tokens,
+)
+
+HEADER = "Fluid Mechanics, Lecture Notes, Department of Civil Engineering."
+WORDS = (
+    "pressure fluid density velocity flow pipe energy head loss viscosity "
+    "laminar turbulent Reynolds number continuity Bernoulli pump elevation"
+).split()
+
+
+def sentence(rng):
+    words = rng.sample(WORDS, rng.randint(8, 14))
+    return " ".join(words).capitalize() + "."
+
+
+def page_text(rng, sentences=30):
+    return HEADER + " " + " ".join(sentence(rng) for _ in range(sentences))
+
+
+def build_matches(rng, top_k):
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=PDF_CHUNK_SIZE, chunk_overlap=PDF_CHUNK_OVERLAP
+    )
+    pages = {
+        (f"lecture-{f:02d}.pdf", page): splitter.split_text(page_text(rng))
+        for f in range(3)
+        for page in range(1, 4)
+    }
+    # Relevant passages usually span neighbouring chunks of a few pages
+    candidates = []
+    for (source, page), chunks in pages.items():
+        start = rng.randrange(max(1, len(chunks) - 3))
+        candidates.extend((source, page, idx, chunks[idx]) for idx in range(start, min(start + 3, len(chunks))))
+    rng.shuffle(candidates)
+    return [
+        SimpleNamespace(
+            id=f"{source}:{page}:{idx}",
+            score=round(0.9 - rank * 0.01, 3),
+            metadata={
+                "text": text,
+                "source": source,
+                "page": page,
+                "google_drive_link": f"https://drive.google.com/file/d/{source}/view",
+            },
+        )
+        for rank, (source, page, idx, text) in enumerate(candidates[:top_k])
+    ]
+
+
+def build_web_context(rng, results=5):
+    shared = [sentence(rng) for _ in range(6)]
+    items = []
+    for i in range(results):
+        body = [sentence(rng) for _ in range(12)] + rng.sample(shared, 4)
+        rng.shuffle(body)
+        items.append({"url": f"https://example.org/article-{i}", "content": " ".join(body)})
+    # get_search_context returns the list JSON encoded twice
+    return json.dumps(json.dumps(items))
+
+
+def legacy_context(matches):
+    return {
+        "context_text": "\n\n---\n\n".join(m.metadata["text"] for m in matches),
+        "sources": [
+            f"{m.metadata['source']} (Page {m.metadata.get('page', 'N/A')}) - {m.metadata.get('google_drive_link', 'No link available')}"
+            for m in matches
+        ],
+    }
+
+
+def prompt(professor, web):
+    return COMBINED_PROMPT_TEMPLATE.format(
+        professor_context=professor["context_text"],
+        professor_sources="\n".join(professor["sources"]),
+        web_context=web,
+        question="How does viscosity affect head loss in laminar pipe flow?",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top-k", type=int, default=12)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--first-token-ms", type=float, default=350.0)
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    workloads = [
+        (build_matches(rng, args.top_k), build_web_context(rng))
+        for _ in range(args.queries)
+    ]
+
+    totals = {"legacy": 0, "assembled": 0}
+    assembly_seconds = 0.0
+    for matches, web in workloads:
+        totals["legacy"] += estimate_tokens(prompt(legacy_context(matches), web))
+        start = time.perf_counter()
+        professor = assemble_professor_context(matches, PROFESSOR_CONTEXT_TOKEN_BUDGET)
+        web_context = assemble_web_context(web, WEB_CONTEXT_TOKEN_BUDGET)
+        assembly_seconds += time.perf_counter() - start
+        totals["assembled"] += estimate_tokens(prompt(professor, web_context))
+
+    legacy = totals["legacy"] / args.queries
+    assembled = totals["assembled"] / args.queries
+    print(f"top_k={args.top_k}, budgets: professor {PROFESSOR_CONTEXT_TOKEN_BUDGET}, web {WEB_CONTEXT_TOKEN_BUDGET} tokens")
+    print(f"prompt tokens (mean): legacy {legacy:.0f}, assembled {assembled:.0f} ({100 * (1 - assembled / legacy):.1f}% fewer)")
+    print(f"assembly time: {assembly_seconds / args.queries * 1000:.2f} ms per query")
+    for label, tokens in (("legacy", legacy), ("assembled", assembled)):
+        ttft = args.first_token_ms + tokens / 1000 * args.prefill_ms_per_1k
+        print(f"estimated time to first token ({label}): {ttft:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# benchmarks/bench_drive_link_backfill.py
+#
+# Runs update_missing_drive_links against an in-memory index (metadata filters,
+# paginated ID listing and per-vector updates, with a fixed latency per request)
+# and a fake file-ID service, and reports vectors/sec, HTTP lookups made and the
+# lookups the per-vector loop would have made. The service returns no file ID for
+# one file; its vectors must be left without a link, and vectors that already have
+# one must not be rewritten.
+#
+# Usage (from image/): python benchmarks/bench_drive_link_backfill.py [--files 20]
+#     [--chunks-per-file 400] [--missing 0.75]
+
+import argparse
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from services import pinecone_service  # noqa: E402
+
+TEACHER = "drvinay"
+INDEX_LATENCY = 0.002
+LOOKUP_LATENCY = 0.05
+DIMENSION = 1536
+
+
+def matches_filter(metadata, query_filter):
+    for key, condition in query_filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, f) for f in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, f) for f in condition):
+                return False
+        else:
+            for op, value in condition.items():
+                present = key in metadata
+                if op == "$exists":
+                    ok = present == value
+                elif op == "$eq":
+                    ok = present and metadata[key] == value
+                elif op == "$in":
+                    ok = present and metadata[key] in value
+                elif op == "$nin":
+                    ok = metadata.get(key) not in value
+                else:
+                    raise ValueError(f"Unsupported operator {op}")
+                if not ok:
+                    return False
+    return True
+
+
+class InMemoryIndex:
+    def __init__(self):
+        self.vectors = {}
+        self.requests = 0
+        self.updated = []
+        self.lock = threading.Lock()
+
+    def _request(self):
+        with self.lock:
+            self.requests += 1
+        time.sleep(INDEX_LATENCY)
+
+    def query(self, vector, top_k, include_metadata, include_values, filter):
+        self._request()
+        found = []
+        for vector_id, (values, metadata) in sorted(self.vectors.items()):
+            if matches_filter(metadata, filter):
+                found.append(
+                    SimpleNamespace(
+                        id=vector_id,
+                        metadata=dict(metadata) if include_metadata else None,
+                        values=values if include_values else [],
+                    )
+                )
+                if len(found) == top_k:
+                    break
+        return SimpleNamespace(matches=found)
+
+    def list(self, prefix="", limit=100):
+        ids = sorted(i for i in self.vectors if i.startswith(prefix))
+        for start in range(0, len(ids), limit):
+            self._request()
+            yield ids[start : start + limit]
+
+    def update(self, id, set_metadata):
+        self._request()
+        with self.lock:
+            self.updated.append(id)
+            self.vectors[id][1].update(set_metadata)
+
+
+class FakeFileIdService:
+    def __init__(self, unknown_files=()):
+        self.calls = 0
+        self.unknown_files = set(unknown_files)
+        self.lock = threading.Lock()
+
+    def get(self, url, params, timeout):
+        with self.lock:
+            self.calls += 1
+        time.sleep(LOOKUP_LATENCY)
+        name = params["file_name"]
+        file_id = "" if name in self.unknown_files else f"id-{name}"
+        return SimpleNamespace(raise_for_status=lambda: None, json=lambda: {"id": file_id})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--chunks-per-file", type=int, default=400)
+    parser.add_argument("--missing", type=float, default=0.75)
+    args = parser.parse_args()
+
+    index = InMemoryIndex()
+    missing = 0
+    for f in range(args.files):
+        source = f"lecture-{f:03d}.pdf"
+        for c in range(args.chunks_per_file):
+            metadata = {"source": source, "text": "..."}
+            if c >= args.chunks_per_file * args.missing:
+                metadata["google_drive_link"] = f"https://drive.google.com/file/d/id-{source}/view"
+            else:
+                missing += 1
+            index.vectors[f"{source}:{c // 5 + 1}:{c % 5}"] = ([0.1] * DIMENSION, metadata)
+
+    unknown = "lecture-000.pdf"
+    unresolvable = {
+        vector_id
+        for vector_id, (_, metadata) in index.vectors.items()
+        if metadata["source"] == unknown and "google_drive_link" not in metadata
+    }
+    service = FakeFileIdService(unknown_files={unknown})
+    pinecone_service.requests = SimpleNamespace(get=service.get)
+    pinecone_service.get_vector_index = lambda name: index
+    # IDs come from the index here, not from manifests in S3
+    pinecone_service.load_chunk_manifest = lambda teacher, key: None
+
+    stats = {}
+    pinecone_service.update_missing_drive_links(TEACHER, stats)
+    print(f"vectors missing a link: {missing}")
+    print(f"backfill: {stats}")
+    print(f"index requests: {index.requests}, file-ID service calls: {service.calls}")
+    print(f"per-vector loop would make {missing} file-ID service calls")
+    left = {
+        vector_id
+        for vector_id, (_, metadata) in index.vectors.items()
+        if "google_drive_link" not in metadata
+    }
+    assert left == unresolvable, f"{len(left)} vectors left without a link"
+    assert len(index.updated) == len(set(index.updated)) == missing - len(unresolvable), (
+        f"{len(index.updated)} updates for {missing - len(unresolvable)} resolvable vectors"
+    )
+    assert stats["failed_files"] == [unknown], stats["failed_files"]
+
+
+if __name__ == "__main__":
+    main()
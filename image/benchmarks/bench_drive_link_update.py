@@ -0,0 +1,79 @@
+# benchmarks/bench_drive_link_update.py
+#
+# Updates the drive link of one file through update_drive_link_for_file against the
+# in-memory index of bench_drive_link_backfill, with IDs taken from the chunk
+# manifest and from paginated listing, and compares the estimated network bytes
+# with the old query-with-values-then-re-upsert path.
+#
+# Usage (from image/): python benchmarks/bench_drive_link_update.py [--chunks 2000]
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_drive_link_backfill import DIMENSION, TEACHER, InMemoryIndex  # noqa: E402
+from services import pinecone_service  # noqa: E402
+from utils.upsert_writer import REQUEST_OVERHEAD_BYTES, estimate_vector_bytes  # noqa: E402
+
+FILE_NAME = "textbook.pdf"
+NEW_LINK = "https://drive.google.com/file/d/new-id/view"
+
+
+class MeteredIndex(InMemoryIndex):
+    def __init__(self):
+        super().__init__()
+        self.bytes = 0
+
+    def list(self, prefix="", limit=100):
+        for page in super().list(prefix, limit):
+            self.bytes += sum(len(i) + 3 for i in page) + REQUEST_OVERHEAD_BYTES
+            yield page
+
+    def update(self, id, set_metadata):
+        self.bytes += len(id) + len(json.dumps(set_metadata)) + REQUEST_OVERHEAD_BYTES
+        super().update(id, set_metadata)
+
+
+def build_index(chunks):
+    index = MeteredIndex()
+    for c in range(chunks):
+        index.vectors[f"{FILE_NAME}:{c // 5 + 1}:{c % 5}"] = (
+            [0.123456789] * DIMENSION,
+            {"source": FILE_NAME, "text": "x" * 600, "google_drive_link": "old"},
+        )
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=2000)
+    args = parser.parse_args()
+
+    index = build_index(args.chunks)
+    # The old path read every vector with its values and upserted it back
+    legacy_bytes = 2 * sum(
+        estimate_vector_bytes({"id": i, "values": v, "metadata": m})
+        for i, (v, m) in index.vectors.items()
+    )
+    print(f"query + re-upsert (estimated): {legacy_bytes / 1e6:.2f} MB")
+
+    for label, manifest in [("list", None), ("manifest", True)]:
+        index = build_index(args.chunks)
+        pinecone_service.get_vector_index = lambda name: index
+        pinecone_service.load_chunk_manifest = lambda teacher, key: (
+            {"chunks": {i: "" for i in index.vectors}} if manifest else None
+        )
+        stats = {}
+        pinecone_service.update_drive_link_for_file(FILE_NAME, NEW_LINK, TEACHER, stats)
+        assert all(m["google_drive_link"] == NEW_LINK for _, m in index.vectors.values())
+        print(
+            f"metadata-only ({label}): {index.bytes / 1e6:.3f} MB, "
+            f"{100 * (1 - index.bytes / legacy_bytes):.1f}% fewer bytes, {stats}"
+        )
+
+
+if __name__ == "__main__":
+    main()
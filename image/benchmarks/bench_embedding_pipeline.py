@@ -0,0 +1,76 @@
+# benchmarks/bench_embedding_pipeline.py
+#
+# Compares ingestion embedding throughput (chunks/sec) of the old one-call-per-chunk
+# loop with the concurrent pipeline used by ingestion (iter_embedded_items),
+# against a local fake embedder that, like Titan, makes one request per text with
+# a fixed latency and occasional throttling. The request count stays one per
+# chunk; the gain comes from concurrency.
+#
+# Usage (from image/): python benchmarks/bench_embedding_pipeline.py
+
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils.embedding_pipeline import (  # noqa: E402
+    embedding_throughput,
+    iter_embedded_items,
+)
+
+CHUNKS = 400
+REQUEST_LATENCY = 0.01
+THROTTLE_RATE = 0.02
+
+
+class FakeEmbeddings:
+    def __init__(self, throttle_rate=0.0):
+        self.throttle_rate = throttle_rate
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def _embed(self, text):
+        with self.lock:
+            self.calls += 1
+        time.sleep(REQUEST_LATENCY)
+        if random.random() < self.throttle_rate:
+            raise ValueError("Error raised by inference endpoint: ThrottlingException")
+        return [float(len(text))] * 1536
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+
+def main():
+    texts = [f"chunk {i} " * 40 for i in range(CHUNKS)]
+
+    fake = FakeEmbeddings()
+    start = time.perf_counter()
+    serial = [fake.embed_query(text) for text in texts]
+    print("serial embed_query:", embedding_throughput(len(serial), time.perf_counter() - start))
+
+    for texts_per_task, concurrency in [(16, 1), (16, 4), (16, 8), (32, 8)]:
+        fake = FakeEmbeddings(THROTTLE_RATE)
+        start = time.perf_counter()
+        embeddings = []
+        for _, task_embeddings in iter_embedded_items(
+            texts, fake, texts_per_task=texts_per_task, max_concurrency=concurrency
+        ):
+            embeddings.extend(task_embeddings)
+        stats = embedding_throughput(len(embeddings), time.perf_counter() - start)
+        assert [e[0] for e in embeddings] == [float(len(t)) for t in texts]
+        print(
+            f"texts_per_task={texts_per_task} concurrency={concurrency}: "
+            f"{fake.calls} requests,",
+            stats,
+        )
+
+
+if __name__ == "__main__":
+    main()
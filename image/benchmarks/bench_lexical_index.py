@@ -0,0 +1,111 @@
+# benchmarks/bench_lexical_index.py
+#
+# Builds a BM25 lexical index over a synthetic teacher corpus (lecture-note chunks
+# mentioning names, years and course codes), then reports the time to count terms
+# and build the index, the time to replace one file's chunks as an ingestion run
+# does, its compressed size as stored in S3, the time to load it as a new container
+# would, and query latency percentiles for short exact-term queries.
+#
+# Usage (from image/): python benchmarks/bench_lexical_index.py [--chunks 5000]
+#     [--queries 1000] [--top-k 5]
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils.lexical_index import LexicalIndex, term_counts  # noqa: E402
+
+TOPICS = [
+    "process scheduling", "virtual memory", "file systems", "shell pipelines",
+    "regular expressions", "version control", "build systems", "signals",
+    "sockets", "threads", "page tables", "interrupts", "compilers", "linkers",
+]
+NAMES = ["Thompson", "Ritchie", "Kernighan", "McIlroy", "Torvalds", "Stallman", "Joy", "Pike"]
+FILLER = (
+    "the lecture works through an example and then discusses trade offs in design "
+    "performance correctness and portability across systems students should review"
+).split()
+
+
+def chunk_text(rng, i):
+    words = [rng.choice(FILLER) for _ in range(90)]
+    words[rng.randrange(90)] = rng.choice(NAMES)
+    words[rng.randrange(90)] = str(rng.randint(1960, 2024))
+    words[rng.randrange(90)] = f"ECE {rng.randint(1000, 4999)}"
+    return f"Notes on {TOPICS[i % len(TOPICS)]}. " + " ".join(words)
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = {
+        f"lecture-{i // 500:02d}.pdf:{i % 500 // 5 + 1}:{i % 5}": chunk_text(rng, i)
+        for i in range(args.chunks)
+    }
+    queries = [
+        rng.choice(
+            [
+                f"When did {rng.choice(NAMES)} cover {rng.choice(TOPICS)}?",
+                f"What was said about ECE {rng.randint(1000, 4999)}?",
+                f"What happened in {rng.randint(1960, 2024)}?",
+            ]
+        )
+        for _ in range(args.queries)
+    ]
+
+    start = time.perf_counter()
+    chunk_terms = {chunk_id: term_counts(text) for chunk_id, text in texts.items()}
+    counted = time.perf_counter() - start
+    start = time.perf_counter()
+    index = LexicalIndex.build(chunk_terms)
+    built = time.perf_counter() - start
+    changed = {k: v for k, v in chunk_terms.items() if k.startswith("lecture-00.pdf:")}
+    start = time.perf_counter()
+    index = index.replace_files(["lecture-00.pdf"], changed)
+    updated = time.perf_counter() - start
+    data = index.to_bytes()
+
+    start = time.perf_counter()
+    index = LexicalIndex.from_bytes(data)
+    loaded = time.perf_counter() - start
+
+    latencies, hits = [], 0
+    for query in queries:
+        start = time.perf_counter()
+        results = index.search(query, args.top_k)
+        latencies.append(time.perf_counter() - start)
+        hits += bool(results)
+    latencies.sort()
+
+    raw_mb = sum(len(text.encode("utf-8")) for text in texts.values()) / 1e6
+    print(
+        f"{len(index)} chunks ({raw_mb:.1f} MB of text), {len(index.terms)} terms, "
+        f"{len(index.postings_docs)} postings"
+    )
+    print(
+        f"term counting {counted:.2f}s, build {built:.2f}s, "
+        f"update of {len(changed)} chunks {updated:.2f}s"
+    )
+    print(f"index {len(data) / 1e6:.2f} MB compressed, load {loaded * 1000:.1f} ms")
+    print(
+        f"query p50 {percentile(latencies, 0.5) * 1000:.3f} ms, "
+        f"p99 {percentile(latencies, 0.99) * 1000:.3f} ms, "
+        f"{hits}/{len(queries)} queries with results"
+    )
+
+
+if __name__ == "__main__":
+    main()
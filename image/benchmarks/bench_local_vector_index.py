@@ -0,0 +1,85 @@
+# benchmarks/bench_local_vector_index.py
+#
+# Builds a local vector index the size of a teacher's corpus (float32 and float16),
+# then reports build time, files on disk, time to open it as a new container would,
+# query latency percentiles for top-k with metadata, and how often float16 returns
+# the same top-k as float32.
+#
+# Usage (from image/): python benchmarks/bench_local_vector_index.py [--vectors 5000]
+#     [--dimension 1536] [--queries 500] [--top-k 5]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils.local_vector_index import LocalVectorIndex  # noqa: E402
+
+
+def directory_mb(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vectors", type=int, default=5000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(args.vectors, args.dimension)).astype(np.float32)
+    queries = vectors[rng.integers(0, args.vectors, args.queries)] + rng.normal(
+        scale=0.5, size=(args.queries, args.dimension)
+    ).astype(np.float32)
+    records = [
+        {
+            "id": f"lecture-{i // 500:02d}.pdf:{i % 500 // 5 + 1}:{i % 5}",
+            "values": vectors[i].tolist(),
+            "metadata": {"source": f"lecture-{i // 500:02d}.pdf", "page": i % 500 // 5 + 1, "text": "x" * 600},
+        }
+        for i in range(args.vectors)
+    ]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for dtype in ("float32", "float16"):
+            path = os.path.join(tmp, dtype)
+            start = time.perf_counter()
+            index = LocalVectorIndex(path, dtype)
+            for batch in range(0, len(records), 100):
+                index.upsert(vectors=records[batch : batch + 100])
+            build = time.perf_counter() - start
+            del index
+
+            # Reopened read-only, as a container serving a baked snapshot would
+            start = time.perf_counter()
+            index = LocalVectorIndex(path, dtype, read_only=True)
+            opened = time.perf_counter() - start
+
+            latencies, top_ids = [], []
+            for query in queries:
+                start = time.perf_counter()
+                response = index.query(vector=query, top_k=args.top_k, include_metadata=True)
+                latencies.append(time.perf_counter() - start)
+                top_ids.append([match.id for match in response.matches])
+            latencies.sort()
+            results[dtype] = top_ids
+            print(
+                f"{dtype}: build {build:.2f}s, {directory_mb(path):.1f} MB on disk, "
+                f"open {opened * 1000:.1f} ms, query p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+                f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms"
+            )
+
+    same = sum(a == b for a, b in zip(results["float32"], results["float16"]))
+    print(f"float16 top-{args.top_k} identical to float32 for {same}/{args.queries} queries")
+
+
+if __name__ == "__main__":
+    main()
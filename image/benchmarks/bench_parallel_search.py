@@ -0,0 +1,73 @@
+# benchmarks/bench_parallel_search.py
+#
+# Measures the wall-clock time of the parallel_search workflow node with stubbed
+# Bedrock, Pinecone and Tavily clients. With non-blocking retrieval the node should
+# take roughly max(vector, web) rather than their sum.
+#
+# Usage (from image/): python benchmarks/bench_parallel_search.py
+
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import utils.vector_db_utils as vector_db_utils  # noqa: E402
+import utils.web_search_utils as web_search_utils  # noqa: E402
+from models.agent_state import create_initial_state  # noqa: E402
+from workflow import parallel_search  # noqa: E402
+
+EMBED_LATENCY = 0.15
+PINECONE_LATENCY = 0.15
+TAVILY_LATENCY = 0.4
+ROUNDS = 5
+
+
+class StubEmbeddings:
+    def embed_query(self, text):
+        time.sleep(EMBED_LATENCY)
+        return [0.0] * 1536
+
+
+class StubIndex:
+    def query(self, vector, top_k, include_metadata=True):
+        time.sleep(PINECONE_LATENCY)
+        match = SimpleNamespace(
+            metadata={"text": "stub chunk", "source": "stub.pdf", "page": 1}
+        )
+        return SimpleNamespace(matches=[match] * top_k)
+
+
+class StubTavily:
+    def get_search_context(self, query, search_depth, max_tokens):
+        time.sleep(TAVILY_LATENCY)
+        return "stub web context"
+
+
+async def main():
+    vector_db_utils.get_vector_index = lambda name: StubIndex()
+    # Bypass the query embedding cache so every round pays the embedding latency
+    vector_db_utils.embed_query_cached = StubEmbeddings().embed_query
+    # No lexical index to load, so hybrid retrieval uses the vector results alone
+    vector_db_utils.lexical_search = lambda teacher_name, query, top_k: []
+    web_search_utils.get_tavily_client = StubTavily
+
+    vector_latency = EMBED_LATENCY + PINECONE_LATENCY
+    print(f"vector branch: {vector_latency:.2f}s, web branch: {TAVILY_LATENCY:.2f}s")
+    print(f"sum: {vector_latency + TAVILY_LATENCY:.2f}s, max: {max(vector_latency, TAVILY_LATENCY):.2f}s")
+
+    timings = []
+    for _ in range(ROUNDS):
+        state = create_initial_state("What is pressure?", "drvinay")
+        state["processed_query"] = state["query"]
+        start = time.perf_counter()
+        await parallel_search(state)
+        timings.append(time.perf_counter() - start)
+
+    print(f"parallel_search mean over {ROUNDS} rounds: {sum(timings) / ROUNDS:.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
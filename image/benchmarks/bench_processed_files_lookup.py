@@ -0,0 +1,107 @@
+# benchmarks/bench_processed_files_lookup.py
+#
+# Reports the read cost of listing one teacher's processed files on a table with
+# 10k files: the old single filtered scan, a fully paginated filtered scan, and a
+# paginated query on the teacher GSI. Needs DynamoDB Local (or another DynamoDB
+# endpoint that reports consumed capacity):
+#
+#   docker run -p 8000:8000 amazon/dynamodb-local
+#   DYNAMODB_ENDPOINT_URL=http://localhost:8000 python benchmarks/bench_processed_files_lookup.py
+
+import os
+import sys
+import time
+
+import boto3
+from boto3.dynamodb.conditions import Attr, Key
+
+TABLE_NAME = "bench-processed-files"
+INDEX_NAME = "teacher-index"
+TEACHERS = ["drvinay", "lewas", "historyoftech", "teacher3", "teacher4"]
+FILES = 10_000
+
+
+def create_table(dynamodb):
+    try:
+        dynamodb.Table(TABLE_NAME).delete()
+        dynamodb.Table(TABLE_NAME).wait_until_not_exists()
+    except dynamodb.meta.client.exceptions.ResourceNotFoundException:
+        pass
+    table = dynamodb.create_table(
+        TableName=TABLE_NAME,
+        KeySchema=[{"AttributeName": "filename", "KeyType": "HASH"}],
+        AttributeDefinitions=[
+            {"AttributeName": "filename", "AttributeType": "S"},
+            {"AttributeName": "teacher", "AttributeType": "S"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": INDEX_NAME,
+                "KeySchema": [
+                    {"AttributeName": "teacher", "KeyType": "HASH"},
+                    {"AttributeName": "filename", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "KEYS_ONLY"},
+            }
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    table.wait_until_exists()
+    with table.batch_writer() as batch:
+        for i in range(FILES):
+            teacher = TEACHERS[i % len(TEACHERS)]
+            batch.put_item(
+                Item={
+                    "filename": f"{teacher}-lecture-{i:05d}-with-a-long-descriptive-name.pdf",
+                    "index_name": teacher,
+                    "teacher": teacher,
+                }
+            )
+    return table
+
+
+def run(label, operation, paginate, **kwargs):
+    start = time.perf_counter()
+    items, requests, capacity = 0, 0, 0.0
+    while True:
+        response = operation(ReturnConsumedCapacity="TOTAL", **kwargs)
+        requests += 1
+        items += len(response["Items"])
+        capacity += response.get("ConsumedCapacity", {}).get("CapacityUnits", 0)
+        if not paginate or "LastEvaluatedKey" not in response:
+            break
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    elapsed = (time.perf_counter() - start) * 1000
+    print(
+        f"{label:<26} {items:6d} files  {requests:3d} requests  "
+        f"{capacity:8.1f} RCU  {elapsed:8.1f} ms"
+    )
+
+
+def main():
+    endpoint = os.environ.get("DYNAMODB_ENDPOINT_URL")
+    if not endpoint:
+        sys.exit("Set DYNAMODB_ENDPOINT_URL to a DynamoDB Local endpoint")
+    dynamodb = boto3.resource(
+        "dynamodb",
+        endpoint_url=endpoint,
+        region_name=os.environ.get("AWS_DEFAULT_REGION", "us-east-1"),
+    )
+    table = create_table(dynamodb)
+    teacher = TEACHERS[0]
+    print(f"{FILES} files, listing {FILES // len(TEACHERS)} for {teacher}")
+
+    run("scan, single page (old)", table.scan, False, FilterExpression=Attr("teacher").eq(teacher))
+    run("scan, paginated", table.scan, True, FilterExpression=Attr("teacher").eq(teacher))
+    run(
+        "query on teacher-index",
+        table.query,
+        True,
+        IndexName=INDEX_NAME,
+        KeyConditionExpression=Key("teacher").eq(teacher),
+        ProjectionExpression="filename",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_query_log_writer.py
+#
+# Measures the response-path cost of logging a query: a synchronous put_item versus
+# QueryLogWriter.submit, against a local DynamoDB stand-in with a fixed per-request
+# latency. Also reports how many DynamoDB requests the batched writer made, how a
+# drain behaves when one item is always rejected, and the item size saved by prompt
+# compression.
+#
+# Usage (from image/): python benchmarks/bench_query_log_writer.py
+# Set DYNAMODB_ENDPOINT_URL to run against DynamoDB Local instead of the stand-in.
+
+import os
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils.query_log_writer import QueryLogWriter  # noqa: E402
+
+REQUEST_LATENCY = 0.01
+QUERIES = 200
+PROMPT = "You are an AI teaching assistant. " * 200
+
+
+class LocalTable:
+    """Minimal stand-in for a boto3 DynamoDB Table."""
+
+    def __init__(self, rejected=()):
+        self.items = {}
+        self.requests = 0
+        self.rejected = set(rejected)
+
+    def put_item(self, Item):
+        self.requests += 1
+        time.sleep(REQUEST_LATENCY)
+        self.items[Item["query_id"]] = Item
+
+    def batch_writer(self):
+        return _LocalBatchWriter(self)
+
+
+class _LocalBatchWriter:
+    def __init__(self, table):
+        self.table = table
+        self.items = []
+
+    def __enter__(self):
+        return self
+
+    def put_item(self, Item):
+        self.items.append(Item)
+
+    def __exit__(self, *exc):
+        for item in self.items:
+            if item["query_id"] in self.table.rejected:
+                self.table.requests += 1
+                raise ValueError(f"Item {item['query_id']} rejected")
+        for start in range(0, len(self.items), 25):
+            self.table.requests += 1
+            time.sleep(REQUEST_LATENCY)
+            for item in self.items[start : start + 25]:
+                self.table.items[item["query_id"]] = item
+
+
+def make_item(i):
+    return {"query_id": f"q{i}", "teacher": "drvinay", "prompt": PROMPT}
+
+
+def main():
+    table = LocalTable()
+    start = time.perf_counter()
+    for i in range(QUERIES):
+        table.put_item(Item=make_item(i))
+    sync = (time.perf_counter() - start) / QUERIES
+    print(f"synchronous put_item: {sync * 1000:.3f} ms/query, {table.requests} requests")
+
+    table = LocalTable()
+    writer = QueryLogWriter(table, flush_interval=0.1)
+    start = time.perf_counter()
+    for i in range(QUERIES):
+        writer.submit(make_item(i))
+    submit = (time.perf_counter() - start) / QUERIES
+    writer.drain()
+    print(
+        f"background submit:    {submit * 1000:.3f} ms/query, {table.requests} requests, "
+        f"{len(table.items)} items stored"
+    )
+
+    # One item DynamoDB keeps rejecting must not hold back the others or the drain
+    table = LocalTable(rejected={"q7"})
+    writer = QueryLogWriter(table, flush_interval=0.1)
+    for i in range(QUERIES):
+        writer.submit(make_item(i))
+    start = time.perf_counter()
+    writer.drain()
+    print(
+        f"with a rejected item: drain {(time.perf_counter() - start) * 1000:.0f} ms, "
+        f"{len(table.items)} items stored, {writer.dropped} dropped, {writer.pending()} pending"
+    )
+
+    compressed = len(zlib.compress(PROMPT.encode("utf-8")))
+    print(f"prompt size: {len(PROMPT)} bytes raw, {compressed} bytes compressed")
+
+
+if __name__ == "__main__":
+    main()
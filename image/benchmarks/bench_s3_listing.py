@@ -0,0 +1,149 @@
+# benchmarks/bench_s3_listing.py
+#
+# Measures listing a 50k-object teacher prefix against a local S3 stand-in that
+# pages at 1,000 keys and adds a fixed latency per request: the legacy single
+# list_objects_v2 call, a sequential paginated listing, the concurrent lister and
+# the cached manifest (warm, and after a few uploads with refresh=True).
+#
+# Usage (from image/): python benchmarks/bench_s3_listing.py [--objects 50000]
+#     [--sub-prefixes 50] [--latency 0.03]
+
+import argparse
+import bisect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from botocore.exceptions import ClientError  # noqa: E402
+
+from utils import s3_handler  # noqa: E402
+from utils.config import TEACHER_CONFIG  # noqa: E402
+
+TEACHER = "drvinay"
+PAGE_SIZE = 1000
+
+
+class LocalS3:
+    """In-memory stand-in for the list_objects_v2/get_object/put_object subset used."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.keys = []
+        self.objects = {}
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def add(self, key, body=b"%PDF-1.4"):
+        if key not in self.objects:
+            bisect.insort(self.keys, key)
+        self.objects[key] = body
+
+    def _request(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.latency)
+
+    def list_objects_v2(self, Bucket, Prefix="", Delimiter=None, ContinuationToken=None):
+        self._request()
+        position = int(ContinuationToken) if ContinuationToken else bisect.bisect_left(
+            self.keys, Prefix
+        )
+        contents, common_prefixes = [], []
+        while position < len(self.keys) and len(contents) + len(common_prefixes) < PAGE_SIZE:
+            key = self.keys[position]
+            if not key.startswith(Prefix):
+                break
+            rest = key[len(Prefix):]
+            if Delimiter and Delimiter in rest:
+                sub_prefix = Prefix + rest.split(Delimiter)[0] + Delimiter
+                common_prefixes.append({"Prefix": sub_prefix})
+                # Skip past every key of this sub-prefix
+                position = bisect.bisect_left(self.keys, sub_prefix + "￿")
+                continue
+            body = self.objects[key]
+            contents.append(
+                {"Key": key, "Size": len(body), "ETag": f'"{hash(body) & 0xFFFFFFFF:08x}"'}
+            )
+            position += 1
+
+        truncated = position < len(self.keys) and self.keys[position].startswith(Prefix)
+        response = {"Contents": contents, "CommonPrefixes": common_prefixes}
+        response["IsTruncated"] = truncated
+        if truncated:
+            response["NextContinuationToken"] = str(position)
+        return response
+
+    def get_object(self, Bucket, Key):
+        self._request()
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        body = self.objects[Key]
+
+        class Body:
+            def read(self):
+                return body
+
+        return {"Body": Body()}
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        self._request()
+        self.objects[Key] = Body
+
+
+def timed(label, s3, func):
+    s3.calls = 0
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    print(f"{label}: {len(result)} objects in {seconds:.2f}s, {s3.calls} requests")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--objects", type=int, default=50000)
+    parser.add_argument("--sub-prefixes", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.03)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    prefix = TEACHER_CONFIG[TEACHER]["s3_prefix"]
+    s3 = LocalS3(args.latency)
+    for i in range(args.objects):
+        s3.add(f"{prefix}course-{i % args.sub_prefixes:03d}/notes-{i:06d}.pdf")
+    s3_handler.get_s3_client = lambda: s3
+
+    def legacy():
+        response = s3.list_objects_v2(Bucket="bench", Prefix=prefix)
+        return [obj["Key"] for obj in response.get("Contents", [])]
+
+    timed("legacy single call", s3, legacy)
+    timed("sequential paginated", s3, lambda: s3_handler._list_all(prefix)[0])
+    timed("concurrent sub-prefixes", s3, lambda: s3_handler.list_objects_concurrently(prefix))
+    timed("manifest (cold)", s3, lambda: s3_handler.list_pdfs_in_s3(TEACHER))
+    timed("manifest (warm)", s3, lambda: s3_handler.list_pdfs_in_s3(TEACHER))
+
+    s3_handler._manifests.clear()
+    timed("manifest (new process, persisted)", s3, lambda: s3_handler.list_pdfs_in_s3(TEACHER))
+
+    for i in range(10):
+        s3.add(f"{prefix}course-000/new-upload-{i}.pdf")
+    s3.add(f"{prefix}course-001/notes-000001.pdf", b"%PDF-1.4 revised")
+    pdfs = timed(
+        "manifest (refresh after uploads)",
+        s3,
+        lambda: s3_handler.list_pdfs_in_s3(TEACHER, refresh=True),
+    )
+    assert len(pdfs) == args.objects + 10, "listing lost objects"
+    manifest_bytes = len(s3.objects[s3_handler._manifest_key(prefix)])
+    print(f"persisted manifest: {manifest_bytes / 1e6:.1f} MB")
+    json.loads(s3.objects[s3_handler._manifest_key(prefix)])
+
+
+if __name__ == "__main__":
+    main()
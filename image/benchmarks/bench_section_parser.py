@@ -0,0 +1,106 @@
+# benchmarks/bench_section_parser.py
+#
+# Micro-benchmark of answer parsing over long synthetic responses: the previous
+# two-parser path (parse_combined_response plus the response_formatting_agent
+# substring chain) versus the single-pass SectionParser, fed whole and in
+# streamed 4-character chunks. Reports time per response and peak allocations.
+#
+# Usage (from image/): python benchmarks/bench_section_parser.py
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils.section_parser import SectionParser, parse_sections  # noqa: E402
+
+HEADINGS = [
+    "1. Professor's Notes:",
+    "2. Professor's Sources:",
+    "3. Internet Notes:",
+    "4. Internet Sources:",
+    "5. Cross-Verification and Contradictions:",
+    "6. Extra Sources:",
+]
+LINES_PER_SECTION = 400
+ROUNDS = 20
+
+
+def legacy_parse_combined_response(response):
+    sections = [heading[3:-1] for heading in HEADINGS]
+    parsed_result = {}
+    current_section = None
+    for line in response.split("\n"):
+        if any(section in line for section in sections):
+            current_section = line.strip(":")
+            parsed_result[current_section] = ""
+        elif current_section:
+            parsed_result[current_section] += line + "\n"
+    return parsed_result
+
+
+def legacy_format(raw_response):
+    names = [heading[3:-1] for heading in HEADINGS]
+    formatted_result = {name: [] if "Sources" in name else "" for name in names}
+    current_section = None
+    for line in raw_response.split("\n"):
+        for heading, name in zip(HEADINGS, names):
+            if heading in line:
+                current_section = name
+                break
+        else:
+            if current_section:
+                if "Sources" in current_section:
+                    if line.strip():
+                        formatted_result[current_section].append(line.strip())
+                else:
+                    formatted_result[current_section] += line + "\n"
+    for key in formatted_result:
+        if isinstance(formatted_result[key], str):
+            formatted_result[key] = formatted_result[key].strip()
+    return formatted_result
+
+
+def legacy(response):
+    legacy_parse_combined_response(response)
+    return legacy_format(response)
+
+
+def streamed(response):
+    parser = SectionParser()
+    for i in range(0, len(response), 4):
+        parser.feed(response[i : i + 4])
+    parser.close()
+    return parser.result
+
+
+def measure(name, parse, response):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = parse(response)
+    elapsed = (time.perf_counter() - start) / ROUNDS
+
+    tracemalloc.start()
+    parse(response)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<22} {elapsed * 1000:8.2f} ms  peak {peak / 1024:8.1f} KiB")
+    return result
+
+
+def main():
+    body = "\n".join(
+        f"- line {i}: the quick brown fox jumps over the lazy dog" for i in range(LINES_PER_SECTION)
+    )
+    response = "\n\n".join(f"{heading}\n{body}" for heading in HEADINGS) + "\n"
+    print(f"response size: {len(response) / 1024:.0f} KiB")
+
+    expected = measure("legacy (two parsers)", legacy, response)
+    assert measure("single pass, whole", parse_sections, response) == expected
+    assert measure("single pass, streamed", streamed, response) == expected
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# benchmarks/bench_streaming_ingestion.py
+#
+# Ingests a synthetic 2,000-page PDF through process_pdf_file against a fake S3 body,
+# a fake embedder and a fake index, and checks that peak Python heap usage stays
+# under a memory ceiling and below that of the legacy path (read the whole object
+# into a BytesIO and materialise every chunk), which is measured alongside.
+#
+# Usage (from image/): python benchmarks/bench_streaming_ingestion.py [--pages 2000]
+#     [--ceiling-mb 32] [--spool-mb 8]
+#
+# Exits non-zero if the streaming path ingests nothing, upserts a different number
+# of vectors than it reports, writes a lexical shard that misses chunks, exceeds
+# the ceiling or uses as much memory as legacy.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+TEACHER = "drvinay"
+LINES_PER_PAGE = 45
+
+
+def build_pdf(path, pages):
+    """Write a minimal text PDF with one Helvetica content stream per page."""
+    offsets = []
+    with open(path, "wb") as f:
+
+        def write_object(number, body):
+            offsets.append((number, f.tell()))
+            f.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+
+        f.write(b"%PDF-1.4\n")
+        page_numbers = [4 + 2 * i for i in range(pages)]
+        write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        kids = " ".join(f"{n} 0 R" for n in page_numbers).encode()
+        write_object(2, b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages)
+        write_object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+        for i, number in enumerate(page_numbers):
+            lines = b"".join(
+                b"(Page %d line %d: spells, potions and the history of magic) Tj T*\n"
+                % (i + 1, line)
+                for line in range(LINES_PER_PAGE)
+            )
+            stream = b"BT /F1 10 Tf 14 TL 40 800 Td\n" + lines + b"ET"
+            write_object(
+                number,
+                b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+                % (number + 1),
+            )
+            write_object(
+                number + 1,
+                b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+            )
+
+        xref_offset = f.tell()
+        count = len(offsets) + 1
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % count)
+        for _, offset in sorted(offsets):
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(
+            b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (count, xref_offset)
+        )
+
+
+class FileBody:
+    def __init__(self, path):
+        self.path = path
+
+    def read(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def iter_chunks(self, chunk_size):
+        with open(self.path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+
+class FakeS3:
+    def __init__(self, path):
+        self.path = path
+
+    def get_object(self, Bucket, Key):
+        return {"Body": FileBody(self.path)}
+
+
+class FakeEmbeddings:
+    def embed_documents(self, texts):
+        return [[float(len(text))] * 1536 for text in texts]
+
+
+class FakeIndex:
+    def __init__(self):
+        self.vectors = 0
+
+    def upsert(self, vectors):
+        self.vectors += len(vectors)
+
+
+def measure(label, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peak_mb = peak / (1024 * 1024)
+    print(f"{label}: {result} chunks in {seconds:.2f}s, peak heap {peak_mb:.1f} MB")
+    return result, peak_mb
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--ceiling-mb", type=float, default=32.0)
+    parser.add_argument("--spool-mb", type=int, default=8)
+    args = parser.parse_args()
+
+    from services import pinecone_service
+    from utils import checkpoint_store, s3_handler
+    from utils.config import LEXICAL_INDEX_ENABLED
+    from utils.pdf_processor import process_pdf
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "textbook.pdf")
+        build_pdf(path, args.pages)
+        print(f"synthetic PDF: {args.pages} pages, {os.path.getsize(path) / 1e6:.1f} MB")
+
+        s3_handler.get_s3_client = lambda: FakeS3(path)
+        s3_handler.PDF_SPOOL_MAX_MEMORY_MB = args.spool_mb
+        index = FakeIndex()
+        pinecone_service.get_vector_index = lambda name: index
+        pinecone_service.get_embedding_function = lambda: FakeEmbeddings()
+        pinecone_service.get_google_drive_link_pdf = lambda name: "https://drive/fake"
+        pinecone_service.load_checkpoint = lambda teacher, key, etag: None
+        checkpoint_store.save_checkpoint = lambda teacher, key, checkpoint: None
+        pinecone_service.delete_checkpoint = lambda teacher, key: None
+        pinecone_service.load_chunk_manifest = lambda teacher, key: None
+        pinecone_service.save_chunk_manifest = lambda teacher, key, manifest: None
+        pinecone_service.add_processed_file_dynamodb = lambda *args: None
+        shard_lines = []
+
+        def save_lexical_shard(teacher, key, body):
+            body.seek(0)
+            shard_lines.append(sum(1 for _ in body))
+
+        pinecone_service.save_lexical_shard = save_lexical_shard
+
+        legacy_chunks, legacy_peak = measure(
+            "legacy (BytesIO + chunk list)",
+            lambda: len(process_pdf(BytesIO(FileBody(path).read()), "textbook.pdf")),
+        )
+        streaming_chunks, streaming_peak = measure(
+            "streaming process_pdf_file",
+            lambda: pinecone_service.process_pdf_file("textbook.pdf", TEACHER),
+        )
+        print(f"upserted vectors: {index.vectors}, lexical shard lines: {sum(shard_lines)}")
+
+    print(
+        f"ceiling {args.ceiling_mb} MB: streaming peak {streaming_peak:.1f} MB "
+        f"({legacy_peak:.1f} MB legacy extraction alone)"
+    )
+    failures = []
+    if not streaming_chunks:
+        failures.append("streaming ingestion processed no chunks")
+    if streaming_chunks != index.vectors:
+        failures.append(
+            f"{streaming_chunks} chunks reported but {index.vectors} vectors upserted"
+        )
+    if LEXICAL_INDEX_ENABLED and sum(shard_lines) != streaming_chunks:
+        failures.append(
+            f"{streaming_chunks} chunks streamed but {sum(shard_lines)} in the lexical shard"
+        )
+    if streaming_chunks != legacy_chunks:
+        failures.append(f"{streaming_chunks} chunks streamed but {legacy_chunks} legacy")
+    if streaming_peak > args.ceiling_mb:
+        failures.append("streaming ingestion exceeded the memory ceiling")
+    if streaming_peak >= legacy_peak:
+        failures.append("streaming ingestion used no less memory than the legacy path")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
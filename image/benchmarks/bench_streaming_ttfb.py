@@ -0,0 +1,101 @@
+# benchmarks/bench_streaming_ttfb.py
+#
+# Compares time-to-first-byte of the buffered /combined_query path (multi_agent_query)
+# with the streaming path (stream_combined_query), using stubbed retrieval and a fake
+# Bedrock chat model that generates tokens at a fixed rate.
+#
+# Usage (from image/): python benchmarks/bench_streaming_ttfb.py
+
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import utils.query_processing as query_processing  # noqa: E402
+import utils.vector_db_utils as vector_db_utils  # noqa: E402
+import utils.web_search_utils as web_search_utils  # noqa: E402
+import workflow  # noqa: E402
+
+TOKEN_LATENCY = 0.01
+ANSWER = """1. Professor's Notes:
+Pressure is the force applied perpendicular to a surface per unit area.
+
+2. Professor's Sources:
+- fluids.pdf (Page 3)
+
+3. Internet Notes:
+Pascal's law states that pressure applied to a confined fluid is transmitted undiminished.
+
+4. Internet Sources:
+- Web Source 1
+
+5. Cross-Verification and Contradictions:
+No contradictions found.
+
+6. Extra Sources:
+No extra sources.
+"""
+TOKENS = [ANSWER[i : i + 4] for i in range(0, len(ANSWER), 4)]
+
+
+class FakeChatBedrock:
+    def __init__(self, **kwargs):
+        pass
+
+    def invoke(self, prompt):
+        time.sleep(TOKEN_LATENCY * len(TOKENS))
+        return SimpleNamespace(content=ANSWER)
+
+    async def astream(self, prompt):
+        for token in TOKENS:
+            await asyncio.sleep(TOKEN_LATENCY)
+            yield SimpleNamespace(content=token)
+
+
+class StubIndex:
+    def query(self, vector, top_k, include_metadata=True):
+        match = SimpleNamespace(
+            metadata={"text": "stub chunk", "source": "fluids.pdf", "page": 3}
+        )
+        return SimpleNamespace(matches=[match] * top_k)
+
+
+class StubTavily:
+    def get_search_context(self, query, search_depth, max_tokens):
+        return "stub web context"
+
+
+async def main():
+    query_processing.get_chat_model = FakeChatBedrock
+    vector_db_utils.get_vector_index = lambda name: StubIndex()
+    vector_db_utils.embed_query_cached = lambda text: [0.0] * 1536
+    # No lexical index to load, so hybrid retrieval uses the vector results alone
+    vector_db_utils.lexical_search = lambda teacher_name, query, top_k: []
+    web_search_utils.get_tavily_client = StubTavily
+    workflow.ANSWER_CACHE_ENABLED = False
+
+    start = time.perf_counter()
+    await workflow.multi_agent_query("What is pressure?", "drvinay")
+    buffered = time.perf_counter() - start
+    print(f"buffered: first byte after {buffered * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    first_token = first_section = None
+    async for event in workflow.stream_combined_query("What is pressure?", "drvinay"):
+        elapsed = time.perf_counter() - start
+        if event["type"] == "token" and first_token is None:
+            first_token = elapsed
+        if event["type"] == "section" and first_section is None:
+            first_section = elapsed
+    total = time.perf_counter() - start
+    print(
+        f"streaming: first token after {first_token * 1000:.0f} ms, "
+        f"first section after {first_section * 1000:.0f} ms, done after {total * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+# benchmarks/bench_translation.py
+#
+# Compares the old one-call-per-string translation of a formatted result with the
+# batched, cached translation engine, using a local fake backend with a fixed
+# per-request latency.
+#
+# Usage (from image/): python benchmarks/bench_translation.py
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils.translation_utils import (  # noqa: E402
+    BATCH_MARKER,
+    BATCH_SEPARATOR,
+    set_translation_backend,
+    translate_dict,
+)
+
+REQUEST_LATENCY = 0.15
+
+FORMATTED_RESULT = {
+    "Professor's Notes": "Pressure is the force applied per unit area. " * 8,
+    "Professor's Sources": [f"- fluids.pdf (Page {i}) - No link available" for i in range(5)],
+    "Internet Notes": "Pascal's law describes pressure in confined fluids. " * 8,
+    "Internet Sources": ["- Web Source 1", "- Web Source 2"],
+    "Cross-Verification and Contradictions": "No contradictions found.",
+    "Extra Sources": ["No extra sources."],
+}
+
+
+class FakeTranslationBackend:
+    def __init__(self):
+        self.requests = 0
+
+    def _translate(self, text):
+        self.requests += 1
+        time.sleep(REQUEST_LATENCY)
+        return text.upper()
+
+    def translate_batch(self, texts, target_language):
+        if len(texts) == 1:
+            return [self._translate(texts[0])]
+        return self._translate(BATCH_SEPARATOR.join(texts)).split(BATCH_MARKER)
+
+
+async def main():
+    backend = FakeTranslationBackend()
+    set_translation_backend(backend)
+
+    strings = sum(
+        len(value) if isinstance(value, list) else 1 for value in FORMATTED_RESULT.values()
+    )
+    print(f"serial baseline: {strings} requests, ~{strings * REQUEST_LATENCY:.2f}s")
+
+    start = time.perf_counter()
+    await translate_dict(FORMATTED_RESULT, "es")
+    print(f"cold: {backend.requests} requests, {time.perf_counter() - start:.2f}s")
+
+    backend.requests = 0
+    start = time.perf_counter()
+    await translate_dict(FORMATTED_RESULT, "es")
+    print(f"warm: {backend.requests} requests, {time.perf_counter() - start:.4f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,555 @@
+# benchmarks/fakes.py
+#
+# Deterministic, offline stand-ins for the upstream services the app calls
+# (Bedrock embeddings and chat, Pinecone, Tavily, DynamoDB, S3 and the file-ID
+# service), each with a seeded latency distribution, and install_fakes() to put
+# them in the client registry so every code path picks them up.
+
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from bench_s3_listing import LocalS3
+from botocore.exceptions import ClientError
+
+# service -> (median ms, lognormal sigma). Rough figures for us-east-1 from Lambda.
+DEFAULT_LATENCIES = {
+    "embeddings": (40.0, 0.3),
+    "pinecone": (25.0, 0.4),
+    "tavily": (600.0, 0.5),
+    "llm_first_token": (500.0, 0.4),
+    "llm_token": (12.0, 0.2),
+    "dynamodb": (6.0, 0.3),
+    "s3": (20.0, 0.4),
+    "file_id_service": (80.0, 0.3),
+}
+
+DIMENSION = 1536
+
+TOPICS = [
+    "pressure in fluids",
+    "Bernoulli's principle",
+    "the first law of thermodynamics",
+    "Newton's second law",
+    "entropy of an ideal gas",
+    "heat transfer by convection",
+    "viscosity and laminar flow",
+    "buoyancy and Archimedes' principle",
+]
+
+
+class LatencyModel:
+    """Seeded lognormal latencies per service, scaled by a common factor."""
+
+    def __init__(self, latencies=None, scale=1.0, seed=0):
+        self.latencies = dict(DEFAULT_LATENCIES)
+        self.latencies.update(latencies or {})
+        self.scale = scale
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self, service):
+        median_ms, sigma = self.latencies[service]
+        with self._lock:
+            factor = self._random.lognormvariate(0.0, sigma) if sigma else 1.0
+        return median_ms * factor * self.scale / 1000
+
+    def sleep(self, service):
+        time.sleep(self.sample(service))
+
+
+class CallCounter:
+    def __init__(self):
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, name):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+
+def _seeded_random(*parts):
+    digest = hashlib.sha256("\x1f".join(map(str, parts)).encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def deterministic_vector(text, dimension=DIMENSION):
+    rng = _seeded_random("vector", text)
+    values = [rng.gauss(0.0, 1.0) for _ in range(dimension)]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [v / norm for v in values]
+
+
+class FakeEmbeddings:
+    """BedrockEmbeddings stand-in returning unit vectors derived from the text."""
+
+    def __init__(self, latency, calls):
+        self.latency = latency
+        self.calls = calls
+
+    def embed_query(self, text):
+        self.calls.add("bedrock.embed_query")
+        self.latency.sleep("embeddings")
+        return deterministic_vector(text)
+
+    def embed_documents(self, texts):
+        self.calls.add("bedrock.embed_documents")
+        self.latency.sleep("embeddings")
+        return [deterministic_vector(text) for text in texts]
+
+
+def synthetic_corpus(chunks):
+    """Yield (chunk ID, metadata) for a corpus of lecture PDFs, 5 chunks a page."""
+    for i in range(chunks):
+        source = f"lecture-{i // 50:02d}.pdf"
+        page = i % 50 // 5 + 1
+        topic = TOPICS[i % len(TOPICS)]
+        yield f"{source}:{page}:{i % 5}", {
+            "source": source,
+            "page": page,
+            "text": f"Lecture notes on {topic}. " * 25,
+            "google_drive_link": f"https://drive.google.com/file/d/{source}/view",
+        }
+
+
+class FakePineconeIndex:
+    """
+    Pinecone Index stand-in seeded with a synthetic corpus.
+
+    Queries return top_k chunks picked deterministically from the query vector, so
+    results are stable run to run without the cost of a real similarity search.
+    """
+
+    def __init__(self, name, latency, calls, corpus_chunks=500):
+        self.name = name
+        self.latency = latency
+        self.calls = calls
+        self.vectors = {}
+        self._lock = threading.Lock()
+        for vector_id, metadata in synthetic_corpus(corpus_chunks):
+            self.vectors[vector_id] = (None, metadata)
+
+    def _request(self, operation):
+        self.calls.add(f"pinecone.{operation}")
+        self.latency.sleep("pinecone")
+
+    def query(
+        self,
+        vector,
+        top_k,
+        include_metadata=True,
+        include_values=False,
+        filter=None,
+        **kwargs,
+    ):
+        self._request("query")
+        with self._lock:
+            ids = sorted(self.vectors)
+        rng = _seeded_random("query", self.name, round(vector[0], 8), round(vector[-1], 8))
+        chosen = rng.sample(ids, min(top_k, len(ids)))
+        matches = []
+        for rank, vector_id in enumerate(chosen):
+            values, metadata = self.vectors[vector_id]
+            matches.append(
+                SimpleNamespace(
+                    id=vector_id,
+                    score=round(0.9 - rank * 0.01, 4),
+                    metadata=dict(metadata) if include_metadata else None,
+                    values=(values or []) if include_values else [],
+                )
+            )
+        return SimpleNamespace(matches=matches)
+
+    def fetch(self, ids, **kwargs):
+        self._request("fetch")
+        with self._lock:
+            found = {i: self.vectors[i] for i in ids if i in self.vectors}
+        return SimpleNamespace(
+            vectors={
+                vector_id: SimpleNamespace(
+                    id=vector_id, values=values or [], metadata=dict(metadata)
+                )
+                for vector_id, (values, metadata) in found.items()
+            }
+        )
+
+    def upsert(self, vectors, **kwargs):
+        self._request("upsert")
+        with self._lock:
+            for vector in vectors:
+                if isinstance(vector, dict):
+                    vector_id, values, metadata = (
+                        vector["id"],
+                        vector["values"],
+                        vector.get("metadata", {}),
+                    )
+                else:
+                    vector_id, values, metadata = vector
+                self.vectors[vector_id] = (values, dict(metadata))
+        return {"upserted_count": len(vectors)}
+
+    def list(self, prefix="", limit=100):
+        with self._lock:
+            ids = sorted(i for i in self.vectors if i.startswith(prefix))
+        for start in range(0, len(ids), limit):
+            self._request("list")
+            yield ids[start : start + limit]
+
+    def delete(self, ids, **kwargs):
+        self._request("delete")
+        with self._lock:
+            for vector_id in ids:
+                self.vectors.pop(vector_id, None)
+
+    def update(self, id, set_metadata=None, **kwargs):
+        self._request("update")
+        with self._lock:
+            if id in self.vectors:
+                self.vectors[id][1].update(set_metadata or {})
+
+
+class FakeTavilyClient:
+    """TavilyClient stand-in for get_search_context, search and qna_search."""
+
+    def __init__(self, latency, calls):
+        self.latency = latency
+        self.calls = calls
+
+    def _results(self, query, max_results=5):
+        return [
+            {
+                "title": f"Web Source {i + 1}",
+                "url": f"https://example.org/{hashlib.sha1(query.encode()).hexdigest()[:8]}/{i}",
+                "content": f"An explanation of {query} from source {i + 1}. " * 8,
+                "score": round(0.95 - i * 0.05, 2),
+            }
+            for i in range(max_results)
+        ]
+
+    def get_search_context(self, query, search_depth="basic", max_tokens=4000, **kwargs):
+        self.calls.add("tavily.get_search_context")
+        self.latency.sleep("tavily")
+        return json.dumps(
+            [{"url": r["url"], "content": r["content"]} for r in self._results(query)]
+        )
+
+    def search(self, query, max_results=5, **kwargs):
+        self.calls.add("tavily.search")
+        self.latency.sleep("tavily")
+        return {"query": query, "results": self._results(query, max_results)}
+
+    def qna_search(self, query, **kwargs):
+        self.calls.add("tavily.qna_search")
+        self.latency.sleep("tavily")
+        return f"A short answer about {query}."
+
+
+def section_answer(prompt):
+    """An answer in the six-section format the response parser expects."""
+    rng = _seeded_random("answer", prompt)
+    topic = rng.choice(TOPICS)
+    sentences = " ".join(
+        f"Point {i + 1} about {topic} follows from the notes." for i in range(rng.randint(3, 8))
+    )
+    return (
+        f"1. Professor's Notes:\n{sentences}\n\n"
+        f"2. Professor's Sources:\n- lecture-0{rng.randint(0, 9)}.pdf (Page {rng.randint(1, 10)})\n\n"
+        f"3. Internet Notes:\n{sentences}\n\n"
+        "4. Internet Sources:\n- Web Source 1\n- Web Source 2\n\n"
+        "5. Cross-Verification and Contradictions:\nNo contradictions found.\n\n"
+        "6. Extra Sources:\nNo extra sources.\n"
+    )
+
+
+class FakeChatModel:
+    """
+    ChatBedrock stand-in: a first-token delay, then a per-token delay, with
+    usage_metadata on the response (and on the last streamed chunk).
+    """
+
+    def __init__(self, latency, calls, chars_per_token=4):
+        self.latency = latency
+        self.calls = calls
+        self.chars_per_token = chars_per_token
+
+    def _tokens(self, prompt):
+        answer = section_answer(str(prompt))
+        step = self.chars_per_token
+        return [answer[i : i + step] for i in range(0, len(answer), step)]
+
+    def _usage(self, prompt, output_tokens):
+        return {
+            "input_tokens": len(str(prompt)) // self.chars_per_token,
+            "output_tokens": output_tokens,
+            "total_tokens": len(str(prompt)) // self.chars_per_token + output_tokens,
+        }
+
+    def invoke(self, prompt, **kwargs):
+        self.calls.add("bedrock.invoke")
+        tokens = self._tokens(prompt)
+        time.sleep(
+            self.latency.sample("llm_first_token")
+            + sum(self.latency.sample("llm_token") for _ in tokens)
+        )
+        return SimpleNamespace(
+            content="".join(tokens), usage_metadata=self._usage(prompt, len(tokens))
+        )
+
+    async def ainvoke(self, prompt, **kwargs):
+        import asyncio
+
+        return await asyncio.to_thread(self.invoke, prompt, **kwargs)
+
+    async def astream(self, prompt, **kwargs):
+        import asyncio
+
+        self.calls.add("bedrock.stream")
+        tokens = self._tokens(prompt)
+        await asyncio.sleep(self.latency.sample("llm_first_token"))
+        for i, token in enumerate(tokens):
+            await asyncio.sleep(self.latency.sample("llm_token"))
+            usage = self._usage(prompt, len(tokens)) if i == len(tokens) - 1 else None
+            yield SimpleNamespace(content=token, usage_metadata=usage)
+
+
+def _condition_matches(condition, item):
+    # Evaluates the boto3 condition builders used here: =, begins_with, AND and OR
+    expression = condition.get_expression()
+    operator, values = expression["operator"], expression["values"]
+    if operator == "AND":
+        return all(_condition_matches(c, item) for c in values)
+    if operator == "OR":
+        return any(_condition_matches(c, item) for c in values)
+    name, value = values[0].name, values[1]
+    if operator == "=":
+        return item.get(name) == value
+    if operator == "begins_with":
+        return str(item.get(name, "")).startswith(value)
+    raise ValueError(f"Unsupported condition operator {operator}")
+
+
+class FakeDynamoTable:
+    """DynamoDB Table resource stand-in for the operations the app performs."""
+
+    def __init__(self, name, key_names, latency, calls, page_size=100):
+        self.name = name
+        self.key_names = tuple(key_names)
+        self.latency = latency
+        self.calls = calls
+        self.page_size = page_size
+        self.items = {}
+        self._lock = threading.Lock()
+
+    def _request(self, operation):
+        self.calls.add(f"dynamodb.{operation}")
+        self.latency.sleep("dynamodb")
+
+    def _key(self, item):
+        return tuple(item[name] for name in self.key_names)
+
+    def put_item(self, Item, **kwargs):
+        self._request("put_item")
+        with self._lock:
+            self.items[self._key(Item)] = dict(Item)
+        return {}
+
+    def get_item(self, Key, **kwargs):
+        self._request("get_item")
+        with self._lock:
+            item = self.items.get(self._key(Key))
+        return {"Item": dict(item)} if item is not None else {}
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues, **kwargs):
+        # Only "SET a = :a, b = :b" expressions
+        self._request("update_item")
+        assignments = UpdateExpression.strip()[len("SET"):].split(",")
+        with self._lock:
+            item = self.items.setdefault(self._key(Key), dict(Key))
+            for assignment in assignments:
+                name, placeholder = (part.strip() for part in assignment.split("="))
+                item[name] = ExpressionAttributeValues[placeholder]
+        return {}
+
+    def _read(self, operation, condition, ProjectionExpression=None, ExclusiveStartKey=None, **kwargs):
+        self._request(operation)
+        with self._lock:
+            keys = sorted(self.items, key=str)
+            start = int(ExclusiveStartKey["offset"]) if ExclusiveStartKey else 0
+            page_keys = keys[start : start + self.page_size]
+            items = [self.items[k] for k in page_keys]
+        if condition is not None:
+            items = [item for item in items if _condition_matches(condition, item)]
+        if ProjectionExpression:
+            names = [name.strip() for name in ProjectionExpression.split(",")]
+            items = [{n: item[n] for n in names if n in item} for item in items]
+        response = {
+            "Items": items,
+            "ConsumedCapacity": {"CapacityUnits": 0.5 * len(page_keys)},
+        }
+        if start + self.page_size < len(keys):
+            response["LastEvaluatedKey"] = {"offset": start + self.page_size}
+        return response
+
+    def query(self, KeyConditionExpression, IndexName=None, **kwargs):
+        return self._read("query", KeyConditionExpression, **kwargs)
+
+    def scan(self, FilterExpression=None, **kwargs):
+        return self._read("scan", FilterExpression, **kwargs)
+
+    @contextmanager
+    def batch_writer(self, **kwargs):
+        pending = []
+        yield SimpleNamespace(put_item=lambda Item: pending.append(dict(Item)))
+        for start in range(0, len(pending), 25):
+            self._request("batch_write_item")
+            with self._lock:
+                for item in pending[start : start + 25]:
+                    self.items[self._key(item)] = item
+
+    def clear(self):
+        with self._lock:
+            self.items.clear()
+
+
+class FakeS3(LocalS3):
+    """LocalS3 with streaming bodies, deletes and sampled per-request latency."""
+
+    def __init__(self, latency, calls):
+        super().__init__(0)
+        self.latency_model = latency
+        self.call_counter = calls
+
+    def _request(self):
+        super()._request()
+        self.call_counter.add("s3.request")
+        self.latency_model.sleep("s3")
+
+    def get_object(self, Bucket, Key, **kwargs):
+        self._request()
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        body = self.objects[Key]
+        if isinstance(body, str):
+            body = body.encode()
+
+        class Body:
+            def read(self):
+                return body
+
+            def iter_chunks(self, chunk_size=1024 * 1024):
+                for start in range(0, len(body), chunk_size):
+                    yield body[start : start + chunk_size]
+
+        return {"Body": Body(), "ContentLength": len(body)}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self._request()
+        if hasattr(Body, "read"):
+            Body = Body.read()
+        with self.lock:
+            self.add(Key, Body)
+        return {}
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        self._request()
+        with self.lock:
+            if self.objects.pop(Key, None) is not None:
+                self.keys.remove(Key)
+        return {}
+
+    def delete_prefix(self, prefix):
+        with self.lock:
+            for key in [k for k in self.keys if k.startswith(prefix)]:
+                self.objects.pop(key)
+                self.keys.remove(key)
+
+
+class FakeFileIdService:
+    """requests.get stand-in for the Google Drive file-ID lookup service."""
+
+    def __init__(self, latency, calls):
+        self.latency = latency
+        self.calls = calls
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        self.calls.add("file_id_service.get")
+        self.latency.sleep("file_id_service")
+        file_id = hashlib.sha1(str((params or {}).get("file_name")).encode()).hexdigest()
+        return SimpleNamespace(raise_for_status=lambda: None, json=lambda: {"id": file_id})
+
+
+def install_fakes(latency, corpus_chunks=500):
+    """
+    Put fakes for every upstream client in the client registry.
+
+    Must run before the app makes its first upstream call. With
+    VECTOR_STORE_BACKEND=local the real local index is used instead of the Pinecone
+    fake, seeded with the same synthetic corpus. Returns the fakes and the shared
+    call counter, keyed by service.
+    """
+    from services import pinecone_service
+    from utils.clients import get_client, get_vector_index, reset_clients
+    from utils.config import (
+        EMBEDDING_CACHE_TABLE,
+        PROCESSED_FILES_TABLE,
+        QUERIES_TABLE,
+        TEACHER_CONFIG,
+        VECTOR_STORE_BACKEND,
+    )
+
+    calls = CallCounter()
+    fakes = {
+        "calls": calls,
+        "s3": FakeS3(latency, calls),
+        "embeddings": FakeEmbeddings(latency, calls),
+        "chat": FakeChatModel(latency, calls),
+        "tavily": FakeTavilyClient(latency, calls),
+        "file_id_service": FakeFileIdService(latency, calls),
+        "indexes": {},
+        "tables": {
+            PROCESSED_FILES_TABLE: FakeDynamoTable(
+                PROCESSED_FILES_TABLE, ("filename",), latency, calls
+            ),
+            QUERIES_TABLE: FakeDynamoTable(QUERIES_TABLE, ("query_id",), latency, calls),
+            EMBEDDING_CACHE_TABLE: FakeDynamoTable(
+                EMBEDDING_CACHE_TABLE, ("cache_key",), latency, calls
+            ),
+        },
+    }
+
+    reset_clients()
+    get_client("s3", lambda: fakes["s3"])
+    get_client("bedrock_embeddings", lambda: fakes["embeddings"])
+    get_client("chat_bedrock", lambda: fakes["chat"])
+    get_client("tavily", lambda: fakes["tavily"])
+    for name, table in fakes["tables"].items():
+        get_client(("dynamodb_table", name), lambda table=table: table)
+    for config in TEACHER_CONFIG.values():
+        name = config["index_name"]
+        if name in fakes["indexes"]:
+            continue
+        if VECTOR_STORE_BACKEND == "local":
+            # The local backend is real; it only needs the corpus loaded once
+            index = get_vector_index(name)
+            if not index.describe_index_stats()["total_vector_count"]:
+                index.upsert(
+                    vectors=[
+                        {
+                            "id": vector_id,
+                            "values": deterministic_vector(vector_id),
+                            "metadata": metadata,
+                        }
+                        for vector_id, metadata in synthetic_corpus(corpus_chunks)
+                    ]
+                )
+            fakes["indexes"][name] = index
+            continue
+        fakes["indexes"][name] = FakePineconeIndex(name, latency, calls, corpus_chunks)
+        get_client(("pinecone_index", name), lambda index=fakes["indexes"][name]: index)
+    pinecone_service.requests = SimpleNamespace(get=fakes["file_id_service"].get)
+    return fakes
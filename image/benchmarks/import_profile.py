@@ -0,0 +1,101 @@
+# benchmarks/import_profile.py
+#
+# Import-time profile of the API entry point. Runs `python -X importtime -c "import main"`
+# in a fresh interpreter, aggregates the cumulative cost per top-level package and
+# optionally compares it with a stored baseline, exiting non-zero on a regression so
+# it can gate CI.
+#
+# Usage (from image/):
+#   python benchmarks/import_profile.py                       # print the report
+#   python benchmarks/import_profile.py --write-baseline benchmarks/import_baseline.json
+#   python benchmarks/import_profile.py --baseline benchmarks/import_baseline.json
+#
+# To profile the Lambda container image instead of the local environment:
+#   python benchmarks/import_profile.py --src-dir /var/task \
+#       --python "docker run --rm --entrypoint python3 teaching-assistant:latest"
+
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+from collections import defaultdict
+
+DEFAULT_SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+
+def profile_imports(python_cmd, src_dir, module):
+    code = f"import sys; sys.path.insert(0, {src_dir!r}); import {module}"
+    command = shlex.split(python_cmd) + ["-X", "importtime", "-c", code]
+    completed = subprocess.run(
+        command,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "LAZY_STARTUP": os.environ.get("LAZY_STARTUP", "true")},
+    )
+    if completed.returncode != 0:
+        sys.stderr.write(completed.stderr[-4000:])
+        raise SystemExit(f"Importing {module} failed")
+
+    # Lines look like: "import time:       self [us] |  cumulative | imported package"
+    packages = defaultdict(int)
+    total_us = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, _, name = [
+            part.strip() for part in line[len("import time:") :].split("|")
+        ]
+        self_us = int(self_us)
+        top_level = name.strip().split(".")[0]
+        packages[top_level] += self_us
+        total_us += self_us
+    return total_us, dict(packages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--python", default=sys.executable)
+    parser.add_argument("--src-dir", default=DEFAULT_SRC_DIR)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--baseline")
+    parser.add_argument("--write-baseline")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed relative increase over the baseline total before failing",
+    )
+    args = parser.parse_args()
+
+    total_us, packages = profile_imports(args.python, args.src_dir, args.module)
+
+    print(f"import {args.module}: {total_us / 1000:.1f} ms total")
+    for name, us in sorted(packages.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"  {name:<30} {us / 1000:8.1f} ms")
+
+    if args.write_baseline:
+        with open(args.write_baseline, "w") as f:
+            json.dump({"total_us": total_us, "packages": packages}, f, indent=2)
+        print(f"Baseline written to {args.write_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        limit = baseline["total_us"] * (1 + args.tolerance)
+        new_packages = sorted(set(packages) - set(baseline["packages"]))
+        if new_packages:
+            print(f"Packages not in the baseline: {', '.join(new_packages)}")
+        if total_us > limit:
+            print(
+                f"REGRESSION: {total_us / 1000:.1f} ms exceeds baseline "
+                f"{baseline['total_us'] / 1000:.1f} ms by more than {args.tolerance:.0%}"
+            )
+            raise SystemExit(1)
+        print(f"OK: within {args.tolerance:.0%} of baseline {baseline['total_us'] / 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+# benchmarks/load_test.py
+#
+# Offline end-to-end load test. Drives the FastAPI app in-process (httpx over
+# ASGI, so middleware, routing, the LangGraph workflow and thread offloading all
+# run as in production) at a chosen concurrency, with every upstream replaced by
+# the seeded stand-ins in fakes.py. Reports p50/p95/p99 latency and throughput
+# for /combined_query, /query_documents and /process_all_pdfs, writes them to
+# benchmarks/results/ and compares against the previous run (or --baseline).
+#
+# Usage (from image/): python benchmarks/load_test.py [--concurrency 16]
+#     [--requests 200] [--pdf-runs 3] [--pdfs 4] [--pages 40] [--latency-scale 1.0]
+#     [--latency tavily=300:0.5] [--seed 7] [--answer-cache] [--baseline PATH]
+#     [--max-regression 0.2] [--vector-store local]
+#
+# Exits non-zero if --max-regression is given and any scenario's p95 grew by more
+# than that fraction relative to the baseline.
+
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "src"))
+
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+API_KEY = "load-test"
+TEACHER = "drvinay"
+SCENARIOS = ("combined_query", "query_documents", "process_all_pdfs")
+
+
+def parse_latency(value):
+    service, _, spec = value.partition("=")
+    median_ms, _, sigma = spec.partition(":")
+    return service, (float(median_ms), float(sigma or 0.3))
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (
+        position - lower
+    )
+
+
+def summarize(latencies, errors, wall_seconds, concurrency):
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 1),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 1) if ordered else 0.0,
+        "throughput_rps": round(len(ordered) / wall_seconds, 2) if wall_seconds else 0.0,
+        "wall_seconds": round(wall_seconds, 2),
+    }
+
+
+async def run_requests(client, make_request, total, concurrency):
+    """Send total requests with at most concurrency in flight; returns the summary."""
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            method, url, kwargs = make_request(i)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                ok = response.status_code == 200
+                if not ok:
+                    logging.warning(f"{url} -> {response.status_code}: {response.text[:200]}")
+            except Exception as e:
+                logging.warning(f"{url} failed: {str(e)}")
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start, concurrency)
+
+
+def query_text(i, distinct_queries):
+    from fakes import TOPICS
+
+    n = i % distinct_queries if distinct_queries else i
+    return f"Explain {TOPICS[n % len(TOPICS)]} (question {n})"
+
+
+def seed_pdfs(s3, pdfs, pages):
+    from bench_streaming_ingestion import build_pdf
+    from utils.config import TEACHER_CONFIG
+
+    prefix = TEACHER_CONFIG[TEACHER]["s3_prefix"]
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in range(pdfs):
+            path = os.path.join(tmp, f"load-test-{n:02d}.pdf")
+            build_pdf(path, pages)
+            with open(path, "rb") as f:
+                s3.add(f"{prefix}load-test-{n:02d}.pdf", f.read())
+
+
+def reset_ingestion_state(fakes):
+    from utils.config import (
+        INGESTION_CHECKPOINT_PREFIX,
+        INGESTION_MANIFEST_PREFIX,
+        LEXICAL_INDEX_PREFIX,
+        PROCESSED_FILES_TABLE,
+    )
+
+    fakes["tables"][PROCESSED_FILES_TABLE].clear()
+    fakes["s3"].delete_prefix(INGESTION_CHECKPOINT_PREFIX)
+    fakes["s3"].delete_prefix(INGESTION_MANIFEST_PREFIX)
+    fakes["s3"].delete_prefix(LEXICAL_INDEX_PREFIX)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCHMARKS_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def previous_result(baseline):
+    if baseline:
+        path = baseline
+    else:
+        runs = sorted(glob.glob(os.path.join(RESULTS_DIR, "load_test-*.json")))
+        if not runs:
+            return None, None
+        path = runs[-1]
+    with open(path) as f:
+        return path, json.load(f)
+
+
+def compare(current, previous, max_regression):
+    """Print per-scenario deltas; returns the scenarios whose p95 regressed too far."""
+    regressions = []
+    for name, stats in current["scenarios"].items():
+        before = previous.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        deltas = []
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+            if before[metric]:
+                change = (stats[metric] - before[metric]) / before[metric]
+                deltas.append(f"{metric} {change:+.1%}")
+                if (
+                    metric == "p95_ms"
+                    and max_regression is not None
+                    and change > max_regression
+                ):
+                    regressions.append(name)
+        print(f"  {name}: {', '.join(deltas)}")
+    return regressions
+
+
+async def run(args, fakes):
+    import httpx
+
+    from main import app
+    from utils.query_log_writer import drain_query_logs
+
+    scenarios = {}
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://load-test",
+        headers={"API-Key": API_KEY},
+        timeout=None,
+    ) as client:
+        # One warm-up request so import and workflow compilation are not measured
+        await client.post(
+            "/combined_query", json={"query_text": "warm-up", "teacher_name": TEACHER}
+        )
+
+        if "combined_query" in args.scenarios:
+            scenarios["combined_query"] = await run_requests(
+                client,
+                lambda i: (
+                    "POST",
+                    "/combined_query",
+                    {
+                        "json": {
+                            "query_text": query_text(i, args.distinct_queries),
+                            "teacher_name": TEACHER,
+                        }
+                    },
+                ),
+                args.requests,
+                args.concurrency,
+            )
+
+        if "query_documents" in args.scenarios:
+            scenarios["query_documents"] = await run_requests(
+                client,
+                lambda i: (
+                    "POST",
+                    "/query_documents",
+                    {
+                        "params": {"teacher_name": TEACHER},
+                        "json": {"query_text": query_text(i, args.distinct_queries)},
+                    },
+                ),
+                args.requests,
+                args.concurrency,
+            )
+
+        if "process_all_pdfs" in args.scenarios:
+            seed_pdfs(fakes["s3"], args.pdfs, args.pages)
+            latencies, errors = [], 0
+            start = time.perf_counter()
+            # Runs of the same teacher would race on its processed-files state, so
+            # ingestion is measured one run at a time from a clean slate
+            for _ in range(args.pdf_runs):
+                reset_ingestion_state(fakes)
+                run_start = time.perf_counter()
+                response = await client.post(
+                    "/process_all_pdfs", params={"teacher_name": TEACHER}
+                )
+                latencies.append(time.perf_counter() - run_start)
+                if response.status_code != 200:
+                    logging.warning(f"/process_all_pdfs -> {response.status_code}: {response.text[:200]}")
+                    errors += 1
+            scenarios["process_all_pdfs"] = summarize(
+                latencies, errors, time.perf_counter() - start, 1
+            )
+            scenarios["process_all_pdfs"]["pdfs"] = args.pdfs
+            scenarios["process_all_pdfs"]["pages_per_pdf"] = args.pages
+
+    drain_query_logs()
+    return scenarios
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--pdf-runs", type=int, default=3)
+    parser.add_argument("--pdfs", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument(
+        "--latency",
+        type=parse_latency,
+        action="append",
+        default=[],
+        metavar="SERVICE=MEDIAN_MS[:SIGMA]",
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--distinct-queries",
+        type=int,
+        default=0,
+        help="Cycle through this many query texts; 0 makes every query unique",
+    )
+    parser.add_argument("--answer-cache", action="store_true")
+    parser.add_argument("--corpus-chunks", type=int, default=500)
+    parser.add_argument("--vector-store", choices=("fake", "local"), default="fake")
+    parser.add_argument(
+        "--scenarios", type=lambda s: s.split(","), default=list(SCENARIOS)
+    )
+    parser.add_argument("--baseline")
+    parser.add_argument("--max-regression", type=float)
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+
+    # Configuration is read from the environment at import, so it is set before
+    # anything under src/ is imported
+    os.environ["API_KEY"] = API_KEY
+    os.environ["EMBEDDING_CACHE_BACKEND"] = "dynamodb"
+    os.environ["ANSWER_CACHE_ENABLED"] = "true" if args.answer_cache else "false"
+    os.environ["METRICS_LOG_EVENTS"] = "false"
+    os.environ["AWS_DEFAULT_REGION"] = os.environ.get("AWS_DEFAULT_REGION", "us-east-1")
+    if args.vector_store == "local":
+        os.environ["VECTOR_STORE_BACKEND"] = "local"
+        os.environ["LOCAL_VECTOR_STORE_DIR"] = tempfile.mkdtemp(prefix="load-test-vectors-")
+
+    from fakes import LatencyModel, install_fakes
+
+    latency = LatencyModel(dict(args.latency), args.latency_scale, args.seed)
+    fakes = install_fakes(latency, args.corpus_chunks)
+
+    scenarios = asyncio.run(run(args, fakes))
+    result = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("baseline", "max_regression", "no_save")
+        },
+        "latencies": latency.latencies,
+        "scenarios": scenarios,
+        "upstream_calls": dict(sorted(fakes["calls"].counts.items())),
+    }
+
+    print(json.dumps(result["scenarios"], indent=2))
+    baseline_path, previous = previous_result(args.baseline)
+    regressions = []
+    if previous:
+        print(f"compared with {os.path.relpath(baseline_path)}:")
+        regressions = compare(result, previous, args.max_regression)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"load_test-{stamp}.json")
+        with open(path, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"results written to {os.path.relpath(path)}")
+
+    if regressions:
+        print(f"p95 regressed by more than {args.max_regression:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
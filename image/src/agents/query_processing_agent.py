@@ -1,8 +1,10 @@
 # src/agents/query_processing_agent.py
 
 from models.agent_state import AgentState
+from utils.metrics import instrument_node
 
 
+@instrument_node("query_processing")
 def query_processing_agent(state: AgentState) -> AgentState:
     query = state["query"]
     # Process the query (e.g., expand, reformat, etc.)
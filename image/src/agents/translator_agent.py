@@ -4,20 +4,25 @@
 
 from models.agent_state import AgentState
 from utils.translation_utils import translate_dict
+from utils.metrics import instrument_node
 import logging
 
 
+@instrument_node("translator")
 async def translator_agent(state: AgentState) -> AgentState:
     if state["target_language"] and state["target_language"].lower() != "english":
+        failures = []
         try:
             state["translated_result"] = await translate_dict(
-                state["formatted_result"], state["target_language"]
+                state["formatted_result"], state["target_language"], failures
             )
+            state["translation_failed"] = bool(failures)
         except Exception as e:
             logging.error(f"Translation failed: {str(e)}")
             state["translated_result"] = state[
                 "formatted_result"
             ]  # Fallback to original result
+            state["translation_failed"] = True
     else:
         state["translated_result"] = state["formatted_result"]  # No translation needed
     return state
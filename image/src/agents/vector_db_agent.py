@@ -1,13 +1,16 @@
 # src/agents/vector_db_agent.py
 
 from models.agent_state import AgentState
-from utils.vector_db_utils import query_vector_db
+from utils.config import LEXICAL_INDEX_ENABLED
+from utils.vector_db_utils import query_hybrid, query_vector_db
+from utils.metrics import instrument_node
 
 
+@instrument_node("vector_db")
 async def vector_db_agent(state: AgentState) -> AgentState:
-    vector_db_results = await query_vector_db(
-        state["processed_query"], state["teacher_name"]
-    )
+    # Exact terms (names, dates, course codes) are matched lexically as well
+    retrieve = query_hybrid if LEXICAL_INDEX_ENABLED else query_vector_db
+    vector_db_results = await retrieve(state["processed_query"], state["teacher_name"])
     state["vector_db_context"] = vector_db_results["context_text"]
     state["vector_db_sources"] = vector_db_results["sources"]
     return state
@@ -1,11 +1,18 @@
 # src/agents/web_search_agent.py
 
 from models.agent_state import AgentState
+from utils.config import CONTEXT_ASSEMBLY_ENABLED, WEB_CONTEXT_TOKEN_BUDGET
+from utils.context_assembler import assemble_web_context
 from utils.web_search_utils import perform_web_search
+from utils.metrics import instrument_node
 
 
+@instrument_node("web_search")
 async def web_search_agent(state: AgentState) -> AgentState:
     web_results = await perform_web_search(state["processed_query"])
-    state["web_search_results"] = web_results["context"]
+    web_context = web_results["context"]
+    if CONTEXT_ASSEMBLY_ENABLED:
+        web_context = assemble_web_context(web_context, WEB_CONTEXT_TOKEN_BUDGET)
+    state["web_search_results"] = web_context
     state["web_search_sources"] = web_results["sources"]
     return state
@@ -1,27 +1,26 @@
 import os
-import uvicorn
+import json
 from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from utils.api_key_middleware import ApiKeyMiddleware
+from utils.trace_middleware import TraceMiddleware
 from fastapi.openapi.utils import get_openapi
 from mangum import Mangum
 from pydantic import BaseModel
 from models.query import QueryModel
-from services.pinecone_service import (
-    create_embeddings,
-    query_pinecone,
-    process_all_pdfs,
-    list_processed_files,
-    get_google_drive_link_pdf,
-    update_missing_drive_links,
-    update_drive_link_for_file,
-    combined_query,
-)
-from workflow import multi_agent_query
+
+# Heavy dependencies (langchain, langgraph, PyPDF2, pinecone, numpy) are imported
+# inside the routes that need them, so a cold start only pays for what the first
+# request uses. Set LAZY_STARTUP=false to load everything at import time instead.
+from utils.embedding_cache import get_query_embedding_cache
+from utils.web_search_cache import get_web_search_cache, web_search_key
+from utils.async_utils import run_blocking
+from utils.clients import get_tavily_client
+from utils.query_log_writer import drain_query_logs
+from utils.metrics import render_metrics, set_teacher
 
 from utils.s3_handler import get_s3_buckets, list_pdfs_in_s3
 import logging
-from pinecone import PineconeException
-from tavily import TavilyClient
 from typing import Optional, List
 from utils.config import (
     TEACHER_CONFIG,
@@ -32,6 +31,10 @@ from utils.config import (
     PROCESSED_FILES_TABLE,
     QUERIES_TABLE,
     PROMPT_TEMPLATE,
+    LAZY_STARTUP,
+    VECTOR_STORE_BACKEND,
+    LEXICAL_INDEX_ENABLED,
+    QUERY_LOG_HANDLER_DRAIN_SECONDS,
 )
 
 
@@ -42,8 +45,6 @@ class CombinedQueryRequest(BaseModel):
 
 
 WORKER_LAMBDA_NAME = os.environ.get("WORKER_LAMBDA_NAME", None)
-# tavily_client = TavilyClient(api_key=os.environ.get("TAVILY_API_KEY", None))
-tavily_client = TavilyClient(api_key=TAVILY_API_KEY)
 
 app = FastAPI()
 
@@ -67,7 +68,51 @@ def custom_openapi():
 
 app.openapi = custom_openapi
 app.add_middleware(ApiKeyMiddleware)
-handler = Mangum(app)  # Entry point for AWS Lambda.
+app.add_middleware(TraceMiddleware)
+mangum_handler = Mangum(app)
+
+
+def handler(event, context):  # Entry point for AWS Lambda.
+    try:
+        return mangum_handler(event, context)
+    finally:
+        # Lambda freezes the container as soon as the handler returns. Give pending
+        # query logs a short, bounded chance to be sent; anything left is written by
+        # the background writer when the container thaws, or at shutdown.
+        drain_query_logs(QUERY_LOG_HANDLER_DRAIN_SECONDS)
+
+
+@app.on_event("shutdown")
+def drain_query_logs_on_shutdown():
+    drain_query_logs()
+
+
+def preload_dependencies():
+    import services.pinecone_service  # noqa: F401
+    import utils.answer_cache  # noqa: F401
+    from workflow import get_workflow
+    from utils.clients import get_vector_index
+
+    get_workflow()
+    if VECTOR_STORE_BACKEND == "local":
+        # Opening a local index maps its matrix and reads its IDs, a few milliseconds
+        for config in TEACHER_CONFIG.values():
+            try:
+                get_vector_index(config["index_name"])
+            except Exception as e:
+                logging.error(
+                    f"Failed to open local vector index {config['index_name']}: {str(e)}"
+                )
+    if LEXICAL_INDEX_ENABLED:
+        from utils.lexical_index import get_lexical_index
+
+        # Downloaded during init so the first query does not pay for it
+        for teacher_name in TEACHER_CONFIG:
+            get_lexical_index(teacher_name)
+
+
+if not LAZY_STARTUP:
+    preload_dependencies()
 
 
 class SubmitQueryRequest(BaseModel):
@@ -89,6 +134,25 @@ def get_query_endpoint(query_id: str) -> QueryModel:
     return query
 
 
+@app.get("/cache_stats")
+def cache_stats_endpoint():
+    from utils.answer_cache import get_answer_cache
+
+    return {
+        "status": "success",
+        "embedding_cache": get_query_embedding_cache().stats(),
+        "answer_cache": get_answer_cache().stats(),
+        "web_search_cache": get_web_search_cache().stats(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.get("/get_s3")
 def get_s3_endpoint():
     return get_s3_buckets()
@@ -96,23 +160,42 @@ def get_s3_endpoint():
 
 @app.post("/create_embeddings")
 def create_embeddings_endpoint(request: EmbeddingRequest, teacher_name: str):
+    from services.pinecone_service import create_embeddings
+
     return create_embeddings(request.sentences, teacher_name)
 
 
 @app.post("/process_all_pdfs")
-def process_all_pdfs_endpoint(teacher_name: str):
-    return process_all_pdfs(teacher_name)
+def process_all_pdfs_endpoint(teacher_name: str, max_workers: Optional[int] = None):
+    from services.pinecone_service import process_all_pdfs
+
+    return process_all_pdfs(teacher_name, max_workers)
+
+
+@app.post("/rebuild_lexical_index")
+def rebuild_lexical_index_endpoint(
+    teacher_name: str, max_workers: Optional[int] = None
+):
+    from services.pinecone_service import backfill_lexical_index
+
+    if teacher_name not in TEACHER_CONFIG:
+        raise HTTPException(status_code=400, detail="Invalid teacher name")
+    return backfill_lexical_index(teacher_name, max_workers)
 
 
 @app.post("/query_documents")
 def query_documents_endpoint(
     request: SubmitQueryRequest, teacher_name: str
 ) -> QueryModel:
+    from services.pinecone_service import query_pinecone
+
     return query_pinecone(request.query_text, teacher_name)
 
 
 @app.get("/list_processed_files")
 def list_processed_files_endpoint(teacher_name: str):
+    from services.pinecone_service import list_processed_files
+
     try:
         processed_files = list_processed_files(teacher_name)
         return {
@@ -126,12 +209,19 @@ def list_processed_files_endpoint(teacher_name: str):
 
 
 @app.get("/list_pdfs")
-async def list_pdfs_endpoint(teacher_name: str):
+async def list_pdfs_endpoint(
+    teacher_name: str,
+    refresh: bool = Query(
+        False,
+        description="Re-list the teacher's whole S3 prefix instead of using the "
+        "cached listing. Costs a full listing, not only of what changed.",
+    ),
+):
     try:
         config = TEACHER_CONFIG.get(teacher_name)
         if not config:
             raise ValueError(f"Error main, Invalid teacher name: {teacher_name}")
-        pdfs = list_pdfs_in_s3(teacher_name)
+        pdfs = await run_blocking(list_pdfs_in_s3, teacher_name, refresh)
         return {"status": "success", "total_pdfs": len(pdfs), "pdfs": pdfs}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list PDFs: {str(e)}")
@@ -141,6 +231,8 @@ async def list_pdfs_endpoint(teacher_name: str):
 async def test_drive_link(
     pdf_name: str = Query(..., description="Name of the PDF file")
 ):
+    from services.pinecone_service import get_google_drive_link_pdf
+
     try:
         drive_link = get_google_drive_link_pdf(pdf_name)
         if drive_link:
@@ -161,11 +253,17 @@ async def test_drive_link(
     "/update_missing_drive_links", operation_id="update_missing_drive_links_endpoint"
 )
 async def update_missing_drive_links_endpoint(teacher_name: str):
+    from services.pinecone_service import update_missing_drive_links
+
     try:
-        total_updated = update_missing_drive_links(teacher_name)
+        stats = {}
+        total_updated = await run_blocking(
+            update_missing_drive_links, teacher_name, stats
+        )
         return {
             "status": "success",
             "message": f"Updated {total_updated} vectors with missing Google Drive links for teacher {teacher_name}",
+            "details": stats,
         }
     except Exception as e:
         logging.error(
@@ -183,8 +281,14 @@ async def update_drive_link_endpoint(
     drive_link: str = Query(..., description="Google Drive link for the file"),
     teacher_name: str = Query(..., description="Name of the teacher"),
 ):
+    from pinecone import PineconeException
+    from services.pinecone_service import update_drive_link_for_file
+
     try:
-        updated_count = update_drive_link_for_file(file_name, drive_link, teacher_name)
+        stats = {}
+        updated_count = await run_blocking(
+            update_drive_link_for_file, file_name, drive_link, teacher_name, stats
+        )
         if updated_count > 0:
             return {
                 "status": "success",
@@ -192,6 +296,7 @@ async def update_drive_link_endpoint(
                 "file_name": file_name,
                 "drive_link": drive_link,
                 "teacher_name": teacher_name,
+                "details": stats,
             }
         else:
             return {
@@ -235,15 +340,19 @@ async def tavily_search(
 ):
     try:
         # Make a call to Tavily API
-        response = tavily_client.search(
-            query=query,
-            search_depth=search_depth,
-            max_results=max_results,
-            include_images=include_images,
-            include_answer=include_answer,
-            include_raw_content=include_raw_content,
-            include_domains=include_domains,
-            exclude_domains=exclude_domains,
+        params = {
+            "query": query,
+            "search_depth": search_depth,
+            "max_results": max_results,
+            "include_images": include_images,
+            "include_answer": include_answer,
+            "include_raw_content": include_raw_content,
+            "include_domains": include_domains,
+            "exclude_domains": exclude_domains,
+        }
+        response = await get_web_search_cache().get_or_fetch(
+            web_search_key("search", **params),
+            lambda: run_blocking(get_tavily_client().search, **params),
         )
         return {"status": "success", "query": query, "results": response}
     except Exception as e:
@@ -261,8 +370,10 @@ async def tavily_search_context(
     ),
 ):
     try:
-        context = tavily_client.get_search_context(
-            query=query, search_depth=search_depth, max_tokens=max_tokens
+        params = {"query": query, "search_depth": search_depth, "max_tokens": max_tokens}
+        context = await get_web_search_cache().get_or_fetch(
+            web_search_key("context", **params),
+            lambda: run_blocking(get_tavily_client().get_search_context, **params),
         )
         return {"status": "success", "query": query, "context": context}
     except Exception as e:
@@ -279,7 +390,11 @@ async def tavily_qna_search(
     ),
 ):
     try:
-        answer = tavily_client.qna_search(query=query, search_depth=search_depth)
+        params = {"query": query, "search_depth": search_depth}
+        answer = await get_web_search_cache().get_or_fetch(
+            web_search_key("qna", **params),
+            lambda: run_blocking(get_tavily_client().qna_search, **params),
+        )
         return {"status": "success", "query": query, "answer": answer}
     except Exception as e:
         raise HTTPException(
@@ -301,6 +416,9 @@ async def tavily_qna_search(
 
 @app.post("/combined_query")
 async def process_combined_query(request: CombinedQueryRequest):
+    from workflow import multi_agent_query
+
+    set_teacher(request.teacher_name)
     try:
         result = await multi_agent_query(
             request.query_text, request.teacher_name, request.target_language
@@ -311,7 +429,28 @@ async def process_combined_query(request: CombinedQueryRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/combined_query_stream")
+async def stream_combined_query_endpoint(request: CombinedQueryRequest):
+    from workflow import stream_combined_query
+
+    set_teacher(request.teacher_name)
+
+    async def events():
+        try:
+            async for event in stream_combined_query(
+                request.query_text, request.teacher_name, request.target_language
+            ):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            logging.error(f"Error streaming combined query: {str(e)}")
+            yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
 if __name__ == "__main__":
+    import uvicorn
+
     port = 8000
     print(f"Running the FastAPI server on port {port}.")
     uvicorn.run("main:app", host="0.0.0.0", port=port)
@@ -1,6 +1,6 @@
 # src/agent_state.py
 
-from typing import TypedDict, Optional, List, Dict
+from typing import TypedDict, Optional, List, Dict, Union
 
 
 class AgentState(TypedDict):
@@ -12,9 +12,10 @@ class AgentState(TypedDict):
     web_search_results: Optional[str]
     web_search_sources: Optional[List[str]]
     combined_response: Optional[str]
-    final_result: Optional[Dict[str, str]]
+    final_result: Optional[Dict[str, Union[str, List[str]]]]
     target_language: Optional[str]
     translated_result: Optional[Dict[str, str]]
+    translation_failed: bool
 
 
 def create_initial_state(
@@ -32,4 +33,5 @@ def create_initial_state(
         final_result=None,
         target_language=target_language,
         translated_result=None,
+        translation_failed=False,
     )
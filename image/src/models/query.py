@@ -1,14 +1,17 @@
 import os
 import time
 import uuid
-import boto3
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Any, List, Optional
 from botocore.exceptions import ClientError
+from utils.clients import get_dynamodb_table
+from utils.query_log_writer import get_query_log_writer
 import logging
 
 TABLE_NAME = os.environ.get("TABLE_NAME")
 
+logger = logging.getLogger(__name__)
+
 
 class QueryModel(BaseModel):
     query_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
@@ -19,14 +22,15 @@ class QueryModel(BaseModel):
     is_complete: bool = False
 
     @classmethod
-    def get_table(cls: "QueryModel") -> boto3.resource:
-        dynamodb = boto3.resource("dynamodb")
-        return dynamodb.Table(TABLE_NAME)
+    def get_table(cls: "QueryModel") -> Any:
+        return get_dynamodb_table(TABLE_NAME)
 
-    def put_item(self):
+    def put_item(self, wait: bool = False):
         item = self.as_ddb_item()
-        logging.basicConfig(level=logging.INFO)
-        logger = logging.getLogger(__name__)
+        if not wait:
+            # Written by the background query-log writer, off the response path
+            get_query_log_writer(TABLE_NAME).submit(item)
+            return
         try:
             response = QueryModel.get_table().put_item(Item=item)
             logger.info(f"Put item response: {response}")
@@ -1,58 +1,57 @@
-import os
 from fastapi import HTTPException
-from pinecone import Pinecone, ServerlessSpec
-from models.query import QueryModel
 from utils.embeddings import get_embedding_function
+from utils.clients import get_chat_model, get_dynamodb_table, get_vector_index
+from utils.embedding_cache import embed_query_cached
+from utils.embedding_pipeline import iter_embedded_items, embedding_throughput
+from utils.upsert_writer import UpsertWriter
+from utils.metadata_updates import update_metadata
+from utils.lru_cache import TTLLRUCache
+from utils.query_log_writer import get_query_log_writer
+from utils.checkpoint_store import (
+    CheckpointWriter,
+    load_checkpoint,
+    delete_checkpoint,
+    load_chunk_manifest,
+    save_chunk_manifest,
+    save_lexical_shard,
+    chunk_text_hash,
+)
+from utils.lexical_index import (
+    LexicalShardWriter,
+    list_lexical_shards,
+    rebuild_lexical_index,
+    update_lexical_index,
+)
 from utils.config import (
     TEACHER_CONFIG,
-    PINECONE_API_KEY,
     PROCESSED_FILES_TABLE,
     QUERIES_TABLE,
     FILE_ID_SERVICE_URL,
     PROMPT_TEMPLATE,
-    BEDROCK_MODEL_ID,
     COMBINED_PROMPT_TEMPLATE,
+    INGESTION_MAX_WORKERS,
+    PROCESSED_FILES_TEACHER_INDEX,
+    DRIVE_LINK_LOOKUP_MAX_WORKERS,
+    DRIVE_LINK_CACHE_MAX_SIZE,
+    DRIVE_LINK_CACHE_TTL_SECONDS,
+    DRIVE_LINK_LOOKUP_ATTEMPTS,
+    DRIVE_LINK_STALE_ROUNDS,
+    LEXICAL_INDEX_ENABLED,
 )
-from langchain.prompts import ChatPromptTemplate
-from langchain_aws import ChatBedrock
 import logging
 import uuid
 import time
-from utils.s3_handler import get_pdf_from_s3, list_pdfs_in_s3
-from utils.pdf_processor import process_pdf
-import boto3
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.s3_handler import get_pdf_from_s3, list_pdf_objects_in_s3
 from botocore.exceptions import ClientError
 import requests
-from pinecone import PineconeException
-
-from utils.vector_db_utils import query_vector_db
-from utils.query_processing import process_query
-from agents.query_processing_agent import query_processing_agent
-from agents.vector_db_agent import vector_db_agent
-from agents.result_processing_agent import result_processing_agent
-
-
-dynamodb = boto3.resource("dynamodb")
-processedFilesTable = dynamodb.Table(PROCESSED_FILES_TABLE)
-queriesTable = dynamodb.Table(QUERIES_TABLE)
 
-pc = Pinecone(api_key=PINECONE_API_KEY)
-
-
-def list_processed_files(teacher_name):
-    try:
-        response = processedFilesTable.scan(
-            FilterExpression=boto3.dynamodb.conditions.Attr("teacher").eq(teacher_name)
-        )
-        processed_files = [item["filename"] for item in response["Items"]]
-        return processed_files
-    except ClientError as e:
-        logging.error(
-            f"Failed to list processed files from DynamoDB for teacher {teacher_name}: {str(e)}"
-        )
-        raise HTTPException(
-            status_code=500, detail=f"Failed to list processed files: {str(e)}"
-        )
+from utils.vector_db_utils import (
+    build_vector_db_context,
+    delete_vectors,
+    list_vector_ids,
+)
 
 
 def create_embeddings(sentences, teacher_name):
@@ -64,7 +63,7 @@ def create_embeddings(sentences, teacher_name):
         embedding_function = get_embedding_function()
         embedding_vectors = embedding_function.embed_documents(sentences)
 
-        index = pc.Index(config["index_name"])
+        index = get_vector_index(config["index_name"])
 
         vectors_to_upsert = []
         for i, (text, vector) in enumerate(zip(sentences, embedding_vectors)):
@@ -85,6 +84,8 @@ def create_embeddings(sentences, teacher_name):
 
 
 def query_pinecone(query_text, teacher_name):
+    from langchain.prompts import ChatPromptTemplate
+
     try:
         vector_db_results = query_vector_db(query_text, teacher_name)
         prompt_template = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
@@ -106,86 +107,284 @@ def query_pinecone(query_text, teacher_name):
         )
 
 
-def process_pdf_file(pdf_key, teacher_name):
+def process_pdf_file(
+    pdf_key,
+    teacher_name,
+    stage_timings=None,
+    etag=None,
+    previously_ingested=False,
+    ingest_stats=None,
+):
+    from utils.pdf_processor import iter_pdf_chunks
+
+    shard_writer = None
+    checkpoint_writer = None
     try:
         config = TEACHER_CONFIG.get(teacher_name)
         if not config:
             raise ValueError(f"Invalid teacher name: {teacher_name}")
 
         index_name = config["index_name"]
-        s3_prefix = config["s3_prefix"]
+        timings = {"download": 0.0, "extract": 0.0, "embed": 0.0, "upsert": 0.0}
 
-        # We don't need to add s3_prefix here as it's handled in get_pdf_from_s3
-        pdf_content = get_pdf_from_s3(pdf_key, teacher_name)
-        chunks = process_pdf(pdf_content, pdf_key)
+        # Chunks whose text is unchanged since the last ingestion keep their vectors
+        manifest = None
+        if previously_ingested:
+            manifest = load_chunk_manifest(teacher_name, pdf_key)
+        previous_hashes = manifest["chunks"] if manifest else {}
+
+        # Skip chunks that an interrupted earlier run already embedded and upserted,
+        # unless the file has changed since that run
+        checkpoint = load_checkpoint(teacher_name, pdf_key, etag)
+        upserted_ids = set(checkpoint["upserted_ids"]) if checkpoint else set()
+        checkpoint_writer = CheckpointWriter(teacher_name, pdf_key, etag)
 
-        index = pc.Index(index_name)
+        index = get_vector_index(index_name)
         embedding_function = get_embedding_function()
 
         google_drive_link = get_google_drive_link_pdf(pdf_key)
 
-        vectors_to_upsert = []
-        for chunk in chunks:
-            embedding = embedding_function.embed_query(chunk.page_content)
-            metadata = chunk.metadata.copy()
-            metadata.update(
+        # We don't need to add s3_prefix here as it's handled in get_pdf_from_s3
+        stage_start = time.perf_counter()
+        pdf_file = get_pdf_from_s3(pdf_key, teacher_name)
+        timings["download"] = time.perf_counter() - stage_start
+
+        chunk_hashes = {}
+        # Term counts go straight to a spooled file rather than staying in memory
+        # until the whole file is done
+        shard_writer = LexicalShardWriter() if LEXICAL_INDEX_ENABLED else None
+        counts = {"changed": 0, "resumed": 0}
+
+        def iter_pending_chunks():
+            # Pages are extracted lazily as the embedding pipeline pulls chunks, so
+            # only the current page and the batches in flight are held in memory
+            chunks = iter_pdf_chunks(pdf_file, pdf_key)
+            while True:
+                extract_start = time.perf_counter()
+                chunk = next(chunks, None)
+                timings["extract"] += time.perf_counter() - extract_start
+                if chunk is None:
+                    return
+
+                chunk_id = chunk.metadata["id"]
+                chunk_hashes[chunk_id] = chunk_text_hash(chunk.page_content)
+                if shard_writer:
+                    shard_writer.add(chunk_id, chunk.page_content)
+                if previous_hashes.get(chunk_id) == chunk_hashes[chunk_id]:
+                    continue
+                counts["changed"] += 1
+                if chunk_id in upserted_ids:
+                    counts["resumed"] += 1
+                    continue
+                yield chunk
+
+        embed_start = time.perf_counter()
+        with pdf_file:
+            batches = iter_embedded_items(
+                iter_pending_chunks(),
+                embedding_function,
+                text_of=lambda chunk: chunk.page_content,
+            )
+            with UpsertWriter(index, on_batch_written=checkpoint_writer.add) as writer:
+                while True:
+                    stage_start = time.perf_counter()
+                    extract_before = timings["extract"]
+                    batch = next(batches, None)
+                    # Extraction happens while waiting on the pipeline; count it once
+                    timings["embed"] += (time.perf_counter() - stage_start) - (
+                        timings["extract"] - extract_before
+                    )
+                    if batch is None:
+                        break
+
+                    pending_chunks, embeddings = batch
+                    stage_start = time.perf_counter()
+                    for chunk, embedding in zip(pending_chunks, embeddings):
+                        metadata = chunk.metadata.copy()
+                        metadata.update(
+                            {
+                                "text": chunk.page_content,
+                                "google_drive_link": google_drive_link,
+                                "processed_date": int(time.time()),
+                                "teacher": teacher_name,
+                            }
+                        )
+                        writer.add((metadata["id"], embedding, metadata))
+                    timings["upsert"] += time.perf_counter() - stage_start
+
+                stage_start = time.perf_counter()
+                writer.close()
+                timings["upsert"] += time.perf_counter() - stage_start
+
+        if counts["resumed"]:
+            logging.info(
+                f"Resumed {pdf_key}: {counts['resumed']} of {counts['changed']} "
+                "chunks were already upserted"
+            )
+        throughput = embedding_throughput(
+            counts["changed"] - counts["resumed"], time.perf_counter() - embed_start
+        )
+        logging.info(
+            f"Embedded {throughput['chunks']} chunks of {pdf_key} in "
+            f"{throughput['seconds']}s ({throughput['chunks_per_second']} chunks/sec)"
+        )
+
+        # Drop the vectors of chunks that no longer exist in the new version
+        deleted_count = 0
+        if previously_ingested:
+            if manifest:
+                previous_ids = manifest["chunks"].keys()
+            else:
+                previous_ids, _ = _list_file_vector_ids(index, pdf_key)
+            stale_ids = sorted(set(previous_ids) - chunk_hashes.keys())
+            deleted_count = delete_vectors(index, stale_ids)
+
+        save_chunk_manifest(
+            teacher_name, pdf_key, {"etag": etag, "chunks": chunk_hashes}
+        )
+        if shard_writer:
+            save_lexical_shard(teacher_name, pdf_key, shard_writer.file)
+        add_processed_file_dynamodb(pdf_key, teacher_name, etag)
+        delete_checkpoint(teacher_name, pdf_key)
+
+        if stage_timings is not None:
+            stage_timings.update(timings)
+        if ingest_stats is not None:
+            ingest_stats.update(
                 {
-                    "text": chunk.page_content,
-                    "google_drive_link": google_drive_link,
-                    "processed_date": int(time.time()),
-                    "teacher": teacher_name,
+                    "embedded": counts["changed"],
+                    "unchanged": len(chunk_hashes) - counts["changed"],
+                    "deleted": deleted_count,
                 }
             )
-            vectors_to_upsert.append((metadata["id"], embedding, metadata))
-
-        index.upsert(vectors=vectors_to_upsert)
-        add_processed_file_dynamodb(pdf_key, teacher_name)
-        return len(chunks)
+        return len(chunk_hashes)
     except Exception as e:
         logging.error(
             f"Failed to process PDF {pdf_key} for teacher {teacher_name}: {str(e)}"
         )
+        if checkpoint_writer:
+            # Keep what was upserted since the last checkpoint for the next run
+            try:
+                checkpoint_writer.flush()
+            except Exception as e:
+                logging.warning(f"Failed to checkpoint {pdf_key}: {str(e)}")
         return 0
+    finally:
+        if shard_writer:
+            shard_writer.close()
 
 
-def process_all_pdfs(teacher_name):
+def process_all_pdfs(teacher_name, max_workers=None):
     try:
         config = TEACHER_CONFIG.get(teacher_name)
         if not config:
             raise ValueError(f"Invalid teacher name: {teacher_name}")
 
-        s3_prefix = config["s3_prefix"]
-        available_pdfs = list_pdfs_in_s3(teacher_name)
-        processed_files = list_processed_files(teacher_name)
+        run_start = time.perf_counter()
+        # Always re-list: a cached manifest could miss files uploaded since it was taken
+        available_pdfs = list_pdf_objects_in_s3(teacher_name, refresh=True)
+        processed_etags = get_processed_file_etags(teacher_name)
 
         total_chunks_added = 0
         newly_processed_files = 0
-        already_processed_files = len(processed_files)
+        updated_files = 0
+        already_processed_files = len(processed_etags)
         newly_processed_file_details = []
+        updated_file_details = []
         failed_files = []
-
-        for pdf_key in available_pdfs:
-            pdf_name = pdf_key.split("/")[-1]
-            if pdf_name not in processed_files:
-                chunks_added = process_pdf_file(pdf_name, teacher_name)
-                if chunks_added > 0:
-                    total_chunks_added += chunks_added
+        ingested_files = []
+        stage_timings = {"download": 0.0, "extract": 0.0, "embed": 0.0, "upsert": 0.0}
+
+        # New files are ingested in full. Files recorded before ETags were stored are
+        # treated as unchanged, since there is nothing to compare against.
+        pending_pdfs = []
+        for pdf in available_pdfs:
+            pdf_name = pdf["name"]
+            if pdf_name not in processed_etags:
+                pending_pdfs.append((pdf_name, pdf["etag"], False))
+            elif processed_etags[pdf_name] not in (None, pdf["etag"]):
+                pending_pdfs.append((pdf_name, pdf["etag"], True))
+
+        def process_with_timings(pdf_name, etag, previously_ingested):
+            timings = {}
+            ingest_stats = {}
+            chunk_count = process_pdf_file(
+                pdf_name,
+                teacher_name,
+                timings,
+                etag=etag,
+                previously_ingested=previously_ingested,
+                ingest_stats=ingest_stats,
+            )
+            return chunk_count, timings, ingest_stats
+
+        with ThreadPoolExecutor(
+            max_workers=max_workers or INGESTION_MAX_WORKERS,
+            thread_name_prefix="ingestion",
+        ) as executor:
+            futures = {
+                executor.submit(process_with_timings, *pending): pending
+                for pending in pending_pdfs
+            }
+            for future in as_completed(futures):
+                pdf_name, _, previously_ingested = futures[future]
+                chunk_count, timings, ingest_stats = future.result()
+                for stage, seconds in timings.items():
+                    stage_timings[stage] += seconds
+                if chunk_count == 0:
+                    failed_files.append(pdf_name)
+                    continue
+                ingested_files.append(pdf_name)
+                if previously_ingested:
+                    total_chunks_added += ingest_stats["embedded"]
+                    updated_files += 1
+                    updated_file_details.append(
+                        f"{pdf_name}: {ingest_stats['embedded']} chunks re-embedded, "
+                        f"{ingest_stats['unchanged']} unchanged, "
+                        f"{ingest_stats['deleted']} deleted"
+                    )
+                else:
+                    total_chunks_added += chunk_count
                     newly_processed_files += 1
                     newly_processed_file_details.append(
-                        f"{pdf_name}: {chunks_added} chunks"
+                        f"{pdf_name}: {chunk_count} chunks"
                     )
-                else:
-                    failed_files.append(pdf_name)
+
+        if newly_processed_files > 0 or updated_files > 0:
+            from utils.answer_cache import publish_corpus_version
+
+            # Cached answers may no longer reflect the professor's notes
+            publish_corpus_version(teacher_name)
+        if LEXICAL_INDEX_ENABLED:
+            # Also runs when nothing was ingested, to drop files removed from S3
+            try:
+                update_lexical_index(
+                    teacher_name,
+                    ingested_files,
+                    [pdf["name"] for pdf in available_pdfs],
+                    max_workers,
+                )
+            except Exception as e:
+                # Hybrid retrieval keeps serving the previous index
+                logging.error(
+                    f"Failed to update lexical index of {teacher_name}: {str(e)}"
+                )
+
+        stage_timings = {stage: round(t, 3) for stage, t in stage_timings.items()}
+        stage_timings["wall_clock"] = round(time.perf_counter() - run_start, 3)
 
         return {
             "status": "success",
-            "message": f"Processed {newly_processed_files} new PDF files and added {total_chunks_added} chunks to Pinecone for teacher {teacher_name}.",
+            "message": f"Processed {newly_processed_files} new and {updated_files} updated PDF files and added {total_chunks_added} chunks to Pinecone for teacher {teacher_name}.",
             "details": {
                 "already_processed_files": already_processed_files,
                 "newly_processed_files": newly_processed_files,
+                "updated_files": updated_files,
                 "total_chunks_added": total_chunks_added,
                 "newly_processed_file_details": newly_processed_file_details,
+                "updated_file_details": updated_file_details,
                 "failed_files": failed_files,
+                "stage_timings": stage_timings,
             },
         }
 
@@ -194,20 +393,138 @@ def process_all_pdfs(teacher_name):
         raise HTTPException(status_code=500, detail=f"Failed to process PDFs: {str(e)}")
 
 
-def list_processed_files(teacher_name):
+def backfill_lexical_index(teacher_name, max_workers=None):
+    """
+    Write lexical shards for ingested files that have none, then rebuild the
+    teacher's lexical index from every shard.
+
+    Files ingested before hybrid retrieval was enabled have vectors but no shard,
+    so their term counts are taken from the chunk text stored in the vector
+    metadata. Shards of files no longer in S3 are deleted by the rebuild.
+
+    Args:
+        teacher_name (str): The teacher whose index to rebuild.
+        max_workers (Optional[int]): Concurrent files. Defaults to
+            INGESTION_MAX_WORKERS.
+
+    Returns:
+        Dict[str, Any]: Backfilled and failed files, and the size of the new index.
+    """
     try:
-        dynamodb = boto3.resource("dynamodb")
-        processedFilesTable = dynamodb.Table(
-            "teaching-assistant-tavily-processed-files"
+        config = TEACHER_CONFIG.get(teacher_name)
+        if not config:
+            raise ValueError(f"Invalid teacher name: {teacher_name}")
+
+        index = get_vector_index(config["index_name"])
+        available_files = [
+            pdf["name"] for pdf in list_pdf_objects_in_s3(teacher_name, refresh=True)
+        ]
+        processed_etags = get_processed_file_etags(teacher_name)
+        shards = list_lexical_shards(teacher_name)
+        missing_files = [
+            file_name
+            for file_name in available_files
+            if file_name in processed_etags and file_name not in shards
+        ]
+
+        backfilled_files = []
+        failed_files = []
+        with ThreadPoolExecutor(
+            max_workers=max_workers or INGESTION_MAX_WORKERS,
+            thread_name_prefix="lexical-backfill",
+        ) as executor:
+            futures = {
+                executor.submit(
+                    _backfill_lexical_shard, index, teacher_name, file_name
+                ): file_name
+                for file_name in missing_files
+            }
+            for future in as_completed(futures):
+                file_name = futures[future]
+                chunk_count = future.result()
+                if chunk_count is None:
+                    failed_files.append(file_name)
+                else:
+                    backfilled_files.append(f"{file_name}: {chunk_count} chunks")
+
+        lexical_index = rebuild_lexical_index(teacher_name, available_files, max_workers)
+        return {
+            "status": "success",
+            "backfilled_files": backfilled_files,
+            "failed_files": failed_files,
+            "chunks": len(lexical_index),
+            "terms": len(lexical_index.terms),
+        }
+    except Exception as e:
+        logging.error(f"Failed to rebuild lexical index of {teacher_name}: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to rebuild lexical index: {str(e)}"
         )
 
-        response = processedFilesTable.scan(
-            FilterExpression=boto3.dynamodb.conditions.Attr("teacher").eq(teacher_name)
+
+def _backfill_lexical_shard(index, teacher_name, file_name, batch_size=100):
+    try:
+        ids, _ = _file_vector_ids(index, teacher_name, file_name)
+        with LexicalShardWriter() as shard_writer:
+            for start in range(0, len(ids), batch_size):
+                response = index.fetch(ids=ids[start : start + batch_size])
+                for chunk_id, vector in response.vectors.items():
+                    shard_writer.add(chunk_id, (vector.metadata or {}).get("text", ""))
+            save_lexical_shard(teacher_name, file_name, shard_writer.file)
+        return shard_writer.chunks
+    except Exception as e:
+        logging.error(
+            f"Failed to backfill the lexical shard of {file_name} for teacher {teacher_name}: {str(e)}"
         )
+        return None
+
 
-        processed_files = [item["filename"] for item in response["Items"]]
+def _query_processed_files(teacher_name):
+    from boto3.dynamodb.conditions import Attr, Key
 
-        return processed_files
+    processedFilesTable = get_dynamodb_table(PROCESSED_FILES_TABLE)
+    try:
+        # Reads only this teacher's partition of the GSI, following every page
+        yield from _paginate(
+            processedFilesTable.query,
+            IndexName=PROCESSED_FILES_TEACHER_INDEX,
+            KeyConditionExpression=Key("teacher").eq(teacher_name),
+            ProjectionExpression="filename, etag",
+        )
+        return
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ValidationException":
+            raise
+        logging.warning(
+            f"Index {PROCESSED_FILES_TEACHER_INDEX} not found on {PROCESSED_FILES_TABLE}, "
+            "falling back to a paginated scan"
+        )
+
+    yield from _paginate(
+        processedFilesTable.scan,
+        FilterExpression=Attr("teacher").eq(teacher_name),
+        ProjectionExpression="filename, etag",
+    )
+
+
+def _paginate(operation, **kwargs):
+    total_capacity = 0.0
+    while True:
+        response = operation(ReturnConsumedCapacity="TOTAL", **kwargs)
+        total_capacity += response.get("ConsumedCapacity", {}).get("CapacityUnits", 0)
+        yield from response["Items"]
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            break
+        kwargs["ExclusiveStartKey"] = last_key
+    logging.info(
+        f"{getattr(operation, '__name__', 'read')} of {PROCESSED_FILES_TABLE} consumed {total_capacity} capacity units"
+    )
+
+
+def list_processed_files(teacher_name):
+    try:
+        return [item["filename"] for item in _query_processed_files(teacher_name)]
     except ClientError as e:
         logging.error(
             f"Failed to list processed files from DynamoDB for teacher {teacher_name}: {str(e)}"
@@ -218,19 +535,36 @@ def list_processed_files(teacher_name):
         )
 
 
-def add_processed_file_dynamodb(filename, teacher_name):
+def get_processed_file_etags(teacher_name):
+    try:
+        return {
+            item["filename"]: item.get("etag")
+            for item in _query_processed_files(teacher_name)
+        }
+    except ClientError as e:
+        logging.error(
+            f"Failed to list processed files from DynamoDB for teacher {teacher_name}: {str(e)}"
+        )
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to list processed files for teacher {teacher_name}: {str(e)}",
+        )
+
+
+def add_processed_file_dynamodb(filename, teacher_name, etag=None):
     try:
         config = TEACHER_CONFIG.get(teacher_name)
         if not config:
             raise ValueError(f"Invalid teacher name: {teacher_name}")
 
-        processedFilesTable.put_item(
-            Item={
-                "filename": filename,
-                "index_name": config["index_name"],
-                "teacher": teacher_name,
-            }
-        )
+        item = {
+            "filename": filename,
+            "index_name": config["index_name"],
+            "teacher": teacher_name,
+        }
+        if etag:
+            item["etag"] = etag
+        get_dynamodb_table(PROCESSED_FILES_TABLE).put_item(Item=item)
     except ClientError as e:
         logging.error(f"Failed to add processed file to DynamoDB: {str(e)}")
         raise HTTPException(
@@ -262,85 +596,160 @@ def add_processed_file_dynamodb(filename, teacher_name):
 #         )
 #         return ""
 # Temporary fix for drive:
+DRIVE_LINK_NOT_FOUND = "File not present in Google Drive"
+
+# Successful lookups only, so a timeout is retried on the next call
+_drive_link_cache = TTLLRUCache(DRIVE_LINK_CACHE_MAX_SIZE, DRIVE_LINK_CACHE_TTL_SECONDS)
+
+
 def get_google_drive_link_pdf(pdf_name):
+    drive_link = _drive_link_cache.get(pdf_name)
+    if drive_link is None:
+        drive_link = _fetch_google_drive_link(pdf_name)
+    return drive_link or DRIVE_LINK_NOT_FOUND
+
+
+def _fetch_google_drive_link(pdf_name):
     try:
         response = requests.get(
             f"{FILE_ID_SERVICE_URL}/file_id",
-            params={"file_type": "pdf", "file_name": pdf_name},
+            # PDFs in sub-prefixes are named by their path; Drive knows the file name
+            params={"file_type": "pdf", "file_name": pdf_name.rsplit("/", 1)[-1]},
             timeout=5,
         )
         response.raise_for_status()
         data = response.json()
         file_id = data.get("id", "")
-        return f"https://drive.google.com/file/d/{file_id}/view"
-    except Exception:  # This block is no longer needed
-        pass  # Do nothing in this case
-    return "File not present in Google Drive"  # Always return this message
-
+    except Exception as e:
+        logging.warning(f"Google Drive link lookup failed for {pdf_name}: {str(e)}")
+        return None
+    if not file_id:
+        logging.warning(f"Google Drive link lookup returned no file ID for {pdf_name}")
+        return None
+    drive_link = f"https://drive.google.com/file/d/{file_id}/view"
+    _drive_link_cache.set(pdf_name, drive_link)
+    return drive_link
+
+
+def resolve_drive_links(pdf_names, stats=None):
+    """
+    Resolve the Google Drive link of each file once, looking up misses concurrently.
+
+    Args:
+        pdf_names (Iterable[str]): The file names to resolve.
+        stats (Optional[dict]): If given, "http_calls" is incremented by the number
+            of lookups made.
+
+    Returns:
+        dict: The drive link of each file, or None where the lookup failed.
+    """
+    links = {}
+    misses = []
+    for pdf_name in set(pdf_names):
+        links[pdf_name] = _drive_link_cache.get(pdf_name)
+        if links[pdf_name] is None:
+            misses.append(pdf_name)
+
+    if misses:
+        with ThreadPoolExecutor(
+            max_workers=DRIVE_LINK_LOOKUP_MAX_WORKERS, thread_name_prefix="drive-link"
+        ) as executor:
+            links.update(zip(misses, executor.map(_fetch_google_drive_link, misses)))
+    if stats is not None:
+        stats["http_calls"] = stats.get("http_calls", 0) + len(misses)
+    return links
+
+
+def update_missing_drive_links(teacher_name, stats=None):
+    from pinecone import PineconeException
 
-def update_missing_drive_links(teacher_name):
     config = TEACHER_CONFIG.get(teacher_name)
     if not config:
         raise ValueError(f"Invalid teacher name: {teacher_name}")
 
-    index = pc.Index(config["index_name"])
+    index = get_vector_index(config["index_name"])
 
     batch_size = 1000
     total_updated = 0
-    cursor = None
+    # Files with no vectors left to update, and files whose lookup kept failing
+    excluded_files = []
+    updated_ids = set()
+    updated_files = set()
+    failed_lookups = defaultdict(int)
+    stale_rounds = 0
+    job_stats = {"http_calls": 0}
+    start = time.perf_counter()
+    missing_link = {
+        "$or": [
+            {"google_drive_link": {"$exists": False}},
+            {"google_drive_link": {"$eq": ""}},
+        ],
+        "source": {"$exists": True},
+    }
 
     while True:
         try:
+            query_filter = missing_link
+            if excluded_files:
+                query_filter = {
+                    "$and": [missing_link, {"source": {"$nin": excluded_files}}]
+                }
             query_response = index.query(
                 vector=[0] * 1536,
                 top_k=batch_size,
                 include_metadata=True,
-                include_values=True,
-                filter={},
-                cursor=cursor,
+                include_values=False,
+                filter=query_filter,
             )
 
-            if not query_response.matches:
-                break
-
-            updates = []
+            # Vectors updated in an earlier round can still match a stale read
+            ids_by_file = defaultdict(set)
             for match in query_response.matches:
-                should_update = False
-                new_metadata = dict(match.metadata)
-
-                if (
-                    "google_drive_link" not in new_metadata
-                    or not new_metadata["google_drive_link"]
-                ):
-                    should_update = True
-
-                if should_update:
-                    pdf_name = new_metadata.get("source", "").split("/")[-1]
-                    if pdf_name:
-                        drive_link = get_google_drive_link_pdf(pdf_name)
-                        if drive_link:
-                            new_metadata["google_drive_link"] = drive_link
-                            updates.append(
-                                {
-                                    "id": match.id,
-                                    "values": match.values,
-                                    "metadata": new_metadata,
-                                }
-                            )
-
-            if updates:
-                upsert_response = index.upsert(vectors=updates)
-                total_updated += len(updates)
-                logging.info(f"Upsert response: {upsert_response}")
+                if match.id not in updated_ids:
+                    source = (match.metadata or {}).get("source", "")
+                    ids_by_file[source].add(match.id)
+            if not ids_by_file:
+                if not query_response.matches or stale_rounds >= DRIVE_LINK_STALE_ROUNDS:
+                    break
+                stale_rounds += 1
+                time.sleep(1)
+                continue
+            stale_rounds = 0
+
+            if ids_by_file.pop("", None):
+                excluded_files.append("")
+            links = resolve_drive_links(
+                (source.split("/")[-1] for source in ids_by_file), job_stats
+            )
+
+            # A full page may hold only part of a file's missing vectors; the rest
+            # come back in the next round, resolved from the link cache
+            truncated = len(query_response.matches) >= batch_size
+            for source, ids in ids_by_file.items():
+                drive_link = links[source.split("/")[-1]]
+                if not drive_link:
+                    # Left without a link so a later round or run retries it
+                    failed_lookups[source] += 1
+                    if failed_lookups[source] >= DRIVE_LINK_LOOKUP_ATTEMPTS:
+                        logging.warning(
+                            f"Skipping {source}: drive link lookup failed "
+                            f"{failed_lookups[source]} times"
+                        )
+                        excluded_files.append(source)
+                    continue
+                total_updated += update_metadata(
+                    index, sorted(ids), {"google_drive_link": drive_link}
+                )
+                updated_ids |= ids
+                updated_files.add(source)
+                if not truncated:
+                    excluded_files.append(source)
 
             logging.info(
-                f"Updated {len(updates)} vectors in this batch. Total updated: {total_updated}"
+                f"Updated drive links of {len(ids_by_file)} files in this round. "
+                f"Total vectors updated: {total_updated}"
             )
 
-            cursor = query_response.cursor
-            if cursor is None:
-                break
-
         except PineconeException as e:
             logging.error(f"Pinecone error during batch update: {str(e)}")
             raise
@@ -348,52 +757,61 @@ def update_missing_drive_links(teacher_name):
             logging.error(f"Unexpected error during batch update: {str(e)}")
             raise
 
+    seconds = time.perf_counter() - start
+    if stats is not None:
+        stats.update(
+            {
+                "vectors_updated": total_updated,
+                "files": len(updated_files),
+                "failed_files": sorted(
+                    source
+                    for source, failures in failed_lookups.items()
+                    if source not in updated_files
+                ),
+                "http_calls": job_stats["http_calls"],
+                "seconds": round(seconds, 3),
+                "vectors_per_second": (
+                    round(total_updated / seconds, 2) if seconds > 0 else 0.0
+                ),
+            }
+        )
     return total_updated
 
 
-def update_drive_link_for_file(file_name: str, drive_link: str, teacher_name: str):
+def update_drive_link_for_file(
+    file_name: str, drive_link: str, teacher_name: str, stats=None
+):
+    from pinecone import PineconeException
+
     try:
         config = TEACHER_CONFIG.get(teacher_name)
         if not config:
             raise ValueError(f"Invalid teacher name: {teacher_name}")
 
-        index = pc.Index(config["index_name"])
-
-        # Query for vectors with the given file name
-        query_response = index.query(
-            vector=[0] * 1536,  # Use a zero vector for querying
-            top_k=10000,
-            include_metadata=True,
-            include_values=True,  # Include vector values in the response
-            filter={"source": {"$eq": file_name}},
-        )
-
-        logging.info(f"Query response for {file_name}: {query_response}")
+        index = get_vector_index(config["index_name"])
 
-        if not query_response.matches:
-            logging.warning(f"No matches found for file: {file_name}")
+        start = time.perf_counter()
+        ids, id_source = _file_vector_ids(index, teacher_name, file_name)
+        if not ids:
+            logging.warning(f"No vectors found for file: {file_name}")
             return 0
 
-        updates = []
-        for match in query_response.matches:
-            # Create a new metadata dictionary
-            new_metadata = dict(match.metadata)
-            new_metadata["google_drive_link"] = drive_link
-            updates.append(
+        # Only the metadata field is sent; vector values never leave the index
+        updated = update_metadata(index, ids, {"google_drive_link": drive_link})
+        seconds = time.perf_counter() - start
+        logging.info(
+            f"Updated the drive link of {updated} vectors of {file_name} in {seconds:.2f}s "
+            f"(IDs from {id_source})"
+        )
+        if stats is not None:
+            stats.update(
                 {
-                    "id": match.id,
-                    "values": match.values,  # Include the original vector values
-                    "metadata": new_metadata,
+                    "vectors_updated": updated,
+                    "id_source": id_source,
+                    "seconds": round(seconds, 3),
                 }
             )
-
-        if updates:
-            # Use upsert with the correct format
-            upsert_response = index.upsert(vectors=updates)
-            logging.info(f"Upsert response: {upsert_response}")
-            return len(updates)
-        else:
-            return 0
+        return updated
     except PineconeException as e:
         logging.error(f"Pinecone error updating drive link for {file_name}: {str(e)}")
         raise
@@ -402,7 +820,66 @@ def update_drive_link_for_file(file_name: str, drive_link: str, teacher_name: st
         raise
 
 
+def _file_vector_ids(index, teacher_name, file_name):
+    """
+    Enumerate the IDs of every vector of a file.
+
+    The chunk manifest written at ingestion is used when there is one and it can
+    be read; otherwise the IDs are enumerated from the index.
+
+    Args:
+        index: The Pinecone index.
+        teacher_name (str): The teacher the file belongs to.
+        file_name (str): The name of the file.
+
+    Returns:
+        Tuple[List[str], str]: The IDs and where they came from.
+    """
+    try:
+        manifest = load_chunk_manifest(teacher_name, file_name)
+    except Exception as e:
+        logging.warning(f"Could not load the chunk manifest of {file_name}: {str(e)}")
+        manifest = None
+    if manifest:
+        return sorted(manifest["chunks"]), "manifest"
+    return _list_file_vector_ids(index, file_name)
+
+
+def _list_file_vector_ids(index, file_name):
+    """
+    Enumerate the IDs of every vector of a file from the index itself.
+
+    IDs are listed by their "filename:" prefix; indexes that cannot list IDs fall
+    back to a metadata-filtered query without values.
+
+    Args:
+        index: The Pinecone index.
+        file_name (str): The name of the file.
+
+    Returns:
+        Tuple[List[str], str]: The IDs and where they came from.
+    """
+    try:
+        return list_vector_ids(index, f"{file_name}:"), "list"
+    except Exception as e:
+        # ID listing is only available on serverless indexes
+        logging.warning(f"Could not list the vector IDs of {file_name}: {str(e)}")
+
+    query_response = index.query(
+        vector=[0] * 1536,
+        top_k=10000,
+        include_metadata=False,
+        include_values=False,
+        filter={"source": {"$eq": file_name}},
+    )
+    if len(query_response.matches) >= 10000:
+        logging.warning(f"{file_name} may have more than 10000 vectors; some were missed")
+    return [match.id for match in query_response.matches], "query"
+
+
 def combined_query(query_text, teacher_name, tavily_client):
+    from langchain.prompts import ChatPromptTemplate
+
     try:
         vector_db_results = query_vector_db(query_text, teacher_name)
 
@@ -463,7 +940,7 @@ def process_query(
 
     prompt = prompt_template.format(**prompt_params)
 
-    model = ChatBedrock(model_id=BEDROCK_MODEL_ID)
+    model = get_chat_model()
     response = model.invoke(prompt)
     response_text = response.content
 
@@ -478,11 +955,11 @@ def process_query(
         "prompt": prompt,
     }
 
-    # Add query info to DynamoDB
-    queriesTable.put_item(Item=result)
+    # Add query info to DynamoDB in the background
+    get_query_log_writer(QUERIES_TABLE).submit(result)
 
     logging.info(
-        f"Query processed and added to DynamoDB: {query_id} for teacher {teacher_name}"
+        f"Query processed and queued for DynamoDB: {query_id} for teacher {teacher_name}"
     )
 
     return result
@@ -497,27 +974,14 @@ def query_vector_db(query_text, teacher_name):
         index_name = config["index_name"]
         top_k = config["top_k"]
 
-        index = pc.Index(index_name)
-        embedding_function = get_embedding_function()
-        query_embedding = embedding_function.embed_query(query_text)
+        index = get_vector_index(index_name)
+        query_embedding = embed_query_cached(query_text)
 
         results = index.query(
             vector=query_embedding, top_k=top_k, include_metadata=True
         )
 
-        context_text = "\n\n---\n\n".join(
-            [match.metadata["text"] for match in results.matches]
-        )
-
-        sources = [
-            f"{match.metadata['source']} (Page {match.metadata.get('page', 'N/A')}) - {match.metadata.get('google_drive_link', 'No link available')}"
-            for match in results.matches
-        ]
-
-        return {
-            "context_text": context_text,
-            "sources": sources,
-        }
+        return build_vector_db_context(results.matches)
     except Exception as e:
         logging.error(f"Failed to query vector database: {str(e)}")
         raise HTTPException(
@@ -0,0 +1,207 @@
+# utils/answer_cache.py
+
+import copy
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.checkpoint_store import load_corpus_version, save_corpus_version
+from utils.config import (
+    ANSWER_CACHE_SIMILARITY_THRESHOLD,
+    ANSWER_CACHE_WEB_TTL_SECONDS,
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_VERSION_CHECK_SECONDS,
+    TEACHER_CONFIG,
+)
+from utils.lru_cache import TTLLRUCache
+
+
+def _language_key(target_language: Optional[str]) -> str:
+    return (target_language or "english").lower()
+
+
+class _Bucket:
+    def __init__(self, dimension: int, capacity: int, version: Optional[str]):
+        self.version = version
+        self.matrix = np.zeros((capacity, dimension), dtype=np.float32)
+        self.results: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self.created_at = np.zeros(capacity, dtype=np.float64)
+        self.size = 0
+        self.next_slot = 0
+
+
+class SemanticAnswerCache:
+    """
+    Caches final formatted results per (teacher, language) and serves them for queries
+    whose embedding is within a cosine-similarity threshold of a cached query.
+
+    Query embeddings are kept L2-normalized in a fixed-size matrix per bucket, so a
+    lookup is a single matrix-vector product. When a bucket is full the oldest entry
+    is overwritten. Entries older than ttl_seconds are never served, since the
+    Internet Notes and Sources they contain go stale.
+
+    Professor-derived content goes stale when documents are ingested. invalidate_teacher
+    only clears this container, so every bucket also records the corpus version it
+    was filled under, read through version_source; a bucket whose version no longer
+    matches is dropped on its next lookup or store.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = ANSWER_CACHE_SIMILARITY_THRESHOLD,
+        ttl_seconds: float = ANSWER_CACHE_WEB_TTL_SECONDS,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        version_source: Optional[Callable[[str], Optional[str]]] = None,
+    ):
+        self.version_source = version_source
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._buckets: Dict[Tuple[str, str], _Bucket] = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _version(self, teacher_name: str) -> Optional[str]:
+        return self.version_source(teacher_name) if self.version_source else None
+
+    def lookup(
+        self,
+        teacher_name: str,
+        target_language: Optional[str],
+        embedding: List[float],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached result for a semantically equivalent query.
+
+        Args:
+            teacher_name (str): The teacher the query was asked to.
+            target_language (Optional[str]): The requested output language.
+            embedding (List[float]): The query embedding.
+
+        Returns:
+            Optional[Dict[str, Any]]: A copy of the cached result, or None on a miss.
+        """
+        query = self._normalize(embedding)
+        version = self._version(teacher_name)
+        key = (teacher_name, _language_key(target_language))
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None and bucket.version != version:
+                del self._buckets[key]
+                bucket = None
+            if bucket is None or bucket.size == 0 or bucket.matrix.shape[1] != query.shape[0]:
+                self._counters["misses"] += 1
+                return None
+
+            similarities = bucket.matrix[: bucket.size] @ query
+            fresh = bucket.created_at[: bucket.size] >= time.time() - self.ttl_seconds
+            similarities[~fresh] = -1.0
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                self._counters["misses"] += 1
+                return None
+
+            self._counters["hits"] += 1
+            return copy.deepcopy(bucket.results[best])
+
+    def store(
+        self,
+        teacher_name: str,
+        target_language: Optional[str],
+        embedding: List[float],
+        result: Dict[str, Any],
+    ) -> None:
+        vector = self._normalize(embedding)
+        version = self._version(teacher_name)
+        key = (teacher_name, _language_key(target_language))
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if (
+                bucket is None
+                or bucket.version != version
+                or bucket.matrix.shape[1] != vector.shape[0]
+            ):
+                bucket = _Bucket(vector.shape[0], self.max_entries, version)
+                self._buckets[key] = bucket
+
+            slot = bucket.next_slot
+            bucket.matrix[slot] = vector
+            bucket.results[slot] = copy.deepcopy(result)
+            bucket.created_at[slot] = time.time()
+            bucket.next_slot = (slot + 1) % self.max_entries
+            bucket.size = min(bucket.size + 1, self.max_entries)
+
+    def invalidate_teacher(self, teacher_name: str) -> None:
+        """
+        Drop every cached answer for a teacher, in all languages.
+
+        Args:
+            teacher_name (str): The teacher whose documents changed.
+        """
+        with self._lock:
+            for key in [key for key in self._buckets if key[0] == teacher_name]:
+                del self._buckets[key]
+            self._counters["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = sum(bucket.size for bucket in self._buckets.values())
+        return stats
+
+
+_corpus_versions = TTLLRUCache(
+    max(1, len(TEACHER_CONFIG)), ANSWER_CACHE_VERSION_CHECK_SECONDS
+)
+
+
+def corpus_version(teacher_name: str) -> Optional[str]:
+    """
+    Return the teacher's published corpus version, read from S3 at most once per
+    ANSWER_CACHE_VERSION_CHECK_SECONDS.
+    """
+    version = _corpus_versions.get(teacher_name)
+    if version is None:
+        try:
+            version = load_corpus_version(teacher_name) or ""
+        except Exception as e:
+            logging.warning(f"Failed to load corpus version of {teacher_name}: {str(e)}")
+            version = ""
+        _corpus_versions.set(teacher_name, version)
+    return version
+
+
+def publish_corpus_version(teacher_name: str) -> None:
+    """
+    Give the teacher's corpus a new version after its documents changed, so every
+    container stops serving answers cached before the change within
+    ANSWER_CACHE_VERSION_CHECK_SECONDS. This container drops them immediately.
+
+    Args:
+        teacher_name (str): The teacher whose documents changed.
+    """
+    version = uuid.uuid4().hex
+    try:
+        save_corpus_version(teacher_name, version)
+    except Exception as e:
+        logging.error(f"Failed to publish corpus version of {teacher_name}: {str(e)}")
+    else:
+        _corpus_versions.set(teacher_name, version)
+    _answer_cache.invalidate_teacher(teacher_name)
+
+
+_answer_cache = SemanticAnswerCache(version_source=corpus_version)
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    return _answer_cache
@@ -0,0 +1,34 @@
+# utils/async_utils.py
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from utils.config import RETRIEVAL_MAX_WORKERS
+
+_executor = ThreadPoolExecutor(
+    max_workers=RETRIEVAL_MAX_WORKERS, thread_name_prefix="retrieval"
+)
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking call on the shared bounded executor without blocking the event loop.
+
+    The caller's context variables (e.g. the trace ID) are visible to the call.
+
+    Args:
+        func (Callable[..., Any]): The synchronous function to call.
+        *args: Positional arguments for the function.
+        **kwargs: Keyword arguments for the function.
+
+    Returns:
+        Any: The return value of the function.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _executor, context.run, functools.partial(func, *args, **kwargs)
+    )
@@ -0,0 +1,289 @@
+# utils/checkpoint_store.py
+
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import BinaryIO, Iterable, List, Optional
+from botocore.exceptions import ClientError
+from utils.config import (
+    S3_BUCKET,
+    INGESTION_CHECKPOINT_PREFIX,
+    INGESTION_CHECKPOINT_INTERVAL_SECONDS,
+    INGESTION_MANIFEST_PREFIX,
+    LEXICAL_SHARD_PREFIX,
+    CORPUS_VERSION_PREFIX,
+)
+from utils.clients import get_s3_client
+
+
+def _object_key(prefix: str, teacher_name: str, pdf_key: str) -> str:
+    return f"{prefix}{teacher_name}/{pdf_key}.json"
+
+
+def _load_json(key: str) -> Optional[dict]:
+    try:
+        response = get_s3_client().get_object(Bucket=S3_BUCKET, Key=key)
+        return json.loads(response["Body"].read())
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+            return None
+        logging.error(f"Failed to load {key}: {str(e)}")
+        return None
+    except ValueError as e:
+        # A truncated or corrupt object is treated as missing, so it is rewritten
+        logging.warning(f"Ignoring unreadable {key}: {str(e)}")
+        return None
+
+
+def _save_json(key: str, data: dict) -> None:
+    get_s3_client().put_object(
+        Bucket=S3_BUCKET,
+        Key=key,
+        Body=json.dumps(data).encode("utf-8"),
+        ContentType="application/json",
+    )
+
+
+def _delete(key: str) -> None:
+    try:
+        get_s3_client().delete_object(Bucket=S3_BUCKET, Key=key)
+    except ClientError as e:
+        logging.warning(f"Failed to delete {key}: {str(e)}")
+
+
+def _checkpoint_prefix(teacher_name: str, pdf_key: str) -> str:
+    return f"{INGESTION_CHECKPOINT_PREFIX}{teacher_name}/{pdf_key}/"
+
+
+def _list_keys(prefix: str) -> List[str]:
+    from utils.s3_handler import list_objects_concurrently
+
+    return [obj["Key"] for obj in list_objects_concurrently(prefix)]
+
+
+def load_checkpoint(teacher_name: str, pdf_key: str, etag: str) -> Optional[dict]:
+    """
+    Load the ingestion checkpoint of a PDF, if an earlier run left one behind.
+
+    The checkpoint is the union of the delta parts written for this version of
+    the file; parts written for another version are ignored.
+
+    Args:
+        teacher_name (str): The teacher the PDF belongs to.
+        pdf_key (str): The name of the PDF file.
+        etag (str): The ETag of the version being ingested.
+
+    Returns:
+        Optional[dict]: {"etag": ..., "upserted_ids": [...]}, or None if there is
+        nothing to resume.
+    """
+    upserted_ids = []
+    for key in _list_keys(_checkpoint_prefix(teacher_name, pdf_key)):
+        part = _load_json(key)
+        if part and part.get("etag") == etag:
+            upserted_ids.extend(part["upserted_ids"])
+    if not upserted_ids:
+        return None
+    return {"etag": etag, "upserted_ids": upserted_ids}
+
+
+def save_checkpoint(teacher_name: str, pdf_key: str, checkpoint: dict) -> None:
+    """
+    Persist a delta part of the ingestion checkpoint of a PDF.
+
+    Args:
+        teacher_name (str): The teacher the PDF belongs to.
+        pdf_key (str): The name of the PDF file.
+        checkpoint (dict): {"etag": ..., "upserted_ids": [...]} with only the IDs
+            upserted since the previous part.
+    """
+    _save_json(
+        f"{_checkpoint_prefix(teacher_name, pdf_key)}{uuid.uuid4().hex}.json",
+        checkpoint,
+    )
+
+
+def delete_checkpoint(teacher_name: str, pdf_key: str) -> None:
+    """
+    Remove every part of the ingestion checkpoint of a PDF once it is fully
+    processed.
+
+    Args:
+        teacher_name (str): The teacher the PDF belongs to.
+        pdf_key (str): The name of the PDF file.
+    """
+    for key in _list_keys(_checkpoint_prefix(teacher_name, pdf_key)):
+        _delete(key)
+
+
+class CheckpointWriter:
+    """
+    Checkpoints the IDs upserted for a PDF as they are written.
+
+    IDs are buffered and saved as one delta part at most once per interval, so
+    checkpoint traffic grows with the number of chunks rather than its square. A
+    crash loses at most the last interval of progress, which is re-embedded on the
+    next run. Safe to call from the upsert writer's worker threads.
+    """
+
+    def __init__(
+        self,
+        teacher_name: str,
+        pdf_key: str,
+        etag: str,
+        interval_seconds: float = INGESTION_CHECKPOINT_INTERVAL_SECONDS,
+    ):
+        self.teacher_name = teacher_name
+        self.pdf_key = pdf_key
+        self.etag = etag
+        self.interval_seconds = interval_seconds
+        self._pending: List[str] = []
+        self._saved_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            self._pending.extend(ids)
+            if time.monotonic() - self._saved_at >= self.interval_seconds:
+                self._save()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._save()
+
+    def _save(self) -> None:
+        if self._pending:
+            save_checkpoint(
+                self.teacher_name,
+                self.pdf_key,
+                {"etag": self.etag, "upserted_ids": self._pending},
+            )
+            self._pending = []
+        self._saved_at = time.monotonic()
+
+
+def load_chunk_manifest(teacher_name: str, pdf_key: str) -> Optional[dict]:
+    """
+    Load the chunk manifest written the last time a PDF was ingested.
+
+    Args:
+        teacher_name (str): The teacher the PDF belongs to.
+        pdf_key (str): The name of the PDF file.
+
+    Returns:
+        Optional[dict]: {"etag": ..., "chunks": {chunk_id: text_hash}}, or None.
+    """
+    return _load_json(_object_key(INGESTION_MANIFEST_PREFIX, teacher_name, pdf_key))
+
+
+def save_chunk_manifest(teacher_name: str, pdf_key: str, manifest: dict) -> None:
+    """
+    Persist the chunk manifest of an ingested PDF.
+
+    Args:
+        teacher_name (str): The teacher the PDF belongs to.
+        pdf_key (str): The name of the PDF file.
+        manifest (dict): {"etag": ..., "chunks": {chunk_id: text_hash}}.
+    """
+    _save_json(_object_key(INGESTION_MANIFEST_PREFIX, teacher_name, pdf_key), manifest)
+
+
+def _lexical_shard_key(teacher_name: str, pdf_key: str) -> str:
+    return f"{LEXICAL_SHARD_PREFIX}{teacher_name}/{pdf_key}.jsonl"
+
+
+def load_lexical_shard(teacher_name: str, pdf_key: str) -> Optional[dict]:
+    """
+    Load the term counts of a PDF's chunks written at its last ingestion.
+
+    Args:
+        teacher_name (str): The teacher the PDF belongs to.
+        pdf_key (str): The name of the PDF file.
+
+    Returns:
+        Optional[dict]: {chunk_id: {term: count}}, or None if there is no shard.
+    """
+    key = _lexical_shard_key(teacher_name, pdf_key)
+    try:
+        response = get_s3_client().get_object(Bucket=S3_BUCKET, Key=key)
+    except ClientError as e:
+        if e.response["Error"]["Code"] not in ("NoSuchKey", "404"):
+            logging.error(f"Failed to load {key}: {str(e)}")
+        return None
+    chunk_terms = {}
+    for line in response["Body"].read().splitlines():
+        if line:
+            entry = json.loads(line)
+            chunk_terms[entry["id"]] = entry["terms"]
+    return chunk_terms
+
+
+def save_lexical_shard(teacher_name: str, pdf_key: str, body: BinaryIO) -> None:
+    """
+    Persist the term counts of a PDF's chunks for the teacher's lexical index.
+
+    Args:
+        teacher_name (str): The teacher the PDF belongs to.
+        pdf_key (str): The name of the PDF file.
+        body (BinaryIO): JSON lines of {"id": chunk_id, "terms": {term: count}},
+            uploaded from the start of the file.
+    """
+    body.seek(0)
+    get_s3_client().put_object(
+        Bucket=S3_BUCKET,
+        Key=_lexical_shard_key(teacher_name, pdf_key),
+        Body=body,
+        ContentType="application/x-ndjson",
+    )
+
+
+def delete_lexical_shard(teacher_name: str, pdf_key: str) -> None:
+    """
+    Delete the lexical shard of a PDF that is no longer in the teacher's folder.
+
+    Args:
+        teacher_name (str): The teacher the PDF belonged to.
+        pdf_key (str): The name of the PDF file.
+    """
+    _delete(_lexical_shard_key(teacher_name, pdf_key))
+
+
+def chunk_text_hash(text: str) -> str:
+    """
+    Hash the text of a chunk for change detection between ingestion runs.
+
+    Args:
+        text (str): The chunk text.
+
+    Returns:
+        str: The hex SHA-1 digest of the text.
+    """
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def load_corpus_version(teacher_name: str) -> Optional[str]:
+    """
+    Load the version a teacher's corpus was given at its last ingestion run.
+
+    Args:
+        teacher_name (str): The teacher whose corpus to look up.
+
+    Returns:
+        Optional[str]: The version, or None if it was never published.
+    """
+    data = _load_json(f"{CORPUS_VERSION_PREFIX}{teacher_name}.json")
+    return data.get("version") if data else None
+
+
+def save_corpus_version(teacher_name: str, version: str) -> None:
+    """
+    Publish a new version of a teacher's corpus, read by every container.
+
+    Args:
+        teacher_name (str): The teacher whose documents changed.
+        version (str): The new version.
+    """
+    _save_json(f"{CORPUS_VERSION_PREFIX}{teacher_name}.json", {"version": version})
@@ -0,0 +1,191 @@
+# utils/clients.py
+
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from utils.config import (
+    BEDROCK_MODEL_ID,
+    EMBEDDING_MODEL_ID,
+    PINECONE_API_KEY,
+    TAVILY_API_KEY,
+    CLIENT_MAX_POOL_CONNECTIONS,
+    CLIENT_MAX_ATTEMPTS,
+    PINECONE_POOL_THREADS,
+    DYNAMODB_ENDPOINT_URL,
+    LOCAL_VECTOR_DTYPE,
+    LOCAL_VECTOR_STORE_DIR,
+    LOCAL_VECTOR_STORE_READ_ONLY,
+    TEACHER_CONFIG,
+    VECTOR_STORE_BACKEND,
+)
+
+_clients: Dict[Hashable, Any] = {}
+_lock = threading.RLock()
+
+
+def get_client(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """
+    Return the client registered under key, building it with factory on first use.
+
+    Clients are built once per container and shared by every request. Construction
+    happens under a lock, so concurrent first uses from worker threads build a single
+    instance.
+
+    Args:
+        key (Hashable): The registry key.
+        factory (Callable[[], Any]): Builds the client.
+
+    Returns:
+        Any: The shared client.
+    """
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = factory()
+                _clients[key] = client
+    return client
+
+
+def reset_clients() -> None:
+    with _lock:
+        _clients.clear()
+
+
+def _boto_config():
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=CLIENT_MAX_POOL_CONNECTIONS,
+        retries={"max_attempts": CLIENT_MAX_ATTEMPTS, "mode": "standard"},
+    )
+
+
+def _boto3_session():
+    # boto3's default session is not thread-safe, so the registry owns one session
+    # and builds every AWS client from it under the registry lock
+    import boto3
+
+    return get_client("boto3_session", boto3.session.Session)
+
+
+def get_s3_client() -> Any:
+    return get_client(
+        "s3", lambda: _boto3_session().client("s3", config=_boto_config())
+    )
+
+
+def get_dynamodb_resource() -> Any:
+    return get_client(
+        "dynamodb",
+        lambda: _boto3_session().resource(
+            "dynamodb", config=_boto_config(), endpoint_url=DYNAMODB_ENDPOINT_URL
+        ),
+    )
+
+
+def get_dynamodb_table(table_name: str) -> Any:
+    return get_client(
+        ("dynamodb_table", table_name),
+        lambda: get_dynamodb_resource().Table(table_name),
+    )
+
+
+def get_bedrock_runtime_client() -> Any:
+    return get_client(
+        "bedrock_runtime",
+        lambda: _boto3_session().client("bedrock-runtime", config=_boto_config()),
+    )
+
+
+def get_embedding_model() -> Any:
+    def build():
+        from langchain_aws import BedrockEmbeddings
+
+        return BedrockEmbeddings(
+            client=get_bedrock_runtime_client(), model_id=EMBEDDING_MODEL_ID
+        )
+
+    return get_client("bedrock_embeddings", build)
+
+
+def get_chat_model() -> Any:
+    def build():
+        from langchain_aws import ChatBedrock
+
+        return ChatBedrock(client=get_bedrock_runtime_client(), model_id=BEDROCK_MODEL_ID)
+
+    return get_client("chat_bedrock", build)
+
+
+def get_pinecone() -> Any:
+    def build():
+        from pinecone import Pinecone
+
+        return Pinecone(api_key=PINECONE_API_KEY, pool_threads=PINECONE_POOL_THREADS)
+
+    return get_client("pinecone", build)
+
+
+def get_pinecone_index(index_name: str) -> Any:
+    # Resolving an index host is a control-plane call, so it is done once per index
+    return get_client(
+        ("pinecone_index", index_name),
+        lambda: get_pinecone().Index(index_name, pool_threads=PINECONE_POOL_THREADS),
+    )
+
+
+def get_local_vector_index(index_name: str) -> Any:
+    def build():
+        from utils.local_vector_index import LocalVectorIndex
+
+        dtype = next(
+            (
+                config.get("vector_dtype")
+                for config in TEACHER_CONFIG.values()
+                if config["index_name"] == index_name and config.get("vector_dtype")
+            ),
+            LOCAL_VECTOR_DTYPE,
+        )
+        if not LOCAL_VECTOR_STORE_DIR:
+            raise ValueError(
+                "LOCAL_VECTOR_STORE_DIR must be set when VECTOR_STORE_BACKEND is local"
+            )
+        path = os.path.join(LOCAL_VECTOR_STORE_DIR, index_name)
+        read_only = LOCAL_VECTOR_STORE_READ_ONLY or (
+            os.path.isdir(path) and not os.access(path, os.W_OK)
+        )
+        return LocalVectorIndex(path, dtype, read_only=read_only)
+
+    return get_client(("local_vector_index", index_name), build)
+
+
+def get_vector_index(index_name: str) -> Any:
+    """
+    Return the index of the configured vector store backend.
+
+    Both backends answer query, upsert, list, delete and update as a Pinecone Index
+    does, so callers do not need to know which one they have.
+
+    Args:
+        index_name (str): The index name from TEACHER_CONFIG.
+
+    Returns:
+        Any: A Pinecone Index or a LocalVectorIndex.
+    """
+    if VECTOR_STORE_BACKEND == "local":
+        return get_local_vector_index(index_name)
+    if VECTOR_STORE_BACKEND == "pinecone":
+        return get_pinecone_index(index_name)
+    raise ValueError(f"Unknown vector store backend: {VECTOR_STORE_BACKEND}")
+
+
+def get_tavily_client() -> Any:
+    def build():
+        from tavily import TavilyClient
+
+        return TavilyClient(api_key=TAVILY_API_KEY)
+
+    return get_client("tavily", build)
@@ -20,6 +20,7 @@ TEACHER_CONFIG = {
 PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY")
 # BEDROCK_MODEL_ID = os.environ.get("BEDROCK_MODEL_ID", "meta.llama3-8b-instruct-v1:0")
 BEDROCK_MODEL_ID = "anthropic.claude-3-haiku-20240307-v1:0"
+EMBEDDING_MODEL_ID = os.environ.get("EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v1")
 FILE_ID_SERVICE_URL = os.environ.get(
     "FILE_ID_SERVICE_URL", "http://host.docker.internal:8001"
 )
@@ -28,13 +29,207 @@ TAVILY_API_KEY = os.environ.get("TAVILY_API_KEY")
 # S3 bucket name
 S3_BUCKET = os.environ.get("S3_BUCKET", "teaching-assistant-tavily")
 
+# S3 listing: sub-prefixes of a teacher prefix are listed concurrently, and the
+# resulting manifest (keys, sizes, ETags) is cached in memory and in S3
+S3_LIST_MAX_WORKERS = int(os.environ.get("S3_LIST_MAX_WORKERS", "8"))
+S3_MANIFEST_TTL_SECONDS = float(os.environ.get("S3_MANIFEST_TTL_SECONDS", "300"))
+S3_MANIFEST_PREFIX = os.environ.get("S3_MANIFEST_PREFIX", "data/listings/")
+
 # DynamoDB table names
 PROCESSED_FILES_TABLE = "teaching-assistant-tavily-processed-files"
 QUERIES_TABLE = "teaching-assistant-tavily-queries-table"
+# GSI on the processed-files table partitioned by teacher, sorted by filename
+PROCESSED_FILES_TEACHER_INDEX = os.environ.get(
+    "PROCESSED_FILES_TEACHER_INDEX", "teacher-index"
+)
+
+# When true, heavy dependencies and the LangGraph workflow are loaded on first use
+# of the route that needs them rather than when main is imported
+LAZY_STARTUP = os.environ.get("LAZY_STARTUP", "true").lower() == "true"
+
+# Shared client registry. Pool sizes should cover the retrieval, embedding and
+# upsert worker pools that share the clients.
+CLIENT_MAX_POOL_CONNECTIONS = int(os.environ.get("CLIENT_MAX_POOL_CONNECTIONS", "32"))
+CLIENT_MAX_ATTEMPTS = int(os.environ.get("CLIENT_MAX_ATTEMPTS", "3"))
+PINECONE_POOL_THREADS = int(os.environ.get("PINECONE_POOL_THREADS", "8"))
+
+# Vector store behind retrieval and ingestion: "pinecone", or "local" for exact
+# search over memory-mapped matrices under LOCAL_VECTOR_STORE_DIR (one directory per
+# index). A teacher's "vector_dtype" overrides LOCAL_VECTOR_DTYPE (float32/float16).
+# float16 halves disk and resident memory but is decoded block by block on every
+# query, which makes queries several times slower.
+# The directory has no default: /tmp starts empty in every Lambda container, so it
+# must point at a store that already holds the indexes, such as a snapshot baked into
+# the image. Such snapshots are opened read-only (LOCAL_VECTOR_STORE_READ_ONLY, or
+# automatically when the directory is not writable).
+VECTOR_STORE_BACKEND = os.environ.get("VECTOR_STORE_BACKEND", "pinecone")
+LOCAL_VECTOR_STORE_DIR = os.environ.get("LOCAL_VECTOR_STORE_DIR")
+LOCAL_VECTOR_STORE_READ_ONLY = (
+    os.environ.get("LOCAL_VECTOR_STORE_READ_ONLY", "false").lower() == "true"
+)
+LOCAL_VECTOR_DTYPE = os.environ.get("LOCAL_VECTOR_DTYPE", "float32")
+
+# Point DynamoDB at a local stand-in such as DynamoDB Local, e.g. http://localhost:8000
+DYNAMODB_ENDPOINT_URL = os.environ.get("DYNAMODB_ENDPOINT_URL")
+
+# Background query-log writer. QUERY_LOG_PROMPT_MODE is "full", "truncate" or
+# "compress" (zlib, stored as binary with prompt_encoding="zlib"; readers must
+# decompress it). A record is dropped after QUERY_LOG_MAX_ATTEMPTS failed writes.
+# The Lambda handler waits at most QUERY_LOG_HANDLER_DRAIN_SECONDS for pending
+# records before the container is frozen; the rest are written once it thaws.
+QUERY_LOG_BATCH_SIZE = int(os.environ.get("QUERY_LOG_BATCH_SIZE", "25"))
+QUERY_LOG_FLUSH_INTERVAL_SECONDS = float(
+    os.environ.get("QUERY_LOG_FLUSH_INTERVAL_SECONDS", "1.0")
+)
+QUERY_LOG_MAX_BUFFER = int(os.environ.get("QUERY_LOG_MAX_BUFFER", "1000"))
+QUERY_LOG_PROMPT_MODE = os.environ.get("QUERY_LOG_PROMPT_MODE", "full")
+QUERY_LOG_PROMPT_MAX_CHARS = int(os.environ.get("QUERY_LOG_PROMPT_MAX_CHARS", "4000"))
+QUERY_LOG_DRAIN_TIMEOUT_SECONDS = float(
+    os.environ.get("QUERY_LOG_DRAIN_TIMEOUT_SECONDS", "2.0")
+)
+QUERY_LOG_HANDLER_DRAIN_SECONDS = float(
+    os.environ.get("QUERY_LOG_HANDLER_DRAIN_SECONDS", "0.1")
+)
+QUERY_LOG_MAX_ATTEMPTS = int(os.environ.get("QUERY_LOG_MAX_ATTEMPTS", "3"))
+
+# Size of the thread pool used to run blocking Bedrock, Pinecone and Tavily calls
+# off the event loop
+RETRIEVAL_MAX_WORKERS = int(os.environ.get("RETRIEVAL_MAX_WORKERS", "8"))
+
+# Query embedding cache. The persistent tier is "none", "sqlite" (a local file,
+# shared by invocations of a warm container; for local runs, since /tmp starts empty
+# in every Lambda container) or "dynamodb" (shared by all containers; the deployed
+# stack provisions the table and selects it).
+EMBEDDING_CACHE_MAX_SIZE = int(os.environ.get("EMBEDDING_CACHE_MAX_SIZE", "2048"))
+EMBEDDING_CACHE_TTL_SECONDS = int(
+    os.environ.get("EMBEDDING_CACHE_TTL_SECONDS", str(7 * 24 * 3600))
+)
+EMBEDDING_CACHE_BACKEND = os.environ.get("EMBEDDING_CACHE_BACKEND", "sqlite")
+EMBEDDING_CACHE_SQLITE_PATH = os.environ.get(
+    "EMBEDDING_CACHE_SQLITE_PATH", "/tmp/embedding-cache.sqlite3"
+)
+EMBEDDING_CACHE_TABLE = os.environ.get(
+    "EMBEDDING_CACHE_TABLE", "teaching-assistant-tavily-embedding-cache"
+)
+
+# Semantic answer cache for /combined_query. Entries expire after the web TTL because
+# the cached answers include Tavily results.
+ANSWER_CACHE_ENABLED = os.environ.get("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(
+    os.environ.get("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.95")
+)
+ANSWER_CACHE_WEB_TTL_SECONDS = int(os.environ.get("ANSWER_CACHE_WEB_TTL_SECONDS", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", "512"))
+# Ingestion publishes a per-teacher corpus version to S3; each container re-reads it
+# at most this often and drops answers cached under an older version.
+ANSWER_CACHE_VERSION_CHECK_SECONDS = int(
+    os.environ.get("ANSWER_CACHE_VERSION_CHECK_SECONDS", "30")
+)
+
+# Tavily result cache. Results older than the TTL are still served for the stale
+# window while a single background refresh runs.
+WEB_SEARCH_CACHE_TTL_SECONDS = int(os.environ.get("WEB_SEARCH_CACHE_TTL_SECONDS", "900"))
+WEB_SEARCH_CACHE_STALE_SECONDS = int(
+    os.environ.get("WEB_SEARCH_CACHE_STALE_SECONDS", "3600")
+)
+WEB_SEARCH_CACHE_MAX_SIZE = int(os.environ.get("WEB_SEARCH_CACHE_MAX_SIZE", "1024"))
+
+# Translation engine. Google Translate rejects requests above 5000 characters.
+TRANSLATION_BATCH_MAX_CHARS = int(os.environ.get("TRANSLATION_BATCH_MAX_CHARS", "4500"))
+TRANSLATION_CACHE_MAX_SIZE = int(os.environ.get("TRANSLATION_CACHE_MAX_SIZE", "4096"))
+
+# Ingestion embedding pipeline. Titan embeds one text per Bedrock request, so the
+# speed-up comes from the concurrency; texts per task only bounds the work in
+# flight (EMBEDDING_TASK_TEXTS * EMBEDDING_MAX_CONCURRENCY texts).
+EMBEDDING_TASK_TEXTS = int(os.environ.get("EMBEDDING_TASK_TEXTS", "16"))
+EMBEDDING_MAX_CONCURRENCY = int(os.environ.get("EMBEDDING_MAX_CONCURRENCY", "4"))
+EMBEDDING_MAX_RETRIES = int(os.environ.get("EMBEDDING_MAX_RETRIES", "5"))
+EMBEDDING_RETRY_BASE_DELAY = float(os.environ.get("EMBEDDING_RETRY_BASE_DELAY", "0.5"))
+
+# Pinecone upsert writer. Pinecone rejects requests above 2 MB or 1000 vectors.
+UPSERT_BATCH_MAX_VECTORS = int(os.environ.get("UPSERT_BATCH_MAX_VECTORS", "100"))
+UPSERT_BATCH_MAX_BYTES = int(os.environ.get("UPSERT_BATCH_MAX_BYTES", "1800000"))
+UPSERT_MAX_CONCURRENCY = int(os.environ.get("UPSERT_MAX_CONCURRENCY", "4"))
+UPSERT_MAX_RETRIES = int(os.environ.get("UPSERT_MAX_RETRIES", "3"))
+# Metadata-only updates (index.update with set_metadata) run concurrently per vector
+METADATA_UPDATE_MAX_CONCURRENCY = int(
+    os.environ.get("METADATA_UPDATE_MAX_CONCURRENCY", "16")
+)
+
+# Google Drive link lookups are resolved once per file and memoized
+DRIVE_LINK_LOOKUP_MAX_WORKERS = int(os.environ.get("DRIVE_LINK_LOOKUP_MAX_WORKERS", "8"))
+DRIVE_LINK_CACHE_MAX_SIZE = int(os.environ.get("DRIVE_LINK_CACHE_MAX_SIZE", "4096"))
+DRIVE_LINK_CACHE_TTL_SECONDS = float(
+    os.environ.get("DRIVE_LINK_CACHE_TTL_SECONDS", "3600")
+)
+# The backfill gives up on a file for the rest of a run after this many failed
+# lookups, and stops after this many rounds that only return already-updated vectors
+DRIVE_LINK_LOOKUP_ATTEMPTS = int(os.environ.get("DRIVE_LINK_LOOKUP_ATTEMPTS", "3"))
+DRIVE_LINK_STALE_ROUNDS = int(os.environ.get("DRIVE_LINK_STALE_ROUNDS", "3"))
+
+# Ingestion engine
+INGESTION_MAX_WORKERS = int(os.environ.get("INGESTION_MAX_WORKERS", "4"))
+INGESTION_CHECKPOINT_PREFIX = os.environ.get(
+    "INGESTION_CHECKPOINT_PREFIX", "data/checkpoints/"
+)
+# Upserted IDs are checkpointed as small delta objects, at most once per interval
+INGESTION_CHECKPOINT_INTERVAL_SECONDS = float(
+    os.environ.get("INGESTION_CHECKPOINT_INTERVAL_SECONDS", "10")
+)
+# Per-file chunk manifests (chunk ID -> text hash) used for incremental re-ingestion
+INGESTION_MANIFEST_PREFIX = os.environ.get(
+    "INGESTION_MANIFEST_PREFIX", "data/manifests/"
+)
+CORPUS_VERSION_PREFIX = os.environ.get("CORPUS_VERSION_PREFIX", "data/corpus_versions/")
+
+# Structured JSON log lines for every request, workflow node and upstream call
+METRICS_LOG_EVENTS = os.environ.get("METRICS_LOG_EVENTS", "true").lower() == "true"
 
 # PDF Processor constants
 PDF_CHUNK_SIZE = 600
 PDF_CHUNK_OVERLAP = 120
+# PDFs are streamed from S3 into a spooled file that stays in memory up to this
+# size and spills to temporary storage (/tmp on Lambda) beyond it
+PDF_SPOOL_MAX_MEMORY_MB = int(os.environ.get("PDF_SPOOL_MAX_MEMORY_MB", "32"))
+PDF_SPOOL_DIR = os.environ.get("PDF_SPOOL_DIR") or None
+S3_DOWNLOAD_CHUNK_BYTES = int(os.environ.get("S3_DOWNLOAD_CHUNK_BYTES", str(1024 * 1024)))
+# Text extraction is sharded across processes by page range for large PDFs.
+# 0 workers means one per CPU; Lambda always extracts in a single process.
+PDF_EXTRACT_MAX_WORKERS = int(os.environ.get("PDF_EXTRACT_MAX_WORKERS", "0"))
+PDF_EXTRACT_MIN_PAGES = int(os.environ.get("PDF_EXTRACT_MIN_PAGES", "100"))
+PDF_EXTRACT_SHARD_PAGES = int(os.environ.get("PDF_EXTRACT_SHARD_PAGES", "25"))
+# Prompt context assembly. Retrieved chunks are merged with their neighbours,
+# repeated sentences dropped, and each source is cut to a token budget by relevance.
+CONTEXT_ASSEMBLY_ENABLED = (
+    os.environ.get("CONTEXT_ASSEMBLY_ENABLED", "true").lower() == "true"
+)
+PROFESSOR_CONTEXT_TOKEN_BUDGET = int(
+    os.environ.get("PROFESSOR_CONTEXT_TOKEN_BUDGET", "1500")
+)
+WEB_CONTEXT_TOKEN_BUDGET = int(os.environ.get("WEB_CONTEXT_TOKEN_BUDGET", "1200"))
+
+# Hybrid retrieval. A BM25 index of each teacher's chunks is built at ingestion
+# (per-file shards merged into one compressed object per teacher) and fused with
+# the vector results by reciprocal rank fusion. Containers reload it after the
+# refresh interval.
+LEXICAL_INDEX_ENABLED = os.environ.get("LEXICAL_INDEX_ENABLED", "true").lower() == "true"
+LEXICAL_INDEX_PREFIX = os.environ.get("LEXICAL_INDEX_PREFIX", "data/lexical/")
+LEXICAL_SHARD_PREFIX = f"{LEXICAL_INDEX_PREFIX}shards/"
+# Shards are written chunk by chunk as JSON lines to a spooled file that spills
+# to PDF_SPOOL_DIR beyond this size
+LEXICAL_SHARD_SPOOL_MAX_MEMORY_MB = int(
+    os.environ.get("LEXICAL_SHARD_SPOOL_MAX_MEMORY_MB", "1")
+)
+LEXICAL_INDEX_REFRESH_SECONDS = float(
+    os.environ.get("LEXICAL_INDEX_REFRESH_SECONDS", "900")
+)
+LEXICAL_TOP_K = int(os.environ.get("LEXICAL_TOP_K", "5"))
+# Fused matches kept per query; unset, it follows the teacher's vector top_k so
+# hybrid retrieval does not enlarge the prompt context
+HYBRID_TOP_K = (
+    int(os.environ["HYBRID_TOP_K"]) if os.environ.get("HYBRID_TOP_K") else None
+)
+RRF_K = int(os.environ.get("RRF_K", "60"))
 # Other constants
 PROMPT_TEMPLATE = """
 Answer the question based only on the following context:
@@ -0,0 +1,234 @@
+# utils/context_assembler.py
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.config import PDF_CHUNK_OVERLAP
+from utils.metrics import log_event
+
+# Rough size of a Claude token in English text; only used to compare against budgets
+CHARS_PER_TOKEN = 4
+# Shorter common prefixes/suffixes of neighbouring chunks are not treated as overlap
+MIN_OVERLAP_CHARS = 20
+PASSAGE_SEPARATOR = "\n\n---\n\n"
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def parse_chunk_id(chunk_id: str) -> Optional[Tuple[str, str, int]]:
+    """
+    Split a "filename:page:idx" chunk ID; filenames may themselves contain colons.
+
+    Returns:
+        Optional[Tuple[str, str, int]]: (filename, page, idx), or None for IDs in
+        another format.
+    """
+    parts = chunk_id.rsplit(":", 2)
+    if len(parts) != 3 or not parts[2].isdigit():
+        return None
+    return parts[0], parts[1], int(parts[2])
+
+
+def merge_overlapping(first: str, second: str, max_overlap: int = PDF_CHUNK_OVERLAP) -> str:
+    # The splitter repeats up to chunk_overlap characters of a chunk at the start of
+    # the next one; find the longest such repeat and keep it once
+    for size in range(min(len(first), len(second), max_overlap), MIN_OVERLAP_CHARS - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return f"{first} {second}"
+
+
+def _normalize(sentence: str) -> str:
+    return " ".join(sentence.casefold().split())
+
+
+def dedupe_sentences(text: str, seen: Set[str]) -> str:
+    """
+    Drop sentences of text already in seen, adding the new ones to it.
+
+    Line breaks are kept; sentences within a line are rejoined with single spaces.
+    """
+    lines = []
+    for line in text.splitlines():
+        kept = []
+        for sentence in _SENTENCE_END_RE.split(line.strip()):
+            key = _normalize(sentence)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            kept.append(sentence)
+        if kept:
+            lines.append(" ".join(kept))
+    return "\n".join(lines)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    # Cut at the last sentence end that fits, or mid-sentence if none does
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    head = text[:max_chars]
+    cut = max(head.rfind(". "), head.rfind("? "), head.rfind("! "), head.rfind("\n"))
+    return head[: cut + 1].rstrip() if cut > 0 else head.rstrip()
+
+
+def fill_budget(passages: Iterable[str], token_budget: int) -> List[str]:
+    """
+    Take passages, most relevant first, until token_budget is spent.
+
+    The first passage that does not fit is truncated to the remaining budget.
+    """
+    selected = []
+    remaining = token_budget
+    separator_tokens = estimate_tokens(PASSAGE_SEPARATOR)
+    for passage in passages:
+        cost = estimate_tokens(passage) + (separator_tokens if selected else 0)
+        if cost <= remaining:
+            selected.append(passage)
+            remaining -= cost
+            continue
+        truncated = truncate_to_tokens(
+            passage, remaining - (separator_tokens if selected else 0)
+        )
+        if truncated:
+            selected.append(truncated)
+        break
+    return selected
+
+
+def _merge_matches(matches: List[Any]) -> List[Dict[str, Any]]:
+    # Consecutive chunks of the same page become one passage scored by its best
+    # chunk; chunks with IDs in another format stay passages of their own
+    groups: Dict[Any, List[Tuple[int, Any]]] = {}
+    for rank, match in enumerate(matches):
+        # Not every match object carries an ID
+        match_id = getattr(match, "id", None)
+        parsed = parse_chunk_id(match_id or "")
+        key = parsed[:2] if parsed else ("", match_id, rank)
+        groups.setdefault(key, []).append((parsed[2] if parsed else 0, rank, match))
+
+    passages = []
+    for chunks in groups.values():
+        chunks.sort(key=lambda chunk: chunk[0])
+        run = [chunks[0]]
+        for chunk in chunks[1:]:
+            if chunk[0] == run[-1][0] + 1:
+                run.append(chunk)
+            else:
+                passages.append(_passage(run))
+                run = [chunk]
+        passages.append(_passage(run))
+    # Most relevant first, ties broken by the original result order
+    passages.sort(key=lambda p: (-p["score"], p["rank"]))
+    return passages
+
+
+def _passage(run: List[Tuple[int, int, Any]]) -> Dict[str, Any]:
+    text = run[0][2].metadata["text"]
+    for _, _, match in run[1:]:
+        text = merge_overlapping(text, match.metadata["text"])
+    best = max(run, key=lambda chunk: getattr(chunk[2], "score", None) or 0.0)
+    return {
+        "text": text,
+        "score": getattr(best[2], "score", None) or 0.0,
+        "rank": min(chunk[1] for chunk in run),
+        "metadata": run[0][2].metadata,
+        "chunks": len(run),
+    }
+
+
+def assemble_professor_context(
+    matches: List[Any], token_budget: int
+) -> Dict[str, Any]:
+    """
+    Build the professor's-notes context from Pinecone matches.
+
+    Adjacent chunks of a page are merged with their overlap removed, sentences
+    already included are dropped, and passages are added by relevance until the
+    token budget is spent. Sources are listed once per file and page, for the
+    passages that made it into the context.
+
+    Args:
+        matches (List[Any]): Query matches with metadata, and optionally id and score.
+        token_budget (int): The maximum estimated tokens of context.
+
+    Returns:
+        Dict[str, Any]: "context_text" and "sources", as query_vector_db returns them.
+    """
+    seen: Set[str] = set()
+    passages = []
+    for passage in _merge_matches(matches):
+        text = dedupe_sentences(passage["text"], seen)
+        if text:
+            passages.append((text, passage["metadata"]))
+
+    selected = fill_budget((text for text, _ in passages), token_budget)
+    sources = []
+    for _, metadata in passages[: len(selected)]:
+        source = f"{metadata['source']} (Page {metadata.get('page', 'N/A')}) - {metadata.get('google_drive_link', 'No link available')}"
+        if source not in sources:
+            sources.append(source)
+
+    context_text = PASSAGE_SEPARATOR.join(selected)
+    log_event(
+        "context_assembly",
+        source="professor",
+        chunks=len(matches),
+        passages=len(selected),
+        input_tokens=sum(estimate_tokens(m.metadata["text"]) for m in matches),
+        output_tokens=estimate_tokens(context_text),
+    )
+    return {"context_text": context_text, "sources": sources}
+
+
+def _web_passages(context: str) -> List[str]:
+    # get_search_context returns a JSON list of {"url", "content"}, sometimes JSON
+    # encoded twice; anything else is used as plain text
+    try:
+        results = json.loads(context)
+        if isinstance(results, str):
+            results = json.loads(results)
+    except (TypeError, ValueError):
+        return [context]
+    if not isinstance(results, list):
+        return [context]
+    passages = []
+    for result in results:
+        if isinstance(result, dict):
+            content = str(result.get("content", ""))
+            url = result.get("url")
+            passages.append(f"Source: {url}\n{content}" if url else content)
+        else:
+            passages.append(str(result))
+    return passages
+
+
+def assemble_web_context(context: str, token_budget: int) -> str:
+    """
+    Cut the Tavily search context to a token budget.
+
+    Results are kept in Tavily's relevance order, re-serialised as plain text
+    instead of escaped JSON, with sentences repeated across results dropped.
+
+    Args:
+        context (str): The get_search_context result.
+        token_budget (int): The maximum estimated tokens of context.
+
+    Returns:
+        str: The assembled web context.
+    """
+    seen: Set[str] = set()
+    passages = [dedupe_sentences(passage, seen) for passage in _web_passages(context)]
+    assembled = PASSAGE_SEPARATOR.join(fill_budget(filter(None, passages), token_budget))
+    log_event(
+        "context_assembly",
+        source="web",
+        input_tokens=estimate_tokens(context),
+        output_tokens=estimate_tokens(assembled),
+    )
+    return assembled
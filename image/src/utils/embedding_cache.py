@@ -0,0 +1,212 @@
+# utils/embedding_cache.py
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any, Dict, List, Optional
+
+from utils.config import (
+    EMBEDDING_CACHE_MAX_SIZE,
+    EMBEDDING_CACHE_TTL_SECONDS,
+    EMBEDDING_CACHE_BACKEND,
+    EMBEDDING_CACHE_SQLITE_PATH,
+    EMBEDDING_CACHE_TABLE,
+    EMBEDDING_MODEL_ID,
+)
+from utils.embeddings import get_embedding_function
+from utils.clients import get_dynamodb_table
+from utils.lru_cache import TTLLRUCache
+from utils.metrics import upstream_call
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def cache_key(text: str, model_id: str) -> str:
+    return hashlib.sha256(
+        f"{model_id}\n{normalize_query(text)}".encode("utf-8")
+    ).hexdigest()
+
+
+def encode_embedding(embedding: List[float]) -> bytes:
+    return array("f", embedding).tobytes()
+
+
+def decode_embedding(data: bytes) -> List[float]:
+    values = array("f")
+    values.frombytes(bytes(data))
+    return values.tolist()
+
+
+class SQLiteEmbeddingStore:
+    """
+    Persistent embedding store in a local SQLite file, shared by every invocation of
+    a warm container. Also serves as the local stand-in for the DynamoDB store.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(cache_key TEXT PRIMARY KEY, embedding BLOB NOT NULL, expires_at INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT embedding, expires_at FROM embeddings WHERE cache_key = ?",
+                (key,),
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return decode_embedding(row[0])
+
+    def set(self, key: str, embedding: List[float]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                (key, encode_embedding(embedding), int(time.time()) + self.ttl_seconds),
+            )
+            self._conn.commit()
+
+
+class DynamoDBEmbeddingStore:
+    """
+    Persistent embedding store in a DynamoDB table keyed on cache_key, shared by all
+    containers. expires_at can be enabled as the table's TTL attribute.
+    """
+
+    def __init__(self, table: Any, ttl_seconds: int):
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> Optional[List[float]]:
+        item = self.table.get_item(Key={"cache_key": key}).get("Item")
+        if item is None or int(item["expires_at"]) < time.time():
+            return None
+        return decode_embedding(item["embedding"].value)
+
+    def set(self, key: str, embedding: List[float]) -> None:
+        self.table.put_item(
+            Item={
+                "cache_key": key,
+                "embedding": encode_embedding(embedding),
+                "expires_at": int(time.time()) + self.ttl_seconds,
+            }
+        )
+
+
+class QueryEmbeddingCache:
+    """
+    Two-tier cache of query embeddings keyed on normalized query text and model ID:
+    an in-process LRU tier in front of an optional persistent store.
+    """
+
+    def __init__(self, memory: TTLLRUCache, store: Optional[Any] = None):
+        self.memory = memory
+        self.store = store
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "persistent_hits": 0, "misses": 0}
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def get_or_embed(self, text: str, embedding_function: Any = None) -> List[float]:
+        model_id = getattr(embedding_function, "model_id", None) or EMBEDDING_MODEL_ID
+        key = cache_key(text, model_id)
+
+        embedding = self.memory.get(key)
+        if embedding is not None:
+            self._count("memory_hits")
+            return embedding
+
+        if self.store is not None:
+            try:
+                embedding = self.store.get(key)
+            except Exception as e:
+                logging.warning(f"Embedding cache lookup failed: {str(e)}")
+            if embedding is not None:
+                self._count("persistent_hits")
+                self.memory.set(key, embedding)
+                return embedding
+
+        self._count("misses")
+        if embedding_function is None:
+            embedding_function = get_embedding_function()
+        with upstream_call("bedrock", "embed_query") as call:
+            call["request_bytes"] = len(text.encode("utf-8"))
+            embedding = embedding_function.embed_query(text)
+        self.memory.set(key, embedding)
+        if self.store is not None:
+            try:
+                self.store.set(key, embedding)
+            except Exception as e:
+                logging.warning(f"Embedding cache write failed: {str(e)}")
+        return embedding
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = sum(counters.values())
+        hits = counters["memory_hits"] + counters["persistent_hits"]
+        counters.update(
+            {
+                "hits": hits,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self.memory),
+                "backend": type(self.store).__name__ if self.store else None,
+            }
+        )
+        return counters
+
+
+def _create_store() -> Optional[Any]:
+    try:
+        if EMBEDDING_CACHE_BACKEND == "sqlite":
+            return SQLiteEmbeddingStore(
+                EMBEDDING_CACHE_SQLITE_PATH, EMBEDDING_CACHE_TTL_SECONDS
+            )
+        if EMBEDDING_CACHE_BACKEND == "dynamodb":
+            table = get_dynamodb_table(EMBEDDING_CACHE_TABLE)
+            return DynamoDBEmbeddingStore(table, EMBEDDING_CACHE_TTL_SECONDS)
+    except Exception as e:
+        logging.error(f"Failed to open persistent embedding cache: {str(e)}")
+    return None
+
+
+_cache: Optional[QueryEmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryEmbeddingCache(
+                TTLLRUCache(EMBEDDING_CACHE_MAX_SIZE, EMBEDDING_CACHE_TTL_SECONDS),
+                _create_store(),
+            )
+        return _cache
+
+
+def embed_query_cached(text: str, embedding_function: Any = None) -> List[float]:
+    """
+    Embed a query, reusing a cached embedding of the same normalized text if there is one.
+
+    Args:
+        text (str): The query text.
+        embedding_function (Any): The embedding function to use on a miss.
+            Defaults to get_embedding_function(), which is only built on a miss.
+
+    Returns:
+        List[float]: The query embedding.
+    """
+    return get_query_embedding_cache().get_or_embed(text, embedding_function)
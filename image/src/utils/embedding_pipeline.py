@@ -0,0 +1,168 @@
+# utils/embedding_pipeline.py
+
+import logging
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+    TypeVar,
+)
+
+from utils.config import (
+    EMBEDDING_TASK_TEXTS,
+    EMBEDDING_MAX_CONCURRENCY,
+    EMBEDDING_MAX_RETRIES,
+    EMBEDDING_RETRY_BASE_DELAY,
+)
+from utils.metrics import upstream_call
+
+T = TypeVar("T")
+
+THROTTLING_MARKERS = (
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "Too many requests",
+    "Rate exceeded",
+)
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """
+    Check whether an error raised by the embedding client is a throttling error.
+
+    langchain-aws wraps botocore errors in a ValueError, so the error code is
+    looked up on the exception first and then in its message.
+
+    Args:
+        error (Exception): The raised exception.
+
+    Returns:
+        bool: True if the call should be retried after a backoff.
+    """
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        code = response.get("Error", {}).get("Code", "")
+        if code in THROTTLING_MARKERS:
+            return True
+    message = str(error)
+    return any(marker in message for marker in THROTTLING_MARKERS)
+
+
+def embed_batch_with_retry(
+    embedding_function: Any,
+    texts: List[str],
+    max_retries: int = EMBEDDING_MAX_RETRIES,
+    base_delay: float = EMBEDDING_RETRY_BASE_DELAY,
+) -> List[List[float]]:
+    """
+    Embed a batch of texts, retrying throttled calls with exponential backoff and jitter.
+
+    Args:
+        embedding_function (Any): An object with an embed_documents method.
+        texts (List[str]): The texts to embed.
+        max_retries (int): Maximum number of retries for a throttled batch.
+        base_delay (float): Delay in seconds before the first retry.
+
+    Returns:
+        List[List[float]]: One embedding per text, in input order.
+    """
+    with upstream_call("bedrock", "embed_documents", texts=len(texts)) as call:
+        call["request_bytes"] = sum(len(text.encode("utf-8")) for text in texts)
+        attempt = 0
+        while True:
+            try:
+                return embedding_function.embed_documents(texts)
+            except Exception as e:
+                if attempt >= max_retries or not is_throttling_error(e):
+                    raise
+                delay = base_delay * (2**attempt) * (1 + random.random())
+                logging.warning(
+                    f"Embedding batch throttled, retrying in {delay:.2f}s "
+                    f"(attempt {attempt + 1}/{max_retries})"
+                )
+                time.sleep(delay)
+                attempt += 1
+                call["retries"] = attempt
+
+
+def iter_embedded_items(
+    items: Iterable[T],
+    embedding_function: Any,
+    text_of: Callable[[T], str] = lambda item: item,
+    texts_per_task: int = EMBEDDING_TASK_TEXTS,
+    max_concurrency: int = EMBEDDING_MAX_CONCURRENCY,
+    max_retries: int = EMBEDDING_MAX_RETRIES,
+) -> Iterator[Tuple[List[T], List[List[float]]]]:
+    """
+    Embed items in tasks on a bounded thread pool and yield the results in input order.
+
+    Each task passes texts_per_task items to one embed_documents call. Titan makes
+    one Bedrock request per text, so a task is not a single request: the speed-up
+    comes from running max_concurrency tasks at once, and texts_per_task only
+    bounds the work in flight. Items are pulled from the iterable only as tasks
+    are submitted, so a generator of items is never materialised and a slow
+    consumer applies back-pressure instead of letting embeddings pile up in memory.
+
+    Args:
+        items (Iterable[T]): The items to embed, e.g. texts or document chunks.
+        embedding_function (Any): An object with an embed_documents method.
+        text_of (Callable[[T], str]): Returns the text to embed for an item.
+        texts_per_task (int): Number of items per embed_documents call.
+        max_concurrency (int): Maximum number of tasks run concurrently.
+        max_retries (int): Maximum number of retries for a throttled task.
+
+    Yields:
+        Tuple[List[T], List[List[float]]]: A batch of items and their embeddings.
+    """
+    texts_per_task = max(1, texts_per_task)
+    max_concurrency = max(1, max_concurrency)
+    items = iter(items)
+
+    with ThreadPoolExecutor(
+        max_workers=max_concurrency, thread_name_prefix="embedding"
+    ) as executor:
+        in_flight = deque()
+
+        def submit_next() -> bool:
+            batch = list(islice(items, texts_per_task))
+            if not batch:
+                return False
+            in_flight.append(
+                (
+                    batch,
+                    executor.submit(
+                        embed_batch_with_retry,
+                        embedding_function,
+                        [text_of(item) for item in batch],
+                        max_retries,
+                    ),
+                )
+            )
+            return True
+
+        while len(in_flight) < max_concurrency and submit_next():
+            pass
+
+        while in_flight:
+            batch, future = in_flight.popleft()
+            embeddings = future.result()
+            submit_next()
+            yield batch, embeddings
+
+
+def embedding_throughput(chunks: int, seconds: float) -> Dict[str, Any]:
+    return {
+        "chunks": chunks,
+        "seconds": round(seconds, 3),
+        "chunks_per_second": round(chunks / seconds, 2) if seconds > 0 else 0.0,
+    }
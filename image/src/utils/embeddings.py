@@ -1,12 +1,12 @@
 from typing import Any
-from langchain_aws import BedrockEmbeddings
+from utils.clients import get_embedding_model
 
 
 def get_embedding_function() -> Any:
     """
-    Returns an instance of BedrockEmbeddings.
+    Returns the shared BedrockEmbeddings instance of this container.
 
     Returns:
         Any: An instance of BedrockEmbeddings.
     """
-    return BedrockEmbeddings()
+    return get_embedding_model()
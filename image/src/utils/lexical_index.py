@@ -0,0 +1,509 @@
+# utils/lexical_index.py
+
+import io
+import json
+import logging
+import math
+import re
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from botocore.exceptions import ClientError
+
+from utils.checkpoint_store import delete_lexical_shard, load_lexical_shard
+from utils.clients import get_s3_client
+from utils.config import (
+    INGESTION_MAX_WORKERS,
+    LEXICAL_INDEX_PREFIX,
+    LEXICAL_INDEX_REFRESH_SECONDS,
+    LEXICAL_SHARD_PREFIX,
+    LEXICAL_SHARD_SPOOL_MAX_MEMORY_MB,
+    PDF_SPOOL_DIR,
+    RRF_K,
+    S3_BUCKET,
+    TEACHER_CONFIG,
+)
+from utils.lru_cache import TTLLRUCache
+from utils.metrics import log_event
+
+# Words and numbers, so names, years and course codes ("ECE 2524", "1969") match
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he her his in is it its of on or "
+    "she that the their them they this to was were which who will with".split()
+)
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Term frequencies are stored as uint16
+MAX_TERM_FREQUENCY = 65535
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.casefold()) if t not in STOPWORDS]
+
+
+def term_counts(text: str) -> Dict[str, int]:
+    """
+    Count the indexed terms of a chunk, as stored in its file's lexical shard.
+
+    Args:
+        text (str): The chunk text.
+
+    Returns:
+        Dict[str, int]: Term frequencies.
+    """
+    return dict(Counter(tokenize(text)))
+
+
+class LexicalShardWriter:
+    """
+    Writes the term counts of a PDF's chunks as JSON lines to a spooled temporary
+    file as they are extracted, so a shard never has to be held in memory whole.
+
+    Usable as a context manager; the file is removed on close.
+    """
+
+    def __init__(self, max_memory_mb: int = LEXICAL_SHARD_SPOOL_MAX_MEMORY_MB):
+        self.file = tempfile.SpooledTemporaryFile(
+            max_size=max_memory_mb * 1024 * 1024, dir=PDF_SPOOL_DIR
+        )
+        self.chunks = 0
+
+    def add(self, chunk_id: str, text: str) -> None:
+        entry = {"id": chunk_id, "terms": term_counts(text)}
+        self.file.write(json.dumps(entry).encode("utf-8") + b"\n")
+        self.chunks += 1
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "LexicalShardWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def source_of(chunk_id: str) -> str:
+    """Return the file a chunk ID ("filename:page:idx") belongs to."""
+    return chunk_id.rsplit(":", 2)[0]
+
+
+def _join(strings: List[str]) -> np.ndarray:
+    return np.frombuffer("\n".join(strings).encode("utf-8"), dtype=np.uint8)
+
+
+def _split(array: np.ndarray) -> List[str]:
+    text = array.tobytes().decode("utf-8")
+    return text.split("\n") if text else []
+
+
+class LexicalIndex:
+    """
+    BM25 index over one teacher's chunks, held in flat NumPy arrays.
+
+    Postings of each term are contiguous slices of postings_docs/postings_tf, found
+    through offsets, so a query is a few vectorized slice updates of a score array
+    with one entry per chunk. Serialised as a compressed .npz with the vocabulary
+    and chunk IDs stored as newline-joined UTF-8 bytes.
+    """
+
+    def __init__(
+        self,
+        doc_ids: List[str],
+        doc_lengths: np.ndarray,
+        terms: List[str],
+        offsets: np.ndarray,
+        postings_docs: np.ndarray,
+        postings_tf: np.ndarray,
+    ):
+        self.doc_ids = doc_ids
+        self.doc_lengths = doc_lengths
+        self.terms = terms
+        self.offsets = offsets
+        self.postings_docs = postings_docs
+        self.postings_tf = postings_tf
+        self._term_ids = {term: i for i, term in enumerate(terms)}
+        average_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+        self._length_norm = (
+            BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths / average_length)
+            if average_length
+            else np.full(len(doc_lengths), BM25_K1, dtype=np.float32)
+        ).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def files(self) -> Set[str]:
+        """Return the names of the files whose chunks are in the index."""
+        return {source_of(chunk_id) for chunk_id in self.doc_ids}
+
+    @classmethod
+    def build(cls, chunk_terms: Dict[str, Dict[str, int]]) -> "LexicalIndex":
+        """
+        Build an index from the term counts of every chunk.
+
+        Args:
+            chunk_terms (Dict[str, Dict[str, int]]): Chunk ID -> term frequencies.
+
+        Returns:
+            LexicalIndex: The index.
+        """
+        empty = cls(
+            [],
+            np.zeros(0, dtype=np.uint32),
+            [],
+            np.zeros(1, dtype=np.int64),
+            np.zeros(0, dtype=np.uint32),
+            np.zeros(0, dtype=np.uint16),
+        )
+        return empty.replace_files((), chunk_terms)
+
+    def replace_files(
+        self, pdf_keys: Iterable[str], chunk_terms: Dict[str, Dict[str, int]]
+    ) -> "LexicalIndex":
+        """
+        Return a new index without the chunks of some files, plus new chunks.
+
+        The postings of the chunks kept are carried over as arrays rather than
+        recounted, so an update costs little more than counting the chunks added.
+
+        Args:
+            pdf_keys (Iterable[str]): Files whose chunks to drop.
+            chunk_terms (Dict[str, Dict[str, int]]): Chunk ID -> term frequencies
+                of the chunks to add, none of which may be kept from this index.
+
+        Returns:
+            LexicalIndex: The new index.
+        """
+        pdf_keys = set(pdf_keys)
+        keep = np.fromiter(
+            (source_of(chunk_id) not in pdf_keys for chunk_id in self.doc_ids),
+            dtype=bool,
+            count=len(self.doc_ids),
+        )
+        doc_ids = [chunk_id for chunk_id, kept in zip(self.doc_ids, keep) if kept]
+        added = sorted(chunk_terms)
+        doc_lengths = np.concatenate(
+            [
+                self.doc_lengths[keep].astype(np.uint32),
+                np.array(
+                    [sum(chunk_terms[chunk_id].values()) for chunk_id in added],
+                    dtype=np.uint32,
+                ),
+            ]
+        )
+
+        # Kept postings, with chunks renumbered past the dropped ones
+        posting_terms = np.repeat(np.arange(len(self.terms)), np.diff(self.offsets))
+        kept_postings = keep[self.postings_docs]
+        kept_terms = posting_terms[kept_postings]
+        renumbered = np.cumsum(keep) - 1
+        kept_docs = renumbered[self.postings_docs[kept_postings]]
+        kept_tf = self.postings_tf[kept_postings]
+
+        added_terms, added_docs, added_tf = [], [], []
+        for doc, chunk_id in enumerate(added, start=len(doc_ids)):
+            for term, tf in chunk_terms[chunk_id].items():
+                added_terms.append(term)
+                added_docs.append(doc)
+                added_tf.append(min(tf, MAX_TERM_FREQUENCY))
+        doc_ids.extend(added)
+
+        used_term_ids = np.unique(kept_terms)
+        terms = sorted({self.terms[i] for i in used_term_ids} | set(added_terms))
+        term_ids = {term: i for i, term in enumerate(terms)}
+        old_to_new = np.full(len(self.terms), -1, dtype=np.int64)
+        old_to_new[used_term_ids] = [term_ids[self.terms[i]] for i in used_term_ids]
+
+        all_terms = np.concatenate(
+            [
+                old_to_new[kept_terms],
+                np.array([term_ids[term] for term in added_terms], dtype=np.int64),
+            ]
+        )
+        all_docs = np.concatenate(
+            [kept_docs.astype(np.int64), np.array(added_docs, dtype=np.int64)]
+        )
+        all_tf = np.concatenate([kept_tf, np.array(added_tf, dtype=np.uint16)])
+        order = np.lexsort((all_docs, all_terms))
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(all_terms, minlength=len(terms)), out=offsets[1:])
+        return LexicalIndex(
+            doc_ids,
+            doc_lengths,
+            terms,
+            offsets,
+            all_docs[order].astype(np.uint32),
+            all_tf[order].astype(np.uint16),
+        )
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            doc_ids=_join(self.doc_ids),
+            doc_lengths=self.doc_lengths,
+            terms=_join(self.terms),
+            offsets=self.offsets,
+            postings_docs=self.postings_docs,
+            postings_tf=self.postings_tf,
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "LexicalIndex":
+        with np.load(io.BytesIO(data)) as arrays:
+            return cls(
+                _split(arrays["doc_ids"]),
+                arrays["doc_lengths"],
+                _split(arrays["terms"]),
+                arrays["offsets"],
+                arrays["postings_docs"],
+                arrays["postings_tf"],
+            )
+
+    def search(self, query: str, top_k: int) -> List[Tuple[str, float]]:
+        """
+        Rank chunks against a query with BM25.
+
+        Args:
+            query (str): The query text.
+            top_k (int): The maximum number of results.
+
+        Returns:
+            List[Tuple[str, float]]: (chunk ID, score), best first.
+        """
+        count = len(self.doc_ids)
+        if not count or top_k <= 0:
+            return []
+        scores = np.zeros(count, dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.postings_docs[start:end]
+            tf = self.postings_tf[start:end].astype(np.float32)
+            df = end - start
+            idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+            scores[docs] += idf * tf * (BM25_K1 + 1) / (tf + self._length_norm[docs])
+
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        top_k = min(top_k, len(matched))
+        top = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.doc_ids[doc], float(scores[doc])) for doc in top]
+
+
+EMPTY_INDEX = LexicalIndex.build({})
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[List[str]], k: int = RRF_K
+) -> List[Tuple[str, float]]:
+    """
+    Fuse ranked ID lists by reciprocal rank: each list adds 1 / (k + rank).
+
+    Args:
+        rankings (Iterable[List[str]]): ID lists, best first.
+        k (int): The rank constant; larger values flatten the contribution of rank.
+
+    Returns:
+        List[Tuple[str, float]]: (ID, fused score), best first. Ties keep the order
+        in which IDs were first seen.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+def _index_key(teacher_name: str) -> str:
+    return f"{LEXICAL_INDEX_PREFIX}{teacher_name}.npz"
+
+
+def _fetch_index(teacher_name: str) -> Optional[LexicalIndex]:
+    try:
+        response = get_s3_client().get_object(Bucket=S3_BUCKET, Key=_index_key(teacher_name))
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+            return None
+        raise
+    return LexicalIndex.from_bytes(response["Body"].read())
+
+
+def _load_index(teacher_name: str) -> LexicalIndex:
+    try:
+        return _fetch_index(teacher_name) or EMPTY_INDEX
+    except Exception as e:
+        logging.error(f"Failed to load lexical index of {teacher_name}: {str(e)}")
+    return EMPTY_INDEX
+
+
+def _store_index(teacher_name: str, index: LexicalIndex) -> int:
+    data = index.to_bytes()
+    get_s3_client().put_object(
+        Bucket=S3_BUCKET,
+        Key=_index_key(teacher_name),
+        Body=data,
+        ContentType="application/octet-stream",
+    )
+    _indexes.set(teacher_name, index)
+    return len(data)
+
+
+_indexes = TTLLRUCache(max(1, len(TEACHER_CONFIG)), LEXICAL_INDEX_REFRESH_SECONDS)
+
+
+def get_lexical_index(teacher_name: str) -> LexicalIndex:
+    """
+    Return the teacher's lexical index, loading it from S3 once per refresh interval.
+
+    A teacher without an index yet gets an empty one, so retrieval falls back to
+    vector results alone.
+    """
+    index = _indexes.get(teacher_name)
+    if index is None:
+        index = _load_index(teacher_name)
+        _indexes.set(teacher_name, index)
+    return index
+
+
+def lexical_search(teacher_name: str, query: str, top_k: int) -> List[Tuple[str, float]]:
+    start = time.perf_counter()
+    results = get_lexical_index(teacher_name).search(query, top_k)
+    log_event(
+        "lexical_search",
+        teacher=teacher_name,
+        results=len(results),
+        duration_ms=round((time.perf_counter() - start) * 1000, 3),
+    )
+    return results
+
+
+def list_lexical_shards(teacher_name: str) -> Set[str]:
+    """Return the names of the files of a teacher that have a lexical shard."""
+    from utils.s3_handler import list_objects_concurrently
+
+    prefix = f"{LEXICAL_SHARD_PREFIX}{teacher_name}/"
+    return {
+        obj["Key"][len(prefix) : -len(".jsonl")]
+        for obj in list_objects_concurrently(prefix)
+        if obj["Key"].endswith(".jsonl")
+    }
+
+
+def _load_shards(
+    teacher_name: str, pdf_keys: Iterable[str], max_workers: Optional[int]
+) -> Dict[str, Dict[str, int]]:
+    chunk_terms: Dict[str, Dict[str, int]] = {}
+    with ThreadPoolExecutor(
+        max_workers=max_workers or INGESTION_MAX_WORKERS, thread_name_prefix="lexical"
+    ) as executor:
+        for shard in executor.map(
+            lambda pdf_key: load_lexical_shard(teacher_name, pdf_key), pdf_keys
+        ):
+            if shard:
+                chunk_terms.update(shard)
+    return chunk_terms
+
+
+def rebuild_lexical_index(
+    teacher_name: str,
+    available_pdf_keys: Optional[Iterable[str]] = None,
+    max_workers: Optional[int] = None,
+) -> LexicalIndex:
+    """
+    Merge every per-file shard of a teacher into one index and store it in S3.
+
+    Args:
+        teacher_name (str): The teacher whose index to rebuild.
+        available_pdf_keys (Optional[Iterable[str]]): The files currently in S3.
+            When given, shards of any other file are left out and deleted.
+        max_workers (Optional[int]): Concurrent shard downloads. Defaults to
+            INGESTION_MAX_WORKERS.
+
+    Returns:
+        LexicalIndex: The new index, also installed in this container's cache.
+    """
+    start = time.perf_counter()
+    shards = list_lexical_shards(teacher_name)
+    removed = set()
+    if available_pdf_keys is not None:
+        removed = shards - set(available_pdf_keys)
+
+    index = LexicalIndex.build(
+        _load_shards(teacher_name, sorted(shards - removed), max_workers)
+    )
+    size = _store_index(teacher_name, index)
+    for pdf_key in removed:
+        delete_lexical_shard(teacher_name, pdf_key)
+    logging.info(
+        f"Rebuilt lexical index of {teacher_name} from {len(shards - removed)} files "
+        f"({len(removed)} removed): {len(index)} chunks, {len(index.terms)} terms, "
+        f"{size} bytes in {time.perf_counter() - start:.2f}s"
+    )
+    return index
+
+
+def update_lexical_index(
+    teacher_name: str,
+    changed_pdf_keys: Iterable[str],
+    available_pdf_keys: Iterable[str],
+    max_workers: Optional[int] = None,
+) -> LexicalIndex:
+    """
+    Bring a teacher's stored index up to date after an ingestion run.
+
+    Only the shards of the files that changed, and of any file whose shard is not
+    in the index yet (e.g. after a failed update), are downloaded; the chunks of
+    every other file are carried over from the stored index. Files no longer in S3
+    are dropped and their shards deleted. Without a stored index, this is a full
+    rebuild.
+
+    Args:
+        teacher_name (str): The teacher whose index to update.
+        changed_pdf_keys (Iterable[str]): Files ingested in this run.
+        available_pdf_keys (Iterable[str]): The files currently in S3.
+        max_workers (Optional[int]): Concurrent shard downloads. Defaults to
+            INGESTION_MAX_WORKERS.
+
+    Returns:
+        LexicalIndex: The updated index, also installed in this container's cache.
+    """
+    start = time.perf_counter()
+    index = _fetch_index(teacher_name)
+    if index is None:
+        return rebuild_lexical_index(teacher_name, available_pdf_keys, max_workers)
+
+    available = set(available_pdf_keys)
+    changed = set(changed_pdf_keys)
+    shards = list_lexical_shards(teacher_name)
+    indexed = index.files()
+    removed = (shards | indexed) - available
+    to_load = ((changed | (shards - indexed)) & shards) - removed
+    replaced = removed | changed | to_load
+    if not replaced:
+        _indexes.set(teacher_name, index)
+        return index
+
+    index = index.replace_files(
+        replaced, _load_shards(teacher_name, sorted(to_load), max_workers)
+    )
+    size = _store_index(teacher_name, index)
+    for pdf_key in removed & shards:
+        delete_lexical_shard(teacher_name, pdf_key)
+    logging.info(
+        f"Updated lexical index of {teacher_name}: {len(to_load)} files loaded, "
+        f"{len(removed)} removed; {len(index)} chunks, {len(index.terms)} terms, "
+        f"{size} bytes in {time.perf_counter() - start:.2f}s"
+    )
+    return index
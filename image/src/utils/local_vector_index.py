@@ -0,0 +1,357 @@
+# utils/local_vector_index.py
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+# Rows are added to the matrix file in steps of at least this many vectors
+MIN_CAPACITY = 1024
+# float16 rows are scored in blocks of this many (6 MB of float32 at 1536
+# dimensions), each decoded to float32 in turn
+SCORE_BLOCK_ROWS = 1024
+
+
+def matches_filter(metadata: Dict[str, Any], query_filter: Dict[str, Any]) -> bool:
+    """
+    Evaluate a Pinecone metadata filter against one vector's metadata.
+
+    Supports $and, $or, $eq, $ne, $in, $nin, $exists and the {"field": value}
+    shorthand for $eq.
+    """
+    for key, condition in query_filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, f) for f in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_filter(metadata, f) for f in condition):
+                return False
+            continue
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        present = key in metadata
+        value = metadata.get(key)
+        for op, operand in condition.items():
+            if op == "$exists":
+                ok = present == operand
+            elif op == "$eq":
+                ok = present and value == operand
+            elif op == "$ne":
+                ok = value != operand
+            elif op == "$in":
+                ok = present and value in operand
+            elif op == "$nin":
+                ok = value not in operand
+            else:
+                raise ValueError(f"Unsupported filter operator {op}")
+            if not ok:
+                return False
+    return True
+
+
+class LocalVectorIndex:
+    """
+    Exact-search vector index kept on local disk, with the subset of the Pinecone
+    Index API this app uses: query, fetch, upsert, list, delete, update and
+    describe_index_stats.
+
+    Vectors are L2-normalized and stored as rows of a memory-mapped .npy matrix, so
+    scores are cosine similarities and a query is one matrix-vector product over
+    the whole index. float16 storage halves the file and the pages it keeps
+    resident. NumPy has no fast float16 matmul, so queries decode it to float32
+    one block of rows at a time straight from the memory map; that decoding makes
+    float16 queries several times slower than float32 ones.
+    IDs and metadata live in a SQLite file next to the matrix. Deletes move the
+    last row into the freed slot, so the matrix stays dense.
+
+    Writes are serialized by a lock; concurrent processes must not write to the
+    same directory. With read_only, an existing index (e.g. a snapshot baked into a
+    read-only image) is opened without creating or modifying any file, and every
+    write raises PermissionError.
+    """
+
+    def __init__(self, path: str, dtype: str = "float32", read_only: bool = False):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.read_only = read_only
+        self._lock = threading.RLock()
+        self._matrix_path = os.path.join(path, "vectors.npy")
+        db_path = os.path.join(path, "metadata.sqlite3")
+        if read_only:
+            if not os.path.exists(db_path):
+                raise FileNotFoundError(f"No local vector index at {path}")
+            # immutable: no locks or journal files are created next to the snapshot
+            self._db = sqlite3.connect(
+                f"file:{db_path}?mode=ro&immutable=1", uri=True, check_same_thread=False
+            )
+        else:
+            os.makedirs(path, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS vectors ("
+                "id TEXT PRIMARY KEY, row INTEGER NOT NULL UNIQUE, metadata TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        for vector_id, row in self._db.execute("SELECT id, row FROM vectors ORDER BY row"):
+            self._rows[vector_id] = row
+            self._ids.append(vector_id)
+
+        self._matrix = None
+        if os.path.exists(self._matrix_path):
+            self._open_matrix()
+            if self._matrix.dtype != self.dtype:
+                logging.warning(
+                    f"Local index {path} is stored as {self._matrix.dtype}, not {self.dtype}"
+                )
+                self.dtype = self._matrix.dtype
+
+    @property
+    def dimension(self) -> Optional[int]:
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise PermissionError(f"Local vector index {self.path} is read-only")
+
+    def _open_matrix(self) -> None:
+        self._matrix = np.load(self._matrix_path, mmap_mode="r" if self.read_only else "r+")
+
+    def _ensure_capacity(self, rows: int, dimension: int) -> None:
+        if self._matrix is not None:
+            if self._matrix.shape[1] != dimension:
+                raise ValueError(
+                    f"Vector dimension {dimension} does not match index dimension {self._matrix.shape[1]}"
+                )
+            if rows <= self._matrix.shape[0]:
+                return
+        capacity = max(MIN_CAPACITY, rows, 2 * (0 if self._matrix is None else self._matrix.shape[0]))
+        # Grow by writing a larger file beside the old one and swapping it in
+        tmp_path = self._matrix_path + ".tmp.npy"
+        grown = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=self.dtype, shape=(capacity, dimension)
+        )
+        if self._matrix is not None:
+            grown[: len(self._ids)] = self._matrix[: len(self._ids)]
+        grown.flush()
+        del grown
+        self._matrix = None
+        os.replace(tmp_path, self._matrix_path)
+        self._open_matrix()
+
+    @staticmethod
+    def _normalize(values: Any) -> np.ndarray:
+        vector = np.asarray(values, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _set_row(self, row: int, vector: np.ndarray) -> None:
+        self._matrix[row] = vector
+
+    def _values(self, row: int) -> List[float]:
+        return self._matrix[row].astype(np.float32).tolist()
+
+    def _scores(self, vector: np.ndarray, count: int) -> np.ndarray:
+        if self._matrix.dtype == np.float32:
+            return self._matrix[:count] @ vector
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, SCORE_BLOCK_ROWS):
+            end = min(start + SCORE_BLOCK_ROWS, count)
+            scores[start:end] = self._matrix[start:end].astype(np.float32) @ vector
+        return scores
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> SimpleNamespace:
+        """
+        Return the top_k vectors by cosine similarity, optionally filtered by metadata.
+
+        Args:
+            vector (List[float]): The query vector.
+            top_k (int): The number of matches to return.
+            include_metadata (bool): Whether to return metadata with each match.
+            include_values (bool): Whether to return vector values with each match.
+            filter (Optional[Dict[str, Any]]): A Pinecone metadata filter.
+
+        Returns:
+            SimpleNamespace: With "matches", each having id, score, values and metadata.
+        """
+        with self._lock:
+            count = len(self._ids)
+            if count == 0 or top_k <= 0:
+                return SimpleNamespace(matches=[])
+            scores = self._scores(self._normalize(vector), count)
+            if filter:
+                # Filtered queries are admin paths; the metadata is scanned in full
+                allowed = np.zeros(count, dtype=bool)
+                for row, metadata in self._db.execute("SELECT row, metadata FROM vectors"):
+                    allowed[row] = matches_filter(json.loads(metadata), filter)
+                scores = np.where(allowed, scores, -np.inf)
+                top_k = min(top_k, int(allowed.sum()))
+            top_k = min(top_k, count)
+            if top_k == 0:
+                return SimpleNamespace(matches=[])
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+
+            metadata_by_row = {}
+            if include_metadata:
+                rows = [int(row) for row in top]
+                placeholders = ",".join("?" * len(rows))
+                metadata_by_row = {
+                    row: json.loads(metadata)
+                    for row, metadata in self._db.execute(
+                        f"SELECT row, metadata FROM vectors WHERE row IN ({placeholders})",
+                        rows,
+                    )
+                }
+            matches = [
+                SimpleNamespace(
+                    id=self._ids[row],
+                    score=float(scores[row]),
+                    values=self._values(row) if include_values else [],
+                    metadata=metadata_by_row.get(int(row)) if include_metadata else None,
+                )
+                for row in top
+            ]
+        return SimpleNamespace(matches=matches)
+
+    def fetch(self, ids: List[str], **kwargs: Any) -> SimpleNamespace:
+        """
+        Look up vectors by ID. Unknown IDs are left out.
+
+        Returns:
+            SimpleNamespace: With "vectors", a dict of ID -> id, values and metadata.
+        """
+        with self._lock:
+            if not ids:
+                return SimpleNamespace(vectors={})
+            placeholders = ",".join("?" * len(ids))
+            vectors = {
+                vector_id: SimpleNamespace(
+                    id=vector_id,
+                    values=self._values(row),
+                    metadata=json.loads(metadata),
+                )
+                for vector_id, row, metadata in self._db.execute(
+                    f"SELECT id, row, metadata FROM vectors WHERE id IN ({placeholders})",
+                    list(ids),
+                )
+            }
+        return SimpleNamespace(vectors=vectors)
+
+    def upsert(self, vectors: List[Any], **kwargs: Any) -> Dict[str, int]:
+        """
+        Insert or overwrite vectors given as {"id", "values", "metadata"} dicts or
+        (id, values, metadata) tuples.
+        """
+        self._check_writable()
+        records = []
+        for vector in vectors:
+            if isinstance(vector, dict):
+                records.append((vector["id"], vector["values"], vector.get("metadata") or {}))
+            else:
+                records.append((vector[0], vector[1], vector[2] if len(vector) > 2 else {}))
+        if not records:
+            return {"upserted_count": 0}
+
+        with self._lock:
+            new_ids = {vector_id for vector_id, _, _ in records if vector_id not in self._rows}
+            self._ensure_capacity(len(self._ids) + len(new_ids), len(records[0][1]))
+            rows = []
+            for vector_id, values, metadata in records:
+                row = self._rows.get(vector_id)
+                if row is None:
+                    row = len(self._ids)
+                    self._rows[vector_id] = row
+                    self._ids.append(vector_id)
+                self._set_row(row, self._normalize(values))
+                rows.append((vector_id, row, json.dumps(metadata, separators=(",", ":"))))
+            self._matrix.flush()
+            self._db.executemany(
+                "INSERT OR REPLACE INTO vectors (id, row, metadata) VALUES (?, ?, ?)", rows
+            )
+            self._db.commit()
+        return {"upserted_count": len(records)}
+
+    def list(self, prefix: str = "", limit: int = 100) -> Iterator[List[str]]:
+        """Yield pages of up to limit IDs starting with prefix, in ID order."""
+        with self._lock:
+            ids = [
+                vector_id
+                for (vector_id,) in self._db.execute(
+                    "SELECT id FROM vectors WHERE id >= ? AND id < ? ORDER BY id",
+                    (prefix, prefix + "\U0010ffff"),
+                )
+            ]
+        for start in range(0, len(ids), limit):
+            yield ids[start : start + limit]
+
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False, **kwargs: Any) -> None:
+        self._check_writable()
+        with self._lock:
+            if delete_all:
+                ids = list(self._ids)
+            for vector_id in ids or []:
+                row = self._rows.pop(vector_id, None)
+                if row is None:
+                    continue
+                self._db.execute("DELETE FROM vectors WHERE id = ?", (vector_id,))
+                last = len(self._ids) - 1
+                if row != last:
+                    moved_id = self._ids[last]
+                    self._set_row(row, self._matrix[last])
+                    self._ids[row] = moved_id
+                    self._rows[moved_id] = row
+                    self._db.execute(
+                        "UPDATE vectors SET row = ? WHERE id = ?", (row, moved_id)
+                    )
+                self._ids.pop()
+            if self._matrix is not None:
+                self._matrix.flush()
+            self._db.commit()
+
+    def update(
+        self,
+        id: str,
+        values: Optional[List[float]] = None,
+        set_metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._check_writable()
+        with self._lock:
+            row = self._rows.get(id)
+            if row is None:
+                return
+            if values is not None:
+                self._set_row(row, self._normalize(values))
+                self._matrix.flush()
+            if set_metadata:
+                (metadata,) = self._db.execute(
+                    "SELECT metadata FROM vectors WHERE id = ?", (id,)
+                ).fetchone()
+                metadata = json.loads(metadata)
+                metadata.update(set_metadata)
+                self._db.execute(
+                    "UPDATE vectors SET metadata = ? WHERE id = ?",
+                    (json.dumps(metadata, separators=(",", ":")), id),
+                )
+                self._db.commit()
+
+    def describe_index_stats(self, **kwargs: Any) -> Dict[str, Any]:
+        with self._lock:
+            return {"dimension": self.dimension, "total_vector_count": len(self._ids)}
@@ -0,0 +1,50 @@
+# utils/lru_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+class TTLLRUCache:
+    """
+    Thread-safe in-process LRU cache with a size cap and optional per-entry TTL.
+
+    Entries past their TTL are treated as missing and dropped on access.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: Optional[float] = None):
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            if self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,63 @@
+# utils/metadata_updates.py
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from utils.config import METADATA_UPDATE_MAX_CONCURRENCY, UPSERT_MAX_RETRIES
+
+
+def update_metadata(
+    index: Any,
+    ids: List[str],
+    metadata: Dict[str, Any],
+    max_concurrency: int = METADATA_UPDATE_MAX_CONCURRENCY,
+    max_retries: int = UPSERT_MAX_RETRIES,
+) -> int:
+    """
+    Set metadata fields on many vectors without sending or fetching their values.
+
+    Pinecone updates one vector per request, so the updates run on a bounded
+    thread pool. Failed updates are retried with exponential backoff; the first
+    error is raised once every other update has finished.
+
+    Args:
+        index (Any): The Pinecone index.
+        ids (List[str]): The IDs of the vectors to update.
+        metadata (Dict[str, Any]): The metadata fields to set.
+        max_concurrency (int): Maximum number of concurrent update requests.
+        max_retries (int): Maximum number of retries for a failed update.
+
+    Returns:
+        int: The number of vectors updated.
+    """
+    errors = []
+    lock = threading.Lock()
+
+    def update_one(vector_id: str) -> bool:
+        attempt = 0
+        while True:
+            try:
+                index.update(id=vector_id, set_metadata=metadata)
+                return True
+            except Exception as e:
+                if attempt >= max_retries:
+                    logging.error(
+                        f"Metadata update of {vector_id} failed after {attempt + 1} attempts: {str(e)}"
+                    )
+                    with lock:
+                        errors.append(e)
+                    return False
+                time.sleep(0.5 * (2**attempt))
+                attempt += 1
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, max_concurrency), thread_name_prefix="metadata-update"
+    ) as executor:
+        updated = sum(executor.map(update_one, ids))
+
+    if errors:
+        raise errors[0]
+    return updated
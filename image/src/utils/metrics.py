@@ -0,0 +1,371 @@
+# utils/metrics.py
+
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from utils.config import METRICS_LOG_EVENTS, TEACHER_CONFIG
+
+# Upper bounds in seconds, from a cache hit to a slow LLM call
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# {"trace_id": ..., "teacher": ...} of the request being served. The dict is shared,
+# not copied, by the tasks and threads a request fans out to, so a teacher set by a
+# route is also seen by the middleware that records the request.
+_trace: contextvars.ContextVar[Optional[Dict[str, Optional[str]]]] = (
+    contextvars.ContextVar("trace", default=None)
+)
+
+logger = logging.getLogger("metrics")
+logger.setLevel(logging.INFO)
+
+LabelValues = Tuple[str, ...]
+
+
+class Histogram:
+    """Thread-safe Prometheus-style histogram with cumulative buckets per label set."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._series: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # One count per bucket, then +Inf count and sum
+                series = [0] * len(LATENCY_BUCKETS) + [0, 0.0]
+                self._series[label_values] = series
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for label_values, values in sorted(series.items()):
+            labels = _format_labels(self.label_names, label_values)
+            for bound, count in zip(LATENCY_BUCKETS, values):
+                bucket_labels = _format_labels(
+                    self.label_names + ("le",), label_values + (str(bound),)
+                )
+                yield f"{self.name}_bucket{bucket_labels} {count}"
+            inf_labels = _format_labels(
+                self.label_names + ("le",), label_values + ("+Inf",)
+            )
+            yield f"{self.name}_bucket{inf_labels} {values[-2]}"
+            yield f"{self.name}_count{labels} {values[-2]}"
+            yield f"{self.name}_sum{labels} {values[-1]}"
+
+
+class Counter:
+    """Thread-safe Prometheus-style counter per label set."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float, *label_values: str) -> None:
+        if not amount:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.label_names, label_values)} {value}"
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues) -> str:
+    pairs = ",".join(
+        f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}" if pairs else ""
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_DURATION = Histogram(
+    "ta_request_duration_seconds",
+    "HTTP request latency by route.",
+    ("route", "teacher", "status"),
+)
+STAGE_DURATION = Histogram(
+    "ta_stage_duration_seconds",
+    "Workflow node latency by stage.",
+    ("stage", "teacher", "status"),
+)
+UPSTREAM_DURATION = Histogram(
+    "ta_upstream_duration_seconds",
+    "Upstream client call latency, including retries.",
+    ("service", "operation", "teacher", "status"),
+)
+UPSTREAM_RETRIES = Counter(
+    "ta_upstream_retries_total",
+    "Retries of upstream client calls.",
+    ("service", "operation"),
+)
+UPSTREAM_BYTES = Counter(
+    "ta_upstream_bytes_total",
+    "Approximate payload bytes sent to and received from upstream services.",
+    ("service", "operation", "direction"),
+)
+LLM_TOKENS = Counter(
+    "ta_llm_tokens_total",
+    "LLM tokens by direction.",
+    ("operation", "teacher", "direction"),
+)
+
+_REGISTRY = (
+    REQUEST_DURATION,
+    STAGE_DURATION,
+    UPSTREAM_DURATION,
+    UPSTREAM_RETRIES,
+    UPSTREAM_BYTES,
+    LLM_TOKENS,
+)
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+
+def get_trace_id() -> Optional[str]:
+    trace = _trace.get()
+    return trace["trace_id"] if trace else None
+
+
+@contextmanager
+def trace_context(trace_id: Optional[str] = None, teacher_name: Optional[str] = None):
+    """
+    Bind a trace ID and teacher to the current context for the duration of a request.
+
+    Context variables follow asyncio tasks and run_blocking calls, so every node
+    and upstream call made for the request is labelled with them.
+
+    Args:
+        trace_id (Optional[str]): The trace ID; a new one is generated if omitted.
+        teacher_name (Optional[str]): The teacher the request is for, if known yet.
+
+    Yields:
+        Dict[str, Optional[str]]: The trace, with "trace_id" and "teacher".
+    """
+    trace = {"trace_id": trace_id or new_trace_id(), "teacher": teacher_name}
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+
+
+def set_teacher(teacher_name: str) -> None:
+    """
+    Label the current request with a teacher only known once its body is parsed.
+
+    Args:
+        teacher_name (str): The teacher the request is for.
+    """
+    trace = _trace.get()
+    if trace is not None:
+        trace["teacher"] = teacher_name
+
+
+def teacher_label(teacher_name: Optional[str] = None) -> str:
+    # Unknown values are folded together to keep label cardinality bounded
+    if teacher_name is None:
+        trace = _trace.get()
+        teacher_name = trace["teacher"] if trace else None
+    if teacher_name in TEACHER_CONFIG:
+        return teacher_name
+    return "none" if teacher_name is None else "other"
+
+
+def log_event(event: str, **fields: Any) -> None:
+    """
+    Emit a structured (JSON) log line tagged with the current trace ID.
+
+    Args:
+        event (str): The event name.
+        **fields: Additional JSON-serialisable fields.
+    """
+    if not METRICS_LOG_EVENTS:
+        return
+    record = {"event": event, "trace_id": get_trace_id()}
+    record.update({key: value for key, value in fields.items() if value is not None})
+    logger.info(json.dumps(record, default=str))
+
+
+def observe_request(
+    route: str, teacher_name: Optional[str], status: int, seconds: float
+) -> None:
+    teacher = teacher_label(teacher_name)
+    REQUEST_DURATION.observe(seconds, route, teacher, str(status))
+    log_event(
+        "request",
+        route=route,
+        teacher=teacher,
+        status=status,
+        duration_ms=round(seconds * 1000, 2),
+    )
+
+
+def instrument_node(stage: str) -> Callable:
+    """
+    Decorate a workflow node to record its latency and outcome.
+
+    Works for sync and async nodes. The teacher is taken from the node's state
+    when it has one, otherwise from the trace context.
+
+    Args:
+        stage (str): The stage label, usually the node name in the graph.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def record(state: Any, status: str, seconds: float) -> None:
+        teacher = teacher_label(
+            state.get("teacher_name") if isinstance(state, dict) else None
+        )
+        STAGE_DURATION.observe(seconds, stage, teacher, status)
+        log_event(
+            "node",
+            stage=stage,
+            teacher=teacher,
+            status=status,
+            duration_ms=round(seconds * 1000, 2),
+        )
+
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(state, *args, **kwargs):
+                start = time.perf_counter()
+                status = "error"
+                try:
+                    result = await func(state, *args, **kwargs)
+                    status = "ok"
+                    return result
+                finally:
+                    record(state, status, time.perf_counter() - start)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(state, *args, **kwargs):
+            start = time.perf_counter()
+            status = "error"
+            try:
+                result = func(state, *args, **kwargs)
+                status = "ok"
+                return result
+            finally:
+                record(state, status, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def upstream_call(service: str, operation: str, **fields: Any):
+    """
+    Time a call to an upstream service and record what the caller reports about it.
+
+    The yielded dict may be filled with "retries", "request_bytes",
+    "response_bytes", "input_tokens" and "output_tokens" before the block exits,
+    and "status" to report a failure that was handled without raising.
+
+    Args:
+        service (str): The upstream service, e.g. "bedrock" or "pinecone".
+        operation (str): The operation, e.g. "query" or "invoke".
+        **fields: Extra fields for the structured log line.
+
+    Yields:
+        Dict[str, Any]: The call record.
+    """
+    call: Dict[str, Any] = {}
+    start = time.perf_counter()
+    status = "error"
+    try:
+        yield call
+        status = "ok"
+    finally:
+        seconds = time.perf_counter() - start
+        status = call.pop("status", status)
+        teacher = teacher_label()
+        UPSTREAM_DURATION.observe(seconds, service, operation, teacher, status)
+        UPSTREAM_RETRIES.inc(call.get("retries", 0), service, operation)
+        UPSTREAM_BYTES.inc(call.get("request_bytes", 0), service, operation, "sent")
+        UPSTREAM_BYTES.inc(
+            call.get("response_bytes", 0), service, operation, "received"
+        )
+        LLM_TOKENS.inc(call.get("input_tokens", 0), operation, teacher, "input")
+        LLM_TOKENS.inc(call.get("output_tokens", 0), operation, teacher, "output")
+        log_event(
+            "upstream",
+            service=service,
+            operation=operation,
+            teacher=teacher,
+            status=status,
+            duration_ms=round(seconds * 1000, 2),
+            **call,
+            **fields,
+        )
+
+
+def token_usage(message: Any) -> Tuple[int, int]:
+    """
+    Read input and output token counts from a LangChain chat message or chunk.
+
+    Args:
+        message (Any): An AIMessage or AIMessageChunk.
+
+    Returns:
+        Tuple[int, int]: Input and output tokens, 0 where not reported.
+    """
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    usage = (getattr(message, "response_metadata", None) or {}).get("usage") or {}
+    return (
+        usage.get("input_tokens", usage.get("prompt_tokens", 0)),
+        usage.get("output_tokens", usage.get("completion_tokens", 0)),
+    )
+
+
+def render_metrics() -> str:
+    """
+    Render every metric in the Prometheus text exposition format.
+
+    Returns:
+        str: The metrics page.
+    """
+    lines = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -1,59 +1,210 @@
-from typing import List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+import multiprocessing
+import os
+import shutil
+import tempfile
 import PyPDF2
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain.schema.document import Document
-from utils.config import PDF_CHUNK_SIZE, PDF_CHUNK_OVERLAP
+from utils.config import (
+    PDF_CHUNK_SIZE,
+    PDF_CHUNK_OVERLAP,
+    PDF_EXTRACT_MAX_WORKERS,
+    PDF_EXTRACT_MIN_PAGES,
+    PDF_EXTRACT_SHARD_PAGES,
+    PDF_SPOOL_DIR,
+)
 import logging
 
+# PdfReader of the file a worker process is extracting, opened once per process
+_worker_reader = None
 
-def process_pdf(pdf_file: bytes, filename: str) -> List[Document]:
+
+def process_pdf(
+    pdf_file: BinaryIO, filename: str, max_workers: Optional[int] = None
+) -> List[Document]:
     """
     Process a PDF file and return a list of document chunks.
 
     Args:
-        pdf_file (bytes): The PDF file content.
+        pdf_file (BinaryIO): A readable, seekable file object with the PDF content.
         filename (str): The name of the PDF file.
+        max_workers (Optional[int]): Extraction processes; see iter_pdf_chunks.
 
     Returns:
         List[Document]: A list of document chunks.
     """
-    try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-
-        documents = []
-        for page_num, page in enumerate(pdf_reader.pages):
-            try:
-                text = page.extract_text()
-                if text:  # Only create a Document if there's text content
-                    documents.append(
-                        Document(
-                            page_content=text,
-                            metadata={"page": page_num + 1, "source": filename},
-                        )
-                    )
-            except Exception as e:
-                logging.error(
-                    f"Error extracting text from page {page_num + 1} of {filename}: {str(e)}"
-                )
+    return list(iter_pdf_chunks(pdf_file, filename, max_workers))
 
-        if not documents:
-            logging.warning(f"No text content extracted from {filename}")
-            return []
 
+def iter_pdf_chunks(
+    pdf_file: BinaryIO, filename: str, max_workers: Optional[int] = None
+) -> Iterator[Document]:
+    """
+    Extract and split a PDF page by page, yielding chunks as each page is done.
+
+    Only the text of the current page is held in memory, so large PDFs can be
+    ingested without materialising the whole document. Chunk IDs match those of
+    process_pdf, since chunk indices restart on every page.
+
+    Args:
+        pdf_file (BinaryIO): A readable, seekable file object with the PDF content.
+        filename (str): The name of the PDF file.
+        max_workers (Optional[int]): Maximum number of extraction processes. Defaults
+            to PDF_EXTRACT_MAX_WORKERS; 1 forces single-process extraction.
+
+    Yields:
+        Document: The next document chunk, with its ID assigned.
+    """
+    try:
         text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=PDF_CHUNK_SIZE,
             chunk_overlap=PDF_CHUNK_OVERLAP,
             length_function=len,
             is_separator_regex=False,
         )
-        chunks = text_splitter.split_documents(documents)
 
-        return calculate_chunk_ids(chunks, filename)
+        has_text = False
+        for page_num, text in iter_page_texts(pdf_file, filename, max_workers):
+            if not text:  # Only create a Document if there's text content
+                continue
+
+            has_text = True
+            document = Document(
+                page_content=text,
+                metadata={"page": page_num + 1, "source": filename},
+            )
+            yield from calculate_chunk_ids(
+                text_splitter.split_documents([document]), filename
+            )
+
+        if not has_text:
+            logging.warning(f"No text content extracted from {filename}")
     except Exception as e:
         logging.error(f"Error processing PDF {filename}: {str(e)}")
         raise
 
 
+def iter_page_texts(
+    pdf_file: BinaryIO, filename: str, max_workers: Optional[int] = None
+) -> Iterator[Tuple[int, Optional[str]]]:
+    """
+    Extract the text of every page of a PDF, in page order.
+
+    Large PDFs are split into page ranges that are extracted on a process pool,
+    since PyPDF2 extraction is pure Python and CPU-bound. Small PDFs, Lambda and
+    a single worker use the current process.
+
+    Args:
+        pdf_file (BinaryIO): A readable, seekable file object with the PDF content.
+        filename (str): The name of the PDF file.
+        max_workers (Optional[int]): Maximum number of extraction processes.
+
+    Yields:
+        Tuple[int, Optional[str]]: The zero-based page number and its text, or None
+            if extraction failed.
+    """
+    pdf_reader = PyPDF2.PdfReader(pdf_file)
+    page_count = len(pdf_reader.pages)
+    workers = extraction_workers(page_count, max_workers)
+    if workers <= 1:
+        yield from _iter_pages(pdf_reader, filename, 0, page_count)
+        return
+
+    # Workers open the PDF from a file of their own; the source may be in memory
+    pdf_file.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=".pdf", dir=PDF_SPOOL_DIR) as shard_source:
+        shutil.copyfileobj(pdf_file, shard_source)
+        shard_source.flush()
+        try:
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_open_worker_reader,
+                initargs=(shard_source.name,),
+            )
+        except (OSError, NotImplementedError) as e:
+            logging.warning(
+                f"Process pool unavailable, extracting {filename} in one process: {str(e)}"
+            )
+            yield from _iter_pages(pdf_reader, filename, 0, page_count)
+            return
+
+        with executor:
+            shards = iter(range(0, page_count, PDF_EXTRACT_SHARD_PAGES))
+            in_flight = deque()
+
+            def submit_next() -> bool:
+                start = next(shards, None)
+                if start is None:
+                    return False
+                end = min(start + PDF_EXTRACT_SHARD_PAGES, page_count)
+                in_flight.append(
+                    executor.submit(_extract_worker_pages, filename, start, end)
+                )
+                return True
+
+            # Keep every worker busy while holding at most two shards per worker
+            while len(in_flight) < workers * 2 and submit_next():
+                pass
+            while in_flight:
+                page_texts = in_flight.popleft().result()
+                submit_next()
+                yield from page_texts
+
+
+def extraction_workers(page_count: int, max_workers: Optional[int] = None) -> int:
+    """
+    Decide how many processes to extract a PDF with.
+
+    Args:
+        page_count (int): The number of pages in the PDF.
+        max_workers (Optional[int]): Requested maximum; defaults to
+            PDF_EXTRACT_MAX_WORKERS, where 0 means one per CPU.
+
+    Returns:
+        int: The number of processes; 1 means extract in the current process.
+    """
+    if max_workers is None:
+        max_workers = PDF_EXTRACT_MAX_WORKERS
+    if max_workers <= 0:
+        max_workers = os.cpu_count() or 1
+    # Lambda has no /dev/shm, which multiprocessing needs for its queues
+    if os.environ.get("AWS_LAMBDA_FUNCTION_NAME") or page_count < PDF_EXTRACT_MIN_PAGES:
+        return 1
+    shard_count = -(-page_count // PDF_EXTRACT_SHARD_PAGES)
+    return max(1, min(max_workers, shard_count))
+
+
+def _iter_pages(
+    pdf_reader: PyPDF2.PdfReader, filename: str, start: int, end: int
+) -> Iterator[Tuple[int, Optional[str]]]:
+    # Yields each page as soon as it is extracted, so only one page's text is held
+    for page_num in range(start, end):
+        try:
+            text = pdf_reader.pages[page_num].extract_text()
+        except Exception as e:
+            logging.error(
+                f"Error extracting text from page {page_num + 1} of {filename}: {str(e)}"
+            )
+            text = None
+        yield page_num, text
+
+
+def _open_worker_reader(path: str) -> None:
+    global _worker_reader
+    _worker_reader = PyPDF2.PdfReader(path)
+
+
+def _extract_worker_pages(
+    filename: str, start: int, end: int
+) -> List[Tuple[int, Optional[str]]]:
+    # A shard's pages go back to the parent in one result
+    return list(_iter_pages(_worker_reader, filename, start, end))
+
+
 def calculate_chunk_ids(chunks: List[Document], filename: str) -> List[Document]:
     """
     Calculate and assign unique IDs to document chunks.
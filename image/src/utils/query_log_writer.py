@@ -0,0 +1,246 @@
+# utils/query_log_writer.py
+
+import atexit
+import logging
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.clients import get_dynamodb_table
+from utils.metrics import upstream_call
+from utils.config import (
+    QUERY_LOG_BATCH_SIZE,
+    QUERY_LOG_FLUSH_INTERVAL_SECONDS,
+    QUERY_LOG_MAX_BUFFER,
+    QUERY_LOG_PROMPT_MODE,
+    QUERY_LOG_PROMPT_MAX_CHARS,
+    QUERY_LOG_DRAIN_TIMEOUT_SECONDS,
+    QUERY_LOG_MAX_ATTEMPTS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def shrink_prompt(item: Dict[str, Any], mode: str, max_chars: int) -> Dict[str, Any]:
+    """
+    Reduce the size of the prompt attribute of a query-log item.
+
+    Args:
+        item (Dict[str, Any]): The item to write.
+        mode (str): "full" keeps the prompt, "truncate" keeps its first max_chars
+            characters and "compress" stores it zlib-compressed as binary.
+        max_chars (int): Prompt length kept in "truncate" mode.
+
+    Returns:
+        Dict[str, Any]: A copy of the item with the prompt reduced.
+    """
+    item = dict(item)
+    prompt = item.get("prompt")
+    if not isinstance(prompt, str) or mode == "full":
+        return item
+    if mode == "truncate":
+        if len(prompt) > max_chars:
+            item["prompt"] = prompt[:max_chars]
+            item["prompt_truncated"] = True
+    elif mode == "compress":
+        item["prompt"] = zlib.compress(prompt.encode("utf-8"))
+        item["prompt_encoding"] = "zlib"
+    return item
+
+
+class QueryLogWriter:
+    """
+    Buffers query-log items and writes them to DynamoDB from a background thread.
+
+    submit() only appends to an in-memory buffer, so it never adds a DynamoDB round
+    trip to the response path. The buffer is flushed with batch_write_item once it
+    holds batch_size items or every flush_interval seconds. When more than
+    max_buffer items are waiting the oldest are dropped. drain() flushes whatever is
+    left and should be called before the process is frozen or exits.
+
+    A failed batch is split in halves until the rejected items are isolated, so one
+    item DynamoDB rejects cannot hold back the others. Rejected items go back to the
+    front of the buffer and are dropped, and logged, after max_attempts failed writes.
+    """
+
+    def __init__(
+        self,
+        table: Any,
+        batch_size: int = QUERY_LOG_BATCH_SIZE,
+        flush_interval: float = QUERY_LOG_FLUSH_INTERVAL_SECONDS,
+        max_buffer: int = QUERY_LOG_MAX_BUFFER,
+        prompt_mode: str = QUERY_LOG_PROMPT_MODE,
+        prompt_max_chars: int = QUERY_LOG_PROMPT_MAX_CHARS,
+        max_attempts: int = QUERY_LOG_MAX_ATTEMPTS,
+    ):
+        self.table = table
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.prompt_mode = prompt_mode
+        self.prompt_max_chars = prompt_max_chars
+        self.max_attempts = max(1, max_attempts)
+        self.written = 0
+        self.dropped = 0
+
+        # (item, failed attempts so far)
+        self._buffer: deque = deque(maxlen=max(1, max_buffer))
+        self._buffer_lock = threading.Lock()
+        self._in_flight = 0
+        self._flush_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, item: Dict[str, Any]) -> None:
+        item = shrink_prompt(item, self.prompt_mode, self.prompt_max_chars)
+        with self._buffer_lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+                logger.warning("Query log buffer full, dropping the oldest record")
+            self._buffer.append((item, 0))
+            should_wake = len(self._buffer) >= self.batch_size
+        self._ensure_thread()
+        if should_wake:
+            self._wake.set()
+
+    def flush(self, timeout: Optional[float] = None) -> int:
+        """
+        Write every buffered item now.
+
+        Args:
+            timeout (Optional[float]): How long to wait for a flush already in
+                progress on another thread. None waits as long as it takes.
+
+        Returns:
+            int: The number of items written.
+        """
+        if not self._flush_lock.acquire(timeout=-1 if timeout is None else max(0.0, timeout)):
+            return 0
+        try:
+            with self._buffer_lock:
+                entries = list(self._buffer)
+                self._buffer.clear()
+                self._in_flight = len(entries)
+            if not entries:
+                return 0
+            failed: List[Tuple[Dict[str, Any], int]] = []
+            written = self._write_entries(entries, failed)
+            self.written += written
+            self._requeue(failed)
+            return written
+        finally:
+            with self._buffer_lock:
+                self._in_flight = 0
+            self._flush_lock.release()
+
+    def _write_entries(
+        self,
+        entries: List[Tuple[Dict[str, Any], int]],
+        failed: List[Tuple[Dict[str, Any], int]],
+    ) -> int:
+        try:
+            # batch_writer groups puts into batch_write_item calls of up to 25
+            # items and resends unprocessed items
+            with upstream_call("dynamodb", "batch_write", items=len(entries)):
+                with self.table.batch_writer() as batch:
+                    for item, _ in entries:
+                        batch.put_item(Item=item)
+            return len(entries)
+        except Exception as e:
+            if len(entries) == 1:
+                item, attempts = entries[0]
+                logger.warning(
+                    f"Failed to write query log record {item.get('query_id')}: {str(e)}"
+                )
+                failed.append((item, attempts + 1))
+                return 0
+        # Split the batch to isolate the records DynamoDB rejects
+        middle = len(entries) // 2
+        return self._write_entries(entries[:middle], failed) + self._write_entries(
+            entries[middle:], failed
+        )
+
+    def _requeue(self, failed: List[Tuple[Dict[str, Any], int]]) -> None:
+        if not failed:
+            return
+        retry = []
+        for item, attempts in failed:
+            if attempts >= self.max_attempts:
+                logger.error(
+                    f"Dropping query log record {item.get('query_id')} after {attempts} failed writes"
+                )
+            else:
+                retry.append((item, attempts))
+        with self._buffer_lock:
+            self.dropped += len(failed) - len(retry)
+            # Failed items are older than anything submitted meanwhile, so when the
+            # buffer is full they are the ones dropped
+            overflow = len(retry) - (self._buffer.maxlen - len(self._buffer))
+            if overflow > 0:
+                self.dropped += overflow
+                logger.warning(
+                    f"Query log buffer full, dropping {overflow} records awaiting retry"
+                )
+                retry = retry[overflow:]
+            self._buffer.extendleft(reversed(retry))
+
+    def drain(self, timeout: float = QUERY_LOG_DRAIN_TIMEOUT_SECONDS) -> None:
+        deadline = time.monotonic() + timeout
+        while self.pending():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if not self.flush(remaining):
+                time.sleep(min(0.05, max(0.0, deadline - time.monotonic())))
+
+    def pending(self) -> int:
+        """Items not yet written, including those of a flush in progress."""
+        with self._buffer_lock:
+            return len(self._buffer) + self._in_flight
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="query-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self.pending():
+                self.flush()
+
+
+_writers: Dict[str, QueryLogWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_query_log_writer(table_name: str) -> QueryLogWriter:
+    with _writers_lock:
+        writer = _writers.get(table_name)
+        if writer is None:
+            writer = QueryLogWriter(get_dynamodb_table(table_name))
+            _writers[table_name] = writer
+        return writer
+
+
+def drain_query_logs(timeout: float = QUERY_LOG_DRAIN_TIMEOUT_SECONDS) -> None:
+    """
+    Flush every writer's pending items, spending at most timeout seconds in total.
+    Returns at once when nothing is pending.
+    """
+    with _writers_lock:
+        writers = [writer for writer in _writers.values() if writer.pending()]
+    deadline = time.monotonic() + timeout
+    for writer in writers:
+        writer.drain(max(0.0, deadline - time.monotonic()))
+
+
+atexit.register(drain_query_logs)
@@ -1,16 +1,45 @@
 # utils/query_processing.py
 
-from langchain_aws import ChatBedrock
-from utils.config import BEDROCK_MODEL_ID
+from utils.clients import get_chat_model
+from utils.metrics import token_usage, upstream_call
 
 
-def process_query(query_text, teacher_name, prompt_template, additional_params=None):
+def build_prompt(query_text, prompt_template, additional_params=None):
     prompt_params = {"question": query_text}
     if additional_params:
         prompt_params.update(additional_params)
 
-    prompt = prompt_template.format(**prompt_params)
+    return prompt_template.format(**prompt_params)
+
+
+def process_query(query_text, teacher_name, prompt_template, additional_params=None):
+    prompt = build_prompt(query_text, prompt_template, additional_params)
 
-    model = ChatBedrock(model_id=BEDROCK_MODEL_ID)
-    response = model.invoke(prompt)
+    model = get_chat_model()
+    with upstream_call("bedrock", "invoke") as call:
+        call["request_bytes"] = len(prompt.encode("utf-8"))
+        response = model.invoke(prompt)
+        call["response_bytes"] = len(response.content.encode("utf-8"))
+        call["input_tokens"], call["output_tokens"] = token_usage(response)
     return response.content
+
+
+async def stream_query(query_text, prompt_template, additional_params=None):
+    prompt = build_prompt(query_text, prompt_template, additional_params)
+
+    model = get_chat_model()
+    with upstream_call("bedrock", "stream") as call:
+        call.update(
+            request_bytes=len(prompt.encode("utf-8")),
+            response_bytes=0,
+            input_tokens=0,
+            output_tokens=0,
+        )
+        async for chunk in model.astream(prompt):
+            # Usage is reported on the first and last chunks of the stream
+            input_tokens, output_tokens = token_usage(chunk)
+            call["input_tokens"] += input_tokens
+            call["output_tokens"] += output_tokens
+            if chunk.content:
+                call["response_bytes"] += len(chunk.content.encode("utf-8"))
+                yield chunk.content
@@ -1,35 +1,230 @@
-import boto3
-from io import BytesIO
-from utils.config import TEACHER_CONFIG, S3_BUCKET
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from botocore.exceptions import ClientError
+from utils.config import (
+    TEACHER_CONFIG,
+    S3_BUCKET,
+    S3_LIST_MAX_WORKERS,
+    S3_MANIFEST_TTL_SECONDS,
+    S3_MANIFEST_PREFIX,
+    PDF_SPOOL_MAX_MEMORY_MB,
+    PDF_SPOOL_DIR,
+    S3_DOWNLOAD_CHUNK_BYTES,
+)
+from utils.clients import get_s3_client
 
-s3 = boto3.client("s3")
+# Manifests of listed prefixes, keyed by prefix
+_manifests = {}
+_manifest_lock = threading.Lock()
 
 
 def get_s3_buckets():
-    response = s3.list_buckets()
+    response = get_s3_client().list_buckets()
     return response
 
 
-def get_pdf_from_s3(pdf_key, teacher_name):
+def get_pdf_from_s3(pdf_key, teacher_name, max_memory_mb=None):
     config = TEACHER_CONFIG.get(teacher_name)
     if not config:
         raise ValueError(f"Invalid teacher name: {teacher_name}")
 
     s3_prefix = config["s3_prefix"]
-    response = s3.get_object(Bucket=S3_BUCKET, Key=f"{s3_prefix}{pdf_key}")
-    pdf_content = response["Body"].read()
-    return BytesIO(pdf_content)
+    response = get_s3_client().get_object(Bucket=S3_BUCKET, Key=f"{s3_prefix}{pdf_key}")
 
+    # Stream the body instead of reading it whole; objects over the ceiling spill to disk
+    if max_memory_mb is None:
+        max_memory_mb = PDF_SPOOL_MAX_MEMORY_MB
+    pdf_file = SpooledTemporaryFile(
+        max_size=max_memory_mb * 1024 * 1024, dir=PDF_SPOOL_DIR
+    )
+    try:
+        for chunk in response["Body"].iter_chunks(S3_DOWNLOAD_CHUNK_BYTES):
+            pdf_file.write(chunk)
+        pdf_file.seek(0)
+    except Exception:
+        pdf_file.close()
+        raise
+    return pdf_file
 
-def list_pdfs_in_s3(teacher_name):
+
+def list_pdfs_in_s3(teacher_name, refresh=False):
+    return [obj["key"] for obj in list_pdf_objects_in_s3(teacher_name, refresh)]
+
+
+def list_pdf_objects_in_s3(teacher_name, refresh=False):
+    """
+    List the PDFs under a teacher's prefix from the cached manifest.
+
+    Args:
+        teacher_name (str): The teacher whose PDFs to list.
+        refresh (bool): Re-list the prefix even if the manifest is still fresh.
+
+    Returns:
+        List[dict]: One {"key", "name", "etag", "size"} entry per PDF, sorted by key.
+        The name is the key relative to the teacher's prefix, e.g. "week1/notes.pdf"
+        for a PDF in a sub-prefix, which is what get_pdf_from_s3 expects.
+    """
     config = TEACHER_CONFIG.get(teacher_name)
     if not config:
         raise ValueError(f"Error s3_handler, Invalid teacher name: {teacher_name}")
 
     s3_prefix = config["s3_prefix"]
-    response = s3.list_objects_v2(Bucket=S3_BUCKET, Prefix=s3_prefix)
+    manifest = get_prefix_manifest(s3_prefix, refresh)
     return [
-        obj["Key"]
-        for obj in response.get("Contents", [])
-        if obj["Key"].lower().endswith(".pdf")
+        {
+            "key": key,
+            "name": key[len(s3_prefix) :],
+            "etag": entry["etag"],
+            "size": entry["size"],
+        }
+        for key, entry in sorted(manifest["objects"].items())
+        if key.lower().endswith(".pdf")
+    ]
+
+
+def get_prefix_manifest(prefix, refresh=False):
+    """
+    Return the manifest of a prefix, re-listing it once it is older than the TTL.
+
+    The manifest is kept in memory and persisted to S3, so a cold Lambda reuses
+    the listing of a previous invocation instead of walking the prefix again. It
+    can be up to S3_MANIFEST_TTL_SECONDS old, so it serves read paths such as
+    /list_pdfs; ingestion passes refresh=True so it never misses a new upload.
+
+    Args:
+        prefix (str): The S3 key prefix.
+        refresh (bool): Re-list the prefix even if the manifest is still fresh.
+
+    Returns:
+        dict: {"listed_at": epoch seconds, "objects": {key: {"etag", "size"}}}.
+    """
+    with _manifest_lock:
+        manifest = _manifests.get(prefix)
+    if manifest is None and not refresh:
+        manifest = _load_manifest(prefix)
+    if (
+        refresh
+        or manifest is None
+        or time.time() - manifest["listed_at"] > S3_MANIFEST_TTL_SECONDS
+    ):
+        manifest = refresh_prefix_manifest(prefix, manifest)
+    else:
+        with _manifest_lock:
+            _manifests[prefix] = manifest
+    return manifest
+
+
+def refresh_prefix_manifest(prefix, previous=None):
+    """
+    Re-list the whole prefix and replace its manifest.
+
+    S3 has no way to list only what changed, so every refresh costs a full listing
+    of the prefix and all of its sub-prefixes (one request per 1000 keys, spread
+    over S3_LIST_MAX_WORKERS threads). The previous manifest is only used to log
+    what was added, changed or removed.
+
+    Args:
+        prefix (str): The S3 key prefix.
+        previous (Optional[dict]): The manifest being replaced, if there is one.
+
+    Returns:
+        dict: The refreshed manifest.
+    """
+    objects = previous["objects"] if previous else {}
+    listed = {
+        obj["Key"]: {"etag": obj["ETag"].strip('"'), "size": obj["Size"]}
+        for obj in list_objects_concurrently(prefix)
+    }
+    added = listed.keys() - objects.keys()
+    removed = objects.keys() - listed.keys()
+    changed = [
+        key
+        for key in listed.keys() & objects.keys()
+        if listed[key]["etag"] != objects[key]["etag"]
     ]
+
+    manifest = {"listed_at": time.time(), "objects": listed}
+    with _manifest_lock:
+        _manifests[prefix] = manifest
+    if previous is None or added or removed or changed:
+        logging.info(
+            f"Manifest of {prefix}: {len(listed)} objects, {len(added)} added, "
+            f"{len(changed)} changed, {len(removed)} removed"
+        )
+    try:
+        _save_manifest(prefix, manifest)
+    except ClientError as e:
+        logging.warning(f"Failed to persist the manifest of {prefix}: {str(e)}")
+    return manifest
+
+
+def list_objects_concurrently(prefix, max_workers=None):
+    """
+    List every object under a prefix, listing its sub-prefixes in parallel.
+
+    A first delimited listing returns the objects directly under the prefix and
+    its sub-prefixes; each sub-prefix is then paginated on its own thread.
+
+    Args:
+        prefix (str): The S3 key prefix.
+        max_workers (Optional[int]): Maximum concurrent listings.
+
+    Returns:
+        List[dict]: The list_objects_v2 entries of every object under the prefix.
+    """
+    objects, sub_prefixes = _list_all(prefix, delimiter="/")
+    if not sub_prefixes:
+        return objects
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers or S3_LIST_MAX_WORKERS, thread_name_prefix="s3-list"
+    ) as executor:
+        for sub_objects, _ in executor.map(_list_all, sub_prefixes):
+            objects.extend(sub_objects)
+    return objects
+
+
+def _list_all(prefix, delimiter=None):
+    s3_client = get_s3_client()
+    kwargs = {"Bucket": S3_BUCKET, "Prefix": prefix}
+    if delimiter:
+        kwargs["Delimiter"] = delimiter
+
+    objects = []
+    sub_prefixes = []
+    while True:
+        response = s3_client.list_objects_v2(**kwargs)
+        objects.extend(response.get("Contents", []))
+        sub_prefixes.extend(p["Prefix"] for p in response.get("CommonPrefixes", []))
+        if not response.get("IsTruncated"):
+            return objects, sub_prefixes
+        kwargs["ContinuationToken"] = response["NextContinuationToken"]
+
+
+def _manifest_key(prefix):
+    return f"{S3_MANIFEST_PREFIX}{prefix.strip('/')}.json"
+
+
+def _load_manifest(prefix):
+    try:
+        response = get_s3_client().get_object(
+            Bucket=S3_BUCKET, Key=_manifest_key(prefix)
+        )
+        return json.loads(response["Body"].read())
+    except ClientError as e:
+        if e.response["Error"]["Code"] not in ("NoSuchKey", "404"):
+            logging.warning(f"Failed to load the manifest of {prefix}: {str(e)}")
+        return None
+
+
+def _save_manifest(prefix, manifest):
+    get_s3_client().put_object(
+        Bucket=S3_BUCKET,
+        Key=_manifest_key(prefix),
+        Body=json.dumps(manifest).encode("utf-8"),
+        ContentType="application/json",
+    )
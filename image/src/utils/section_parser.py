@@ -0,0 +1,137 @@
+# utils/section_parser.py
+
+import re
+from typing import Dict, List, Optional, Tuple, Union
+
+# Canonical section names and the heading variations the model produces for them
+SECTION_PATTERNS = [
+    ("Professor's Notes", r"professor(?:'|’)?s?[ \t]+notes"),
+    ("Professor's Sources", r"professor(?:'|’)?s?[ \t]+sources"),
+    ("Internet Notes", r"internet[ \t]+notes"),
+    ("Internet Sources", r"internet[ \t]+sources"),
+    (
+        "Cross-Verification and Contradictions",
+        r"cross[- \t]?verification[ \t]+(?:and|&)[ \t]+contradictions",
+    ),
+    ("Extra Sources", r"extra[ \t]+sources"),
+]
+
+LIST_SECTIONS = {"Professor's Sources", "Internet Sources", "Extra Sources"}
+
+_MARKUP = r"(?:\*\*|__)?"
+HEADING_RE = re.compile(
+    r"^[ \t]*(?P<hashes>#{1,6})?[ \t]*" + _MARKUP
+    + r"[ \t]*(?P<number>\d+[.)])?[ \t]*" + _MARKUP + r"[ \t]*(?:"
+    + "|".join(f"(?P<s{i}>{pattern})" for i, (_, pattern) in enumerate(SECTION_PATTERNS))
+    + r")[ \t]*" + _MARKUP + r"[ \t]*(?P<colon>:)?[ \t]*" + _MARKUP
+    + r"[ \t]*(?P<rest>[^\n]*)\n",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+SectionContent = Union[str, List[str]]
+
+
+def empty_formatted_result() -> Dict[str, SectionContent]:
+    return {
+        section: [] if section in LIST_SECTIONS else "" for section, _ in SECTION_PATTERNS
+    }
+
+
+def _heading_section(match: "re.Match") -> Optional[str]:
+    # Without a number, markdown heading or bare trailing colon the line is treated
+    # as prose that happens to mention a section name
+    has_markup = match.group("number") or match.group("hashes") or "*" in match.group(0)
+    if not has_markup and not (match.group("colon") and not match.group("rest")):
+        return None
+    for i, (section, _) in enumerate(SECTION_PATTERNS):
+        if match.group(f"s{i}") is not None:
+            return section
+    return None
+
+
+class SectionParser:
+    """
+    Single-pass parser for the six-section answer format of COMBINED_PROMPT_TEMPLATE.
+
+    Text can be fed whole or in arbitrary chunks as it streams from the model. Each
+    complete line is scanned exactly once by one compiled regex, and section bodies
+    are collected as slices and joined once when the section closes. A section is
+    returned by feed() as soon as the next heading arrives, and the last one by
+    close(). Text before the first heading is ignored.
+    """
+
+    def __init__(self):
+        self.result = empty_formatted_result()
+        self._pending: List[str] = []
+        self._body: List[str] = []
+        self._current_section: Optional[str] = None
+        self._heading_rest = ""
+
+    def feed(self, text: str) -> List[Tuple[str, SectionContent]]:
+        # Partial lines wait in _pending until their newline arrives
+        self._pending.append(text)
+        if "\n" not in text:
+            return []
+        text = "".join(self._pending)
+        end = text.rfind("\n") + 1
+        self._pending = [text[end:]] if end < len(text) else []
+        return self._scan(text[:end])
+
+    def close(self) -> List[Tuple[str, SectionContent]]:
+        text = "".join(self._pending)
+        self._pending = []
+        completed = self._scan(text + "\n") if text else []
+        finished = self._finish_section()
+        if finished:
+            completed.append(finished)
+        return completed
+
+    def _scan(self, lines: str) -> List[Tuple[str, SectionContent]]:
+        completed = []
+        pos = 0
+        for match in HEADING_RE.finditer(lines):
+            section = _heading_section(match)
+            if section is None:
+                continue
+            self._body.append(lines[pos : match.start()])
+            finished = self._finish_section()
+            if finished:
+                completed.append(finished)
+            self._current_section = section
+            self._heading_rest = match.group("rest").strip()
+            pos = match.end()
+        self._body.append(lines[pos:])
+        return completed
+
+    def _finish_section(self) -> Optional[Tuple[str, SectionContent]]:
+        body = "".join(self._body)
+        self._body = []
+        if not self._current_section:
+            return None
+        section = self._current_section
+        if self._heading_rest:
+            body = self._heading_rest + "\n" + body
+        if section in LIST_SECTIONS:
+            content = [line.strip() for line in body.split("\n") if line.strip()]
+        else:
+            content = body.strip()
+        self.result[section] = content
+        self._current_section = None
+        self._heading_rest = ""
+        return section, content
+
+
+def parse_sections(text: str) -> Dict[str, SectionContent]:
+    """
+    Parse a complete model response into the formatted result dictionary.
+
+    Args:
+        text (str): The raw model response.
+
+    Returns:
+        Dict[str, SectionContent]: Text sections as strings, source sections as lists.
+    """
+    parser = SectionParser()
+    parser.feed(text)
+    parser.close()
+    return parser.result
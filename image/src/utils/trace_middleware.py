@@ -0,0 +1,47 @@
+import time
+from typing import AsyncIterator, Callable
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from utils.metrics import observe_request, trace_context
+
+TRACE_HEADER = "X-Trace-Id"
+
+
+async def _observe_after_body(
+    body_iterator: AsyncIterator[bytes], observe: Callable[[], None]
+) -> AsyncIterator[bytes]:
+    try:
+        async for chunk in body_iterator:
+            yield chunk
+    finally:
+        observe()
+
+
+class TraceMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        start = time.perf_counter()
+        with trace_context(
+            request.headers.get(TRACE_HEADER),
+            request.query_params.get("teacher_name"),
+        ) as trace:
+
+            def observe(status: int) -> None:
+                # Route templates rather than raw paths keep label cardinality bounded
+                route = getattr(request.scope.get("route"), "path", "unmatched")
+                # The body may finish after dispatch has left the trace context
+                with trace_context(trace["trace_id"], trace["teacher"]):
+                    observe_request(
+                        route, trace["teacher"], status, time.perf_counter() - start
+                    )
+
+            try:
+                response = await call_next(request)
+            except Exception:
+                observe(500)
+                raise
+            response.headers[TRACE_HEADER] = trace["trace_id"]
+            # Record once the body is sent, so streamed responses are timed in full
+            response.body_iterator = _observe_after_body(
+                response.body_iterator, lambda: observe(response.status_code)
+            )
+            return response
@@ -1,36 +1,196 @@
 # utils/translation_utils.py
 
+import asyncio
+import hashlib
 import logging
-from deep_translator import GoogleTranslator
+import threading
+from typing import Dict, List, Optional
 
+from utils.async_utils import run_blocking
+from utils.config import TRANSLATION_BATCH_MAX_CHARS, TRANSLATION_CACHE_MAX_SIZE
+from utils.lru_cache import TTLLRUCache
+from utils.metrics import upstream_call
+
+# Placed between texts packed into one request; translators leave it untouched.
+# Texts that contain the marker themselves are never packed.
+BATCH_MARKER = "@@@"
+BATCH_SEPARATOR = f"\n{BATCH_MARKER}\n"
+
+
+class GoogleTranslatorBackend:
+    """
+    Translation backend using deep_translator's GoogleTranslator.
+
+    Several texts are packed into one request separated by BATCH_SEPARATOR. If the
+    translated response does not split back into the same number of texts, the
+    batch falls back to one request per text.
+
+    GoogleTranslator keeps the text of the request in flight on the instance, so
+    each thread gets its own translators.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _translator(self, target_language: str):
+        from deep_translator import GoogleTranslator
+
+        translators = getattr(self._local, "translators", None)
+        if translators is None:
+            translators = self._local.translators = {}
+        translator = translators.get(target_language)
+        if translator is None:
+            translator = GoogleTranslator(source="auto", target=target_language)
+            translators[target_language] = translator
+        return translator
+
+    def translate_batch(self, texts: List[str], target_language: str) -> List[str]:
+        translator = self._translator(target_language)
+        with upstream_call("google_translate", "translate", texts=len(texts)) as call:
+            call["request_bytes"] = sum(len(text.encode("utf-8")) for text in texts)
+            if len(texts) == 1 or any(BATCH_MARKER in text for text in texts):
+                return [translator.translate(text) for text in texts]
+
+            translated = translator.translate(BATCH_SEPARATOR.join(texts))
+            parts = translated.split(BATCH_MARKER) if translated else []
+            if len(parts) == len(texts):
+                return [part.strip() for part in parts]
+
+            logging.warning(
+                f"Batched translation returned {len(parts)} parts for {len(texts)} "
+                "texts, translating individually"
+            )
+            call["retries"] = 1
+            return [translator.translate(text) for text in texts]
+
+
+_backend = GoogleTranslatorBackend()
+_cache = TTLLRUCache(TRANSLATION_CACHE_MAX_SIZE)
+
+
+def set_translation_backend(backend) -> None:
+    """
+    Replace the translation backend, e.g. with a local fake for benchmarks.
+
+    Args:
+        backend: An object with a translate_batch(texts, target_language) method.
+    """
+    global _backend
+    _backend = backend
+    _cache.clear()
+
+
+def _cache_key(text: str, target_language: str):
+    return (hashlib.sha256(text.encode("utf-8")).hexdigest(), target_language.lower())
 
-async def translate_text(text: str, target_language: str) -> str:
-    if not text:
-        return ""
 
+def _pack_batches(texts: List[str], max_chars: int) -> List[List[str]]:
+    batches, batch, batch_chars = [], [], 0
+    for text in texts:
+        if BATCH_MARKER in text:
+            # It would be split apart on the way back, so it is sent on its own
+            batches.append([text])
+            continue
+        added = len(text) + len(BATCH_SEPARATOR)
+        if batch and batch_chars + added > max_chars:
+            batches.append(batch)
+            batch, batch_chars = [], 0
+        batch.append(text)
+        batch_chars += added
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+async def _translate_batch(
+    batch: List[str], target_language: str
+) -> Optional[List[str]]:
     try:
-        translator = GoogleTranslator(source="auto", target=target_language)
-        translated = translator.translate(text)
-        return translated
+        return await run_blocking(_backend.translate_batch, batch, target_language)
     except Exception as e:
         logging.error(f"Failed to translate text: {str(e)}")
-        return text  # Return original text if translation fails
+        return None
+
+
+async def translate_texts(
+    texts: List[str], target_language: str, failures: Optional[List[str]] = None
+) -> List[str]:
+    """
+    Translate many texts with as few upstream calls as possible.
+
+    Texts are de-duplicated and looked up in the translation cache first. The
+    remaining ones are packed into batches of up to TRANSLATION_BATCH_MAX_CHARS
+    characters that are translated concurrently off the event loop.
+
+    Args:
+        texts (List[str]): The texts to translate.
+        target_language (str): The language to translate into.
+        failures (Optional[List[str]]): If given, texts that could not be
+            translated are appended to it.
+
+    Returns:
+        List[str]: The translations, in input order. Texts that could not be
+        translated are returned unchanged.
+    """
+    translations: Dict[str, str] = {"": ""}
+    missing = []
+    for text in dict.fromkeys(texts):
+        if text in translations:
+            continue
+        cached: Optional[str] = _cache.get(_cache_key(text, target_language))
+        if cached is not None:
+            translations[text] = cached
+        else:
+            missing.append(text)
+
+    batches = _pack_batches(missing, TRANSLATION_BATCH_MAX_CHARS)
+    results = await asyncio.gather(
+        *(_translate_batch(batch, target_language) for batch in batches)
+    )
+    for batch, translated_batch in zip(batches, results):
+        if translated_batch is None:
+            # Return original text if translation fails, without caching it
+            translations.update((text, text) for text in batch)
+            if failures is not None:
+                failures.extend(batch)
+            continue
+        for text, translated in zip(batch, translated_batch):
+            translations[text] = translated
+            _cache.set(_cache_key(text, target_language), translated)
+
+    return [translations[text] for text in texts]
+
+
+async def translate_text(
+    text: str, target_language: str, failures: Optional[List[str]] = None
+) -> str:
+    if not text:
+        return ""
+    return (await translate_texts([text], target_language, failures))[0]
+
+
+async def translate_dict(
+    data: dict, target_language: str, failures: Optional[List[str]] = None
+) -> dict:
+    texts = []
+    for key, value in data.items():
+        logging.info(f"Translating key: {key}, value: {str(value)[:100]}....")
+        if isinstance(value, str):
+            texts.append(value)
+        elif isinstance(value, list):
+            texts.extend(item for item in value if isinstance(item, str))
 
+    translations = dict(
+        zip(texts, await translate_texts(texts, target_language, failures))
+    )
 
-async def translate_dict(data: dict, target_language: str) -> dict:
     translated_data = {}
     for key, value in data.items():
-        logging.info(f"Translating key: {key}, value: {value[:100]}....")
         if isinstance(value, str):
-            translated_data[key] = await translate_text(value, target_language)
+            translated_data[key] = translations[value]
         elif isinstance(value, list):
             translated_data[key] = [
-                (
-                    await translate_text(item, target_language)
-                    if isinstance(item, str)
-                    else item
-                )
-                for item in value
+                translations[item] if isinstance(item, str) else item for item in value
             ]
         else:
             translated_data[key] = value
@@ -0,0 +1,180 @@
+# utils/upsert_writer.py
+
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from utils.config import (
+    UPSERT_BATCH_MAX_VECTORS,
+    UPSERT_BATCH_MAX_BYTES,
+    UPSERT_MAX_CONCURRENCY,
+    UPSERT_MAX_RETRIES,
+    VECTOR_STORE_BACKEND,
+)
+from utils.metrics import upstream_call
+
+Vector = Union[Tuple[str, List[float], Dict[str, Any]], Dict[str, Any]]
+
+# Rough size of one float in a JSON request body
+BYTES_PER_VALUE = 12
+REQUEST_OVERHEAD_BYTES = 64
+
+
+def estimate_vector_bytes(vector: Vector) -> int:
+    """
+    Estimate the request payload size of a vector in bytes.
+
+    Args:
+        vector (Vector): An (id, values, metadata) tuple or an upsert dict.
+
+    Returns:
+        int: The estimated size in bytes.
+    """
+    if isinstance(vector, dict):
+        vector_id = vector["id"]
+        values = vector.get("values") or []
+        metadata = vector.get("metadata") or {}
+    else:
+        vector_id, values, metadata = (tuple(vector) + ({},))[:3]
+    return (
+        len(vector_id)
+        + len(values) * BYTES_PER_VALUE
+        + len(json.dumps(metadata, default=str))
+        + REQUEST_OVERHEAD_BYTES
+    )
+
+
+def _vector_id(vector: Vector) -> str:
+    return vector["id"] if isinstance(vector, dict) else vector[0]
+
+
+class UpsertWriter:
+    """
+    Streams vectors into a vector index (anything with upsert(vectors=...)) in
+    size-bounded batches.
+
+    Vectors are buffered until a batch reaches max_batch_vectors or max_batch_bytes,
+    then sent on a worker pool. At most max_concurrency batches are in flight; add()
+    blocks once that limit is reached, so memory stays bounded regardless of how many
+    vectors are written. Failed batches are retried with exponential backoff.
+
+    Use as a context manager, or call close() to flush and wait for pending batches.
+    """
+
+    def __init__(
+        self,
+        index: Any,
+        max_batch_vectors: int = UPSERT_BATCH_MAX_VECTORS,
+        max_batch_bytes: int = UPSERT_BATCH_MAX_BYTES,
+        max_concurrency: int = UPSERT_MAX_CONCURRENCY,
+        max_retries: int = UPSERT_MAX_RETRIES,
+        on_batch_written: Optional[Callable[[List[str]], None]] = None,
+    ):
+        self.index = index
+        self.max_batch_vectors = max(1, max_batch_vectors)
+        self.max_batch_bytes = max_batch_bytes
+        self.max_retries = max_retries
+        self.on_batch_written = on_batch_written
+
+        self.total_written = 0
+        self.batches_written = 0
+
+        self._batch: List[Vector] = []
+        self._batch_bytes = 0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._errors: List[Exception] = []
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_concurrency), thread_name_prefix="upsert"
+        )
+
+    def __enter__(self) -> "UpsertWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._executor.shutdown(wait=True)
+
+    def add(self, vector: Vector) -> None:
+        self._raise_if_failed()
+        vector_bytes = estimate_vector_bytes(vector)
+        if self._batch and (
+            len(self._batch) >= self.max_batch_vectors
+            or self._batch_bytes + vector_bytes > self.max_batch_bytes
+        ):
+            self.flush()
+        self._batch.append(vector)
+        self._batch_bytes += vector_bytes
+
+    def add_all(self, vectors: List[Vector]) -> None:
+        for vector in vectors:
+            self.add(vector)
+
+    def flush(self) -> None:
+        if not self._batch:
+            return
+        batch = self._batch
+        self._batch = []
+        self._batch_bytes = 0
+
+        self._slots.acquire()
+        future = self._executor.submit(self._write_batch, batch)
+        future.add_done_callback(lambda _: self._slots.release())
+
+    def close(self) -> int:
+        """
+        Flush the last batch, wait for all batches and raise the first batch error.
+
+        Returns:
+            int: The total number of vectors written.
+        """
+        self.flush()
+        self._executor.shutdown(wait=True)
+        self._raise_if_failed()
+        return self.total_written
+
+    def _write_batch(self, batch: List[Vector]) -> None:
+        with upstream_call(VECTOR_STORE_BACKEND, "upsert", vectors=len(batch)) as call:
+            call["request_bytes"] = sum(estimate_vector_bytes(v) for v in batch)
+            attempt = 0
+            while True:
+                try:
+                    self.index.upsert(vectors=batch)
+                    break
+                except Exception as e:
+                    if attempt >= self.max_retries:
+                        logging.error(
+                            f"Upsert of {len(batch)} vectors failed after {attempt + 1} attempts: {str(e)}"
+                        )
+                        with self._lock:
+                            self._errors.append(e)
+                        call["status"] = "failed"
+                        return
+                    delay = 0.5 * (2**attempt)
+                    logging.warning(
+                        f"Upsert of {len(batch)} vectors failed, retrying in {delay}s: {str(e)}"
+                    )
+                    time.sleep(delay)
+                    attempt += 1
+                    call["retries"] = attempt
+
+        with self._lock:
+            self.total_written += len(batch)
+            self.batches_written += 1
+        if self.on_batch_written:
+            try:
+                self.on_batch_written([_vector_id(vector) for vector in batch])
+            except Exception as e:
+                logging.error(f"Upsert batch callback failed: {str(e)}")
+                with self._lock:
+                    self._errors.append(e)
+
+    def _raise_if_failed(self) -> None:
+        with self._lock:
+            if self._errors:
+                raise self._errors[0]
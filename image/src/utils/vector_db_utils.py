@@ -1,47 +1,215 @@
 # utils/vector_db_utils.py
 
+import asyncio
 import logging
+from types import SimpleNamespace
 from fastapi import HTTPException
-from utils.config import TEACHER_CONFIG, PINECONE_API_KEY
-from utils.embeddings import get_embedding_function
-from pinecone import Pinecone
-
-pc = Pinecone(api_key=PINECONE_API_KEY)
+from utils.config import (
+    CONTEXT_ASSEMBLY_ENABLED,
+    HYBRID_TOP_K,
+    LEXICAL_TOP_K,
+    PROFESSOR_CONTEXT_TOKEN_BUDGET,
+    TEACHER_CONFIG,
+    VECTOR_STORE_BACKEND,
+)
+from utils.context_assembler import assemble_professor_context
+from utils.clients import get_vector_index
+from utils.embedding_cache import embed_query_cached
+from utils.lexical_index import lexical_search, reciprocal_rank_fusion
+from utils.async_utils import run_blocking
+from utils.metrics import upstream_call
 
 
 async def query_vector_db(query_text, teacher_name):
     try:
-        config = TEACHER_CONFIG.get(teacher_name)
-        if not config:
-            raise ValueError(f"Invalid teacher name: {teacher_name}")
-
-        index_name = config["index_name"]
-        top_k = config["top_k"]
+        matches = await query_vector_matches(query_text, teacher_name)
+        return build_vector_db_context(matches)
+    except Exception as e:
+        logging.error(f"Failed to query vector database: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to query vector database: {str(e)}",
+        )
 
-        index = pc.Index(index_name)
-        embedding_function = get_embedding_function()
-        query_embedding = embedding_function.embed_query(query_text)
 
-        results = index.query(
-            vector=query_embedding, top_k=top_k, include_metadata=True
-        )
+async def query_hybrid(query_text, teacher_name):
+    """
+    Retrieve a teacher's chunks by vector similarity and BM25 together, fused by
+    reciprocal rank.
 
-        context_text = "\n\n---\n\n".join(
-            [match.metadata["text"] for match in results.matches]
-        )
+    The lexical ranking runs concurrently with the embedding and vector query.
+    Metadata is then fetched only for lexical hits the vector query did not
+    return, so no extra round trip is made when the two agree. If the lexical side
+    fails, the vector results are used alone.
 
-        sources = [
-            f"{match.metadata['source']} (Page {match.metadata.get('page', 'N/A')}) - {match.metadata.get('google_drive_link', 'No link available')}"
-            for match in results.matches
-        ]
+    Args:
+        query_text (str): The query.
+        teacher_name (str): The teacher whose notes to search.
 
-        return {
-            "context_text": context_text,
-            "sources": sources,
-        }
+    Returns:
+        Dict[str, Any]: "context_text" and "sources", as query_vector_db returns them.
+    """
+    try:
+        top_k = HYBRID_TOP_K or _teacher_config(teacher_name)["top_k"]
+        vector_matches, ranked = await asyncio.gather(
+            query_vector_matches(query_text, teacher_name),
+            rank_lexical_matches(query_text, teacher_name),
+        )
+        lexical_matches = await query_lexical_matches(
+            ranked, vector_matches, teacher_name
+        )
+        return build_vector_db_context(
+            fuse_matches(vector_matches, lexical_matches, top_k)
+        )
     except Exception as e:
         logging.error(f"Failed to query vector database: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to query vector database: {str(e)}",
         )
+
+
+def _teacher_config(teacher_name):
+    config = TEACHER_CONFIG.get(teacher_name)
+    if not config:
+        raise ValueError(f"Invalid teacher name: {teacher_name}")
+    return config
+
+
+async def query_vector_matches(query_text, teacher_name):
+    config = _teacher_config(teacher_name)
+    index_name = config["index_name"]
+    top_k = config["top_k"]
+
+    # Resolving the index host is a network call the first time round
+    index = await run_blocking(get_vector_index, index_name)
+    query_embedding = await run_blocking(embed_query_cached, query_text)
+
+    with upstream_call(VECTOR_STORE_BACKEND, "query", top_k=top_k) as call:
+        results = await run_blocking(
+            index.query, vector=query_embedding, top_k=top_k, include_metadata=True
+        )
+        call["response_bytes"] = sum(
+            len(str(match.metadata)) for match in results.matches
+        )
+    return results.matches
+
+
+async def rank_lexical_matches(query_text, teacher_name):
+    """
+    Rank a teacher's chunk IDs with the lexical index, best first, as
+    (chunk_id, score) pairs. Returns an empty list on any failure.
+    """
+    try:
+        return await run_blocking(lexical_search, teacher_name, query_text, LEXICAL_TOP_K)
+    except Exception as e:
+        logging.warning(f"Lexical retrieval failed for {teacher_name}: {str(e)}")
+        return []
+
+
+async def query_lexical_matches(ranked, vector_matches, teacher_name):
+    """
+    Attach metadata to lexically ranked chunk IDs, best first.
+
+    Metadata of chunks the vector query already returned is reused; only the
+    rest is fetched from the vector index. Returns an empty list on any failure.
+    """
+    try:
+        known = {match.id: match.metadata for match in vector_matches}
+        missing = [chunk_id for chunk_id, _ in ranked if chunk_id not in known]
+        if missing:
+            index_name = _teacher_config(teacher_name)["index_name"]
+            index = await run_blocking(get_vector_index, index_name)
+            with upstream_call(VECTOR_STORE_BACKEND, "fetch", ids=len(missing)):
+                response = await run_blocking(index.fetch, ids=missing)
+            known.update(
+                {chunk_id: vector.metadata for chunk_id, vector in response.vectors.items()}
+            )
+        # Chunks deleted since the index was built are skipped
+        return [
+            SimpleNamespace(id=chunk_id, score=score, metadata=known[chunk_id])
+            for chunk_id, score in ranked
+            if chunk_id in known
+        ]
+    except Exception as e:
+        logging.warning(f"Lexical retrieval failed for {teacher_name}: {str(e)}")
+        return []
+
+
+def fuse_matches(vector_matches, lexical_matches, top_k):
+    """
+    Merge vector and lexical matches by reciprocal rank fusion.
+
+    Args:
+        vector_matches (List): Matches from the vector index, best first.
+        lexical_matches (List): Matches from the lexical index, best first.
+        top_k (int): The maximum number of matches to keep.
+
+    Returns:
+        List[SimpleNamespace]: Matches with id, fused score and metadata, best first.
+    """
+    if not lexical_matches:
+        return vector_matches
+    by_id = {match.id: match for match in lexical_matches}
+    by_id.update({match.id: match for match in vector_matches})
+    fused = reciprocal_rank_fusion(
+        [[match.id for match in vector_matches], [match.id for match in lexical_matches]]
+    )
+    return [
+        SimpleNamespace(id=chunk_id, score=score, metadata=by_id[chunk_id].metadata)
+        for chunk_id, score in fused[:top_k]
+    ]
+
+
+def build_vector_db_context(matches):
+    if CONTEXT_ASSEMBLY_ENABLED:
+        return assemble_professor_context(matches, PROFESSOR_CONTEXT_TOKEN_BUDGET)
+
+    context_text = "\n\n---\n\n".join([match.metadata["text"] for match in matches])
+
+    sources = [
+        f"{match.metadata['source']} (Page {match.metadata.get('page', 'N/A')}) - {match.metadata.get('google_drive_link', 'No link available')}"
+        for match in matches
+    ]
+
+    return {
+        "context_text": context_text,
+        "sources": sources,
+    }
+
+
+def list_vector_ids(index, prefix):
+    """
+    List the IDs of all vectors whose ID starts with prefix, following every page.
+
+    Chunk IDs are "filename:page:idx", so a prefix of "filename:" enumerates all the
+    vectors of one file. Requires a serverless index.
+
+    Args:
+        index: The Pinecone index.
+        prefix (str): The ID prefix.
+
+    Returns:
+        List[str]: The matching vector IDs.
+    """
+    ids = []
+    for page in index.list(prefix=prefix):
+        ids.extend(page)
+    return ids
+
+
+def delete_vectors(index, ids, batch_size=1000):
+    """
+    Delete vectors by ID in batches the Pinecone API accepts.
+
+    Args:
+        index: The Pinecone index.
+        ids (List[str]): The IDs to delete.
+        batch_size (int): The maximum number of IDs per delete request.
+
+    Returns:
+        int: The number of IDs deleted.
+    """
+    for start in range(0, len(ids), batch_size):
+        index.delete(ids=ids[start : start + batch_size])
+    return len(ids)
@@ -0,0 +1,141 @@
+# utils/web_search_cache.py
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from utils.config import (
+    WEB_SEARCH_CACHE_TTL_SECONDS,
+    WEB_SEARCH_CACHE_STALE_SECONDS,
+    WEB_SEARCH_CACHE_MAX_SIZE,
+)
+from utils.lru_cache import TTLLRUCache
+
+
+def web_search_key(kind: str, **params) -> Tuple:
+    """
+    Build a cache key from a Tavily call type and its parameters.
+
+    Args:
+        kind (str): The Tavily method, e.g. "search" or "context".
+        **params: The call parameters. Lists are order-insensitive.
+
+    Returns:
+        Tuple: A hashable key.
+    """
+    normalized = []
+    for name, value in sorted(params.items()):
+        if isinstance(value, (list, tuple, set)):
+            value = tuple(sorted(value))
+        elif isinstance(value, str) and name == "query":
+            value = " ".join(value.split())
+        normalized.append((name, value))
+    return (kind, tuple(normalized))
+
+
+class WebSearchCache:
+    """
+    Async cache for Tavily results with single-flight coalescing and
+    stale-while-revalidate.
+
+    Concurrent misses for the same key share one upstream call. A result older than
+    ttl_seconds but within the stale window is returned immediately while one
+    background task refreshes it. Failed calls are never cached.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = WEB_SEARCH_CACHE_TTL_SECONDS,
+        stale_seconds: float = WEB_SEARCH_CACHE_STALE_SECONDS,
+        max_size: int = WEB_SEARCH_CACHE_MAX_SIZE,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.entries = TTLLRUCache(max_size, ttl_seconds + stale_seconds)
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "upstream_calls": 0,
+            "refresh_failures": 0,
+        }
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    async def get_or_fetch(
+        self, key: Hashable, fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Return the cached result for key, calling fetch at most once per key at a time.
+
+        Args:
+            key (Hashable): The cache key, usually from web_search_key.
+            fetch (Callable[[], Awaitable[Any]]): Makes the upstream call.
+
+        Returns:
+            Any: The (possibly stale) result.
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            if time.time() - fetched_at < self.ttl_seconds:
+                self._count("hits")
+                return value
+            self._count("stale_hits")
+            if key not in self._in_flight:
+                self._start_fetch(key, fetch).add_done_callback(
+                    self._log_refresh_failure
+                )
+            return value
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self._count("coalesced")
+        else:
+            self._count("misses")
+            task = self._start_fetch(key, fetch)
+        # Shield so one cancelled caller does not cancel the call for everyone else
+        return await asyncio.shield(task)
+
+    def _start_fetch(
+        self, key: Hashable, fetch: Callable[[], Awaitable[Any]]
+    ) -> asyncio.Task:
+        async def run():
+            try:
+                self._count("upstream_calls")
+                value = await fetch()
+                self.entries.set(key, (value, time.time()))
+                return value
+            finally:
+                self._in_flight.pop(key, None)
+
+        task = asyncio.ensure_future(run())
+        self._in_flight[key] = task
+        return task
+
+    def _log_refresh_failure(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            self._count("refresh_failures")
+            logging.warning(
+                f"Background web search refresh failed: {str(task.exception())}"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+        stats["entries"] = len(self.entries)
+        stats["in_flight"] = len(self._in_flight)
+        return stats
+
+
+_web_search_cache = WebSearchCache()
+
+
+def get_web_search_cache() -> WebSearchCache:
+    return _web_search_cache
@@ -1,20 +1,27 @@
 # utils/web_search_utils.py
 
-from tavily import TavilyClient
-from utils.config import TAVILY_API_KEY
+from utils.clients import get_tavily_client
+from utils.async_utils import run_blocking
+from utils.web_search_cache import get_web_search_cache, web_search_key
+from utils.metrics import upstream_call
 import logging
 from typing import List
 from fastapi import HTTPException
 
-tavily_client = TavilyClient(api_key=TAVILY_API_KEY)
-
-
 async def perform_web_search(query: str):
     try:
-        results = tavily_client.get_search_context(
-            query=query,
-            search_depth="advanced",
-            max_tokens=2000,
+        params = {"query": query, "search_depth": "advanced", "max_tokens": 2000}
+
+        async def fetch():
+            with upstream_call("tavily", "search_context") as call:
+                context = await run_blocking(
+                    get_tavily_client().get_search_context, **params
+                )
+                call["response_bytes"] = len(context.encode("utf-8"))
+                return context
+
+        results = await get_web_search_cache().get_or_fetch(
+            web_search_key("context", **params), fetch
         )
         return {"context": results, "sources": extract_sources(results)}
     except Exception as e:
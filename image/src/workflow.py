@@ -9,7 +9,18 @@ from agents.web_search_agent import web_search_agent
 from agents.result_processing_agent import result_processing_agent
 from agents.response_formatting_agent import response_formatting_agent
 from agents.translator_agent import translator_agent
-from typing import Optional, Tuple, Dict, Any, TypedDict
+from agents.result_processing_agent import combined_prompt_params
+from utils.answer_cache import get_answer_cache
+from utils.async_utils import run_blocking
+from utils.config import ANSWER_CACHE_ENABLED
+from utils.embedding_cache import embed_query_cached
+from utils.metrics import instrument_node
+from utils.query_processing import stream_query
+from utils.section_parser import SectionParser
+from utils.translation_utils import translate_text, translate_texts
+from utils.config import COMBINED_PROMPT_TEMPLATE
+from langchain.prompts import ChatPromptTemplate
+from typing import Optional, Tuple, Dict, Any, TypedDict, AsyncIterator
 
 
 def create_workflow():
@@ -35,6 +46,7 @@ def create_workflow():
     return workflow.compile()
 
 
+@instrument_node("parallel_search")
 async def parallel_search(state: AgentState) -> AgentState:
     vector_db_task = asyncio.create_task(vector_db_agent(state))
     web_search_task = asyncio.create_task(web_search_agent(state))
@@ -48,15 +60,116 @@ async def parallel_search(state: AgentState) -> AgentState:
     return state
 
 
-app_workflow = create_workflow()
+_app_workflow = None
+
+
+def get_workflow():
+    # Compiled on first use so that importing this module stays cheap
+    global _app_workflow
+    if _app_workflow is None:
+        _app_workflow = create_workflow()
+    return _app_workflow
 
 
 async def multi_agent_query(
     query_text: str, teacher_name: str, target_language: Optional[str] = None
 ):
+    query_embedding = None
+    if ANSWER_CACHE_ENABLED:
+        # The embedding is cached, so the vector search reuses it on a miss
+        query_embedding = await run_blocking(embed_query_cached, query_text)
+        # May read the corpus version from S3, so it runs off the event loop
+        cached_result = await run_blocking(
+            get_answer_cache().lookup, teacher_name, target_language, query_embedding
+        )
+        if cached_result is not None:
+            return cached_result
+
     initial_state = create_initial_state(query_text, teacher_name, target_language)
 
-    result = await app_workflow.ainvoke(initial_state)
+    result = await get_workflow().ainvoke(initial_state)
+
+    # An untranslated fallback must not be served to later queries in this language
+    if query_embedding is not None and not result.get("translation_failed"):
+        await run_blocking(
+            get_answer_cache().store,
+            teacher_name,
+            target_language,
+            query_embedding,
+            result["translated_result"],
+        )
     return result[
         "translated_result"
     ]  # This will be the original result if no translation was needed
+
+
+async def _translate_section(content, target_language: Optional[str], failures):
+    if not target_language or target_language.lower() == "english":
+        return content
+    if isinstance(content, list):
+        return await translate_texts(content, target_language, failures)
+    return await translate_text(content, target_language, failures)
+
+
+async def stream_combined_query(
+    query_text: str, teacher_name: str, target_language: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of multi_agent_query.
+
+    Runs the same query processing and parallel search, then streams the Bedrock
+    answer. Yields "token" events as text is generated, a "section" event as soon as
+    each section of the answer is complete, and a final "done" event with the whole
+    formatted (and translated) result.
+    """
+    query_embedding = None
+    if ANSWER_CACHE_ENABLED:
+        query_embedding = await run_blocking(embed_query_cached, query_text)
+        cached_result = await run_blocking(
+            get_answer_cache().lookup, teacher_name, target_language, query_embedding
+        )
+        if cached_result is not None:
+            for section, content in cached_result.items():
+                yield {"type": "section", "section": section, "content": content}
+            yield {"type": "done", "result": cached_result, "cached": True}
+            return
+
+    state = create_initial_state(query_text, teacher_name, target_language)
+    state = query_processing_agent(state)
+    state = await parallel_search(state)
+
+    parser = SectionParser()
+    translated_result = {}
+    translation_failures = []
+    prompt_template = ChatPromptTemplate.from_template(COMBINED_PROMPT_TEMPLATE)
+    async for token in stream_query(
+        query_text, prompt_template, combined_prompt_params(state)
+    ):
+        yield {"type": "token", "text": token}
+        for section, content in parser.feed(token):
+            content = await _translate_section(
+                content, target_language, translation_failures
+            )
+            translated_result[section] = content
+            yield {"type": "section", "section": section, "content": content}
+
+    for section, content in parser.close():
+        content = await _translate_section(
+            content, target_language, translation_failures
+        )
+        translated_result[section] = content
+        yield {"type": "section", "section": section, "content": content}
+
+    result = {
+        section: translated_result.get(section, content)
+        for section, content in parser.result.items()
+    }
+    if query_embedding is not None and not translation_failures:
+        await run_blocking(
+            get_answer_cache().store,
+            teacher_name,
+            target_language,
+            query_embedding,
+            result,
+        )
+    yield {"type": "done", "result": result, "cached": False}
@@ -2,7 +2,7 @@ import * as cdk from "aws-cdk-lib";
 import { Construct } from "constructs";
 import * as fs from 'fs';
 import * as path from 'path';
-import { AttributeType, BillingMode, Table } from "aws-cdk-lib/aws-dynamodb";
+import { AttributeType, BillingMode, ProjectionType, Table } from "aws-cdk-lib/aws-dynamodb";
 import {
   DockerImageFunction,
   DockerImageCode,
@@ -47,6 +47,23 @@ export class TaCdkInfraStack extends cdk.Stack {
       billingMode: BillingMode.PAY_PER_REQUEST,
     });
 
+    // Look up a teacher's processed files without scanning the whole table
+    processedFilesTable.addGlobalSecondaryIndex({
+      indexName: "teacher-index",
+      partitionKey: { name: "teacher", type: AttributeType.STRING },
+      sortKey: { name: "filename", type: AttributeType.STRING },
+      projectionType: ProjectionType.INCLUDE,
+      nonKeyAttributes: ["etag"],
+    });
+
+    // Query embeddings shared by all Lambda containers; expired entries are removed by TTL
+    const embeddingCacheTable = new Table(this, "EmbeddingCacheTable", {
+      tableName: "teaching-assistant-tavily-embedding-cache",
+      partitionKey: { name: "cache_key", type: AttributeType.STRING },
+      billingMode: BillingMode.PAY_PER_REQUEST,
+      timeToLiveAttribute: "expires_at",
+    });
+
     // Function to handle the API requests. Uses same base image, but different handler.
     const apiImageCode = DockerImageCode.fromImageAsset("../image", {
       cmd: ["main.handler"]
@@ -63,6 +80,8 @@ export class TaCdkInfraStack extends cdk.Stack {
         S3_BUCKET: 'teaching-assistant-tavily',  // Added S3_BUCKET environment variable
         PROCESSED_FILES_TABLE: processedFilesTable.tableName,  // Added PROCESSED_FILES_TABLE environment variable
         TAVILY_API_KEY: tavilyApiKey,
+        EMBEDDING_CACHE_BACKEND: "dynamodb",
+        EMBEDDING_CACHE_TABLE: embeddingCacheTable.tableName,
       },
     });
 
@@ -90,6 +109,7 @@ export class TaCdkInfraStack extends cdk.Stack {
     // Grant permissions for all resources to work together.
     teachingAssistantTavilyQueryTable.grantReadWriteData(apiFunction);
     processedFilesTable.grantReadWriteData(apiFunction);
+    embeddingCacheTable.grantReadWriteData(apiFunction);
 
     // Output the URL for the API function.
     new cdk.CfnOutput(this, "FunctionUrl", {